@@ -0,0 +1,90 @@
+import itertools
+import os
+
+from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from app import profiling
+from app.models import RequestProfile
+
+# Hottest stacks shown on a profile page
+TOP_STACKS = 20
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Profiles sampled by `app.profiling`, read only"""
+
+    list_display = (
+        'created', 'method', 'path', 'url_name', 'status', 'duration', 'samples', 'host',
+        'download'
+    )
+    list_filter = ['url_name', 'method', 'status', 'host']
+    search_fields = ['path']
+    readonly_fields = [
+        'created', 'method', 'path', 'url_name', 'status', 'duration', 'samples', 'host',
+        'download', 'stacks'
+    ]
+    fields = readonly_fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:profile_id>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='app_requestprofile_download'
+            ),
+        ] + super(RequestProfileAdmin, self).get_urls()
+
+    def download_view(self, request, profile_id):
+        """Collapsed stacks file, open it in speedscope or a flame graph tool"""
+
+        profile = self.get_object(request, str(profile_id))
+
+        if profile is None or not self.has_view_or_change_permission(request, profile):
+            raise Http404
+
+        try:
+            return FileResponse(
+                open(profile.path_on_disk, 'rb'), as_attachment=True, filename=profile.filename
+            )
+        except FileNotFoundError:
+            raise Http404
+
+    def download(self, obj):
+        if not os.path.exists(obj.path_on_disk):
+            # Stored on another host, e.g. another replica or a restarted pod
+            return format_html('{filename} (on {host})', filename=obj.filename, host=obj.host)
+
+        return format_html(
+            '<a href="{url}">{filename}</a>',
+            url=reverse('admin:app_requestprofile_download', args=[obj.pk]),
+            filename=obj.filename
+        )
+
+    def stacks(self, obj):
+        """Innermost frames of the hottest stacks"""
+
+        try:
+            with open(obj.path_on_disk) as profile:
+                lines = [line.rstrip('\n') for line in itertools.islice(profile, TOP_STACKS)]
+        except FileNotFoundError:
+            return '-' if obj.is_local else 'Stored on {host}'.format(host=obj.host or '?')
+
+        return format_html('<pre>{}</pre>', '\n'.join(
+            '{count:>6} {frames}'.format(
+                count=count, frames=' < '.join(reversed(stack.split(';')[-4:]))
+            )
+            for stack, count in (line.rsplit(' ', 1) for line in lines)
+        ))
+
+    def delete_model(self, request, obj):
+        profiling.delete([obj])
+
+    def delete_queryset(self, request, queryset):
+        profiling.delete(queryset)
@@ -0,0 +1,20 @@
+"""
+ASGI config for myapp project.
+
+It exposes the ASGI callable as a module-level variable named ``application``,
+chat proxy views are served asynchronously and everything else by the WSGI
+application. Serve it with an ASGI server, e.g. `uvicorn app.asgi:application`.
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+
+wsgi_application = get_wsgi_application()
+
+from app.asgi_handler import AsyncViewsHandler  # noqa: E402
+from studio.async_views import views  # noqa: E402
+
+application = AsyncViewsHandler(views, wsgi_application)
@@ -0,0 +1,182 @@
+"""
+ASGI application serving asynchronous views, see `app.asgi`.
+
+Async views are registered by URL name and go through the whole `MIDDLEWARE`
+chain like their synchronous versions: sessions are saved, request IDs and
+security headers are sent. Middleware run in a thread which waits for the
+view, the view and its API calls run on the event loop. Blocking code the view
+runs with `run_sync` doesn't see the request context. Any other request is
+handed to the Django WSGI handler in a thread.
+"""
+from asgiref.sync import AsyncToSync, sync_to_async
+from asgiref.wsgi import WsgiToAsgiInstance
+from django.core.handlers.base import BaseHandler
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.signals import request_started
+from django.urls import Resolver404, resolve
+
+from app.async_services import close_session
+from studio.decorators import json_login_required
+
+
+async def read_body(receive):
+    """Reads the whole request body, it may come in several messages"""
+
+    body = b''
+
+    while True:
+        message = await receive()
+
+        if message['type'] == 'http.disconnect':
+            break
+
+        body += message.get('body', b'')
+
+        if not message.get('more_body', False):
+            break
+
+    return body
+
+
+def build_environ(scope, body):
+    """Builds WSGI environ of a request, as `asgiref` does for WSGI applications"""
+
+    instance = WsgiToAsgiInstance(None)
+    instance.scope = scope
+    environ = instance.build_environ(scope, {'body': body})
+
+    # Body is read already, chunked requests come without a length
+    environ['CONTENT_LENGTH'] = str(len(body))
+
+    return environ
+
+
+class WsgiFallback(WsgiToAsgiInstance):
+    """
+    Runs a WSGI application for a single request. Unlike `WsgiToAsgiInstance`
+    it reads bodies sent in several messages and closes responses, Django
+    releases database connections when a response is closed.
+    """
+
+    async def __call__(self, scope, receive, send):
+        self.scope = scope
+        self.sync_send = AsyncToSync(send)
+        await self.run_wsgi_app({'type': 'http.request', 'body': await read_body(receive)})
+
+    @sync_to_async
+    def run_wsgi_app(self, message):
+        environ = self.build_environ(self.scope, message)
+        response = self.wsgi_application(environ, self.start_response)
+
+        try:
+            for output in response:
+                if not self.response_started:
+                    self.response_started = True
+                    self.sync_send(self.response_start)
+
+                self.sync_send({'type': 'http.response.body', 'body': output, 'more_body': True})
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+
+        if not self.response_started:
+            self.response_started = True
+            self.sync_send(self.response_start)
+
+        self.sync_send({'type': 'http.response.body'})
+
+
+async def send_response(response, send):
+    headers = [
+        (name.encode('latin-1'), value.encode('latin-1')) for name, value in response.items()
+    ]
+    headers += [
+        (b'Set-Cookie', cookie.output(header='').strip().encode('latin-1'))
+        for cookie in response.cookies.values()
+    ]
+
+    await send({
+        'type': 'http.response.start',
+        'status': response.status_code,
+        'headers': headers,
+    })
+    await send({'type': 'http.response.body', 'body': response.content})
+
+
+class AsyncViewsHandler(BaseHandler):
+    """
+    ASGI application, `views` maps URL names to coroutine views. Middleware
+    run in a thread as for any request, the view is awaited on the event loop
+    of the server.
+    """
+
+    def __init__(self, views, wsgi_application):
+        super(AsyncViewsHandler, self).__init__()
+        self.views = views
+        self.wsgi_application = wsgi_application
+        self.load_middleware()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+
+        if not self.is_async(scope):
+            return await WsgiFallback(self.wsgi_application)(scope, receive, send)
+
+        request = WSGIRequest(build_environ(scope, await read_body(receive)))
+        response = await self.handle(request)
+
+        try:
+            await send_response(response, send)
+        finally:
+            # Django releases database connections when a response is closed
+            await sync_to_async(response.close)()
+
+    def is_async(self, scope):
+        """Whether a request is served by an async view"""
+
+        if scope['type'] != 'http' or scope['method'] != 'POST':
+            return False
+
+        try:
+            return resolve(scope['path']).view_name in self.views
+        except Resolver404:
+            return False
+
+    @sync_to_async
+    def handle(self, request):
+        request_started.send(sender=self.__class__, environ=request.environ)
+        return self.get_response(request)
+
+    def _get_response(self, request):
+        """
+        Applies view middleware with the synchronous version of the view, so
+        CSRF and API budget are the same for both, then waits for the async
+        view in the thread of the middleware
+        """
+
+        match = request.resolver_match = resolve(request.path_info)
+
+        for middleware_method in self._view_middleware:
+            response = middleware_method(request, match.func, match.args, match.kwargs)
+
+            if response:
+                return response
+
+        view = json_login_required(AsyncToSync(self.views[match.view_name]))
+
+        try:
+            return view(request, *match.args, **match.kwargs)
+        except Exception as exception:
+            return self.process_exception_by_middleware(exception, request)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await close_session()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
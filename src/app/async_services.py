@@ -0,0 +1,167 @@
+"""
+Asynchronous counterpart of `app.services.fetch_api`, used by the ASGI views.
+
+A call waiting for the API costs a socket instead of a worker. Requests are
+built, logged, validated and guarded by circuit breakers exactly as in
+`fetch_api`, client errors are raised as the matching `requests` exceptions
+so callers handle both the same way.
+"""
+import asyncio
+import datetime
+import functools
+import logging
+import threading
+import types
+
+import aiohttp
+
+from constance import config
+from django.conf import settings
+from requests import ConnectionError, RequestException, Timeout
+from requests.compat import json as complexjson
+
+from app import metrics
+from app.breaker import CircuitBreaker
+from app.services import (
+    VERIFY,
+    check_access,
+    log_response,
+    set_headers,
+    validate_response
+)
+
+logger = logging.getLogger(__name__)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def run_sync(function, *args, **kwargs):
+    """Runs blocking code (cache, database, constance) outside of the event loop"""
+
+    return asyncio.get_event_loop().run_in_executor(
+        None, functools.partial(function, *args, **kwargs)
+    )
+
+
+def get_session():
+    """Returns a client session of the running event loop, creates it on first use"""
+
+    loop = asyncio.get_event_loop()
+
+    with _sessions_lock:
+        session = _sessions.get(loop)
+
+        if session is None or session.closed:
+            session = _sessions[loop] = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=settings.API_ASYNC_CONNECTIONS,
+                    keepalive_timeout=settings.API_POOL_KEEPALIVE
+                ),
+                # Session is shared between users, never store cookies set by the API
+                cookie_jar=aiohttp.DummyCookieJar(),
+                # Same body encoding as `requests`, both clients send identical calls
+                json_serialize=complexjson.dumps
+            )
+
+    return session
+
+
+async def close_session():
+    """Closes client session of the running event loop"""
+
+    with _sessions_lock:
+        session = _sessions.pop(asyncio.get_event_loop(), None)
+
+    if session is not None:
+        await session.close()
+
+
+class Response(object):
+    """
+    Response already read from the API, with the attributes of a
+    `requests.Response` used to log and validate it
+    """
+
+    def __init__(self, request, status_code, headers, content, elapsed):
+        self.request = request
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.elapsed = datetime.timedelta(seconds=elapsed)
+
+    def json(self):
+        return complexjson.loads(self.content.decode('utf-8'))
+
+    def close(self):
+        pass
+
+
+def prepare(path, timeout, aiid=None):
+    """Blocking part of a call, returns a circuit breaker and a timeout to use"""
+
+    breaker = CircuitBreaker(path, aiid)
+    return breaker, breaker.before(timeout or config.API_DEFAULT_TIMEOUT)
+
+
+async def send(method, url, path, headers, json, params, timeout, verify):
+    """Sends a request, tracked in metrics, returns a read `Response`"""
+
+    loop = asyncio.get_event_loop()
+    request = types.SimpleNamespace(method=method.upper(), url=url, headers=headers, body=json)
+
+    with metrics.track(method, path) as call:
+        started = loop.time()
+
+        # Query is encoded as by `requests`, values of any type, `None` dropped
+        params = {key: str(value) for key, value in params.items() if value is not None}
+
+        try:
+            async with get_session().request(
+                method,
+                url,
+                headers=headers,
+                json=json,
+                params=params,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+                ssl=None if verify else False
+            ) as raw:
+                content = await raw.read()
+        except asyncio.TimeoutError as error:
+            raise Timeout(error)
+        except aiohttp.ClientError as error:
+            raise ConnectionError(error)
+
+        response = Response(request, raw.status, raw.headers, content, loop.time() - started)
+        call.responded(response)
+
+    return response
+
+
+async def fetch_api_async(
+    path, token, method='GET', json={}, headers={}, params={}, timeout=0, verify=VERIFY,
+    **kwargs
+):
+    """
+    Fetches data from the API using token (if provided), same as `fetch_api`
+    but without files, form data, memoization and streaming
+    """
+
+    url = settings.API_URL + path.format(**kwargs)
+    headers = {**headers, **set_headers(token)}
+
+    breaker, timeout = await run_sync(prepare, path, timeout, kwargs.get('aiid'))
+
+    try:
+        response = await send(method, url, path, headers, json, params, timeout, verify)
+    except RequestException:
+        await run_sync(breaker.failure)
+        raise
+
+    await run_sync(breaker.record, response)
+
+    decoded = await run_sync(log_response, response, token, method, url, False)
+
+    check_access(response)
+
+    return validate_response(response, decoded)
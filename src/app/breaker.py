@@ -0,0 +1,189 @@
+"""
+Circuit breakers around API calls, one per endpoint family.
+
+When the API is degraded every worker used to wait for the full timeout of
+each call, until the console run out of workers. Calls of a family and their
+failures are counted across all workers in the `default` cache, in windows of
+`API_BREAKER_WINDOW` seconds. Once a window has at least `API_BREAKER_MIN_CALLS`
+calls and `API_BREAKER_FAILURE_RATIO` of them failed, the breaker opens and
+calls fail fast with `CircuitOpenError`, a few errors of a single user don't
+stop everybody else. After `API_BREAKER_COOLDOWN` seconds a single probe call
+is let through, its outcome closes or re-opens the breaker.
+
+Chat calls have a breaker per AI, a broken bot doesn't stop chats with others.
+
+While a family is failing its calls also get shorter timeouts, based on the
+latency observed when the API was healthy.
+"""
+import logging
+import threading
+import time
+
+from constance import config
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Families are matched against path templates, first match wins
+FAMILIES = (
+    ('insights', '/insights/'),
+    ('facebook', '/facebook'),
+    ('training', '/training'),
+    ('chat', '/chat'),
+)
+DEFAULT_FAMILY = 'api'
+
+# Families with a breaker per AI
+PER_AI_FAMILIES = ('chat',)
+
+# Weight of the latest sample in the moving average of latency
+LATENCY_WEIGHT = 0.2
+
+
+class CircuitOpenError(Exception):
+    """API calls of a family are failing, the call wasn't even tried"""
+
+    def __init__(self, family, retry_after):
+        super(CircuitOpenError, self).__init__(
+            'API calls of {family} are failing, retry in {retry_after:.0f}s'.format(
+                family=family,
+                retry_after=retry_after
+            )
+        )
+        self.family = family
+        self.retry_after = retry_after
+
+
+class LatencyTracker(object):
+    """Moving average of response times per path, kept by each worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._averages = {}
+
+    def add(self, path, seconds):
+        with self._lock:
+            average = self._averages.get(path, seconds)
+            self._averages[path] = LATENCY_WEIGHT * seconds + (1 - LATENCY_WEIGHT) * average
+
+    def get(self, path):
+        with self._lock:
+            return self._averages.get(path)
+
+
+latency = LatencyTracker()
+
+
+def get_family(path):
+    """Returns endpoint family of an API path template"""
+
+    for family, pattern in FAMILIES:
+        if pattern in path:
+            return family
+
+    return DEFAULT_FAMILY
+
+
+class CircuitBreaker(object):
+    """
+    Guards a single API call, state is shared with all other calls of a
+    family, or of a family and an AI
+    """
+
+    def __init__(self, path, aiid=None):
+        self.path = path
+        self.family = get_family(path)
+        self.probing = False
+
+        self.scope = self.family
+
+        if aiid and self.family in PER_AI_FAMILIES:
+            self.scope = '{family}:{aiid}'.format(family=self.family, aiid=aiid)
+
+        self.prefix = 'breaker:{scope}:'.format(scope=self.scope)
+        self.open_key = self.prefix + 'open'
+        self.probe_key = self.prefix + 'probe'
+
+        window = int(time.time() // config.API_BREAKER_WINDOW)
+        self.calls_key = '{prefix}calls:{window}'.format(prefix=self.prefix, window=window)
+        self.failures_key = '{prefix}failures:{window}'.format(prefix=self.prefix, window=window)
+
+    def before(self, timeout):
+        """
+        Raises `CircuitOpenError` if the call shouldn't be made, otherwise
+        returns a timeout the call should use
+        """
+
+        state = cache.get_many([self.open_key, self.failures_key])
+        opened_until = state.get(self.open_key)
+
+        if opened_until:
+            retry_after = opened_until - time.time()
+
+            if retry_after > 0:
+                raise CircuitOpenError(self.family, retry_after)
+
+            # Half open, only one caller across all workers probes the API
+            if not cache.add(self.probe_key, 1, timeout):
+                raise CircuitOpenError(self.family, timeout)
+
+            self.probing = True
+
+        if self.probing or state.get(self.failures_key):
+            return self.adapt_timeout(timeout)
+
+        return timeout
+
+    def adapt_timeout(self, timeout):
+        """Shorter timeout for a failing family, never longer than configured"""
+
+        average = latency.get(self.path)
+
+        if average is None:
+            return timeout
+
+        return min(
+            timeout,
+            max(settings.API_ADAPTIVE_TIMEOUT_MIN, average * settings.API_ADAPTIVE_TIMEOUT_FACTOR)
+        )
+
+    def count(self, key):
+        """Increments a counter of the current window"""
+
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # First call of the window
+            cache.add(key, 0, 2 * config.API_BREAKER_WINDOW)
+            return cache.incr(key)
+
+    def success(self, elapsed):
+        latency.add(self.path, elapsed)
+
+        if self.probing:
+            cache.delete_many([self.open_key, self.probe_key, self.calls_key, self.failures_key])
+            logger.info('API calls of %s recovered, closing circuit breaker', self.scope)
+        else:
+            self.count(self.calls_key)
+
+    def failure(self):
+        calls = self.count(self.calls_key)
+        failures = self.count(self.failures_key)
+
+        if self.probing or calls >= config.API_BREAKER_MIN_CALLS and \
+                failures >= calls * config.API_BREAKER_FAILURE_RATIO:
+            cache.set(self.open_key, time.time() + config.API_BREAKER_COOLDOWN, None)
+            cache.delete(self.probe_key)
+            logger.warning(
+                'API calls of %s failed %s times out of %s, opening circuit breaker',
+                self.scope, failures, calls
+            )
+
+    def record(self, response):
+        """Server errors count as failures, anything else means the API is alive"""
+
+        if response.status_code >= 500:
+            self.failure()
+        else:
+            self.success(response.elapsed.total_seconds())
@@ -0,0 +1,68 @@
+"""
+Budgets of API calls per view.
+
+Views declare how many API calls a request may make, as `api_budget` class
+attribute, or with the `api_budget` decorator for function views, optionally
+per HTTP method:
+
+    class IntentsEditView(StudioViewMixin, FormView):
+        api_budget = {'get': 5, 'post': 8}
+
+Calls sent during a request are recorded in its request context, memoized and
+cached responses don't count. `app.middleware.APIBudgetMiddleware` logs a
+warning with the calls made whenever a request goes over budget, with
+`API_BUDGET_STRICT` on it raises `APIBudgetExceeded` instead so specs fail.
+"""
+from app import context
+
+
+class APIBudgetExceeded(Exception):
+
+    def __init__(self, view, budget, calls):
+        self.view = view
+        self.budget = budget
+        self.calls = calls
+
+    def __str__(self):
+        return '{view} made {count} API calls, budget is {budget}: {calls}'.format(
+            view=self.view,
+            count=len(self.calls),
+            budget=self.budget,
+            calls=', '.join(self.calls)
+        )
+
+
+def api_budget(calls):
+    """Declares budget of a function view"""
+
+    def decorator(view):
+        view.api_budget = calls
+        return view
+
+    return decorator
+
+
+def get_budget(view, method):
+    """Returns budget of a view for an HTTP method, `None` if there isn't any"""
+
+    budget = getattr(view, 'api_budget', None)
+
+    if budget is None:
+        # Class based views keep it on the class
+        budget = getattr(getattr(view, 'view_class', None), 'api_budget', None)
+
+    if isinstance(budget, dict):
+        return budget.get(method.lower())
+
+    return budget
+
+
+def record(method, path):
+    """Records an API call made by the current request"""
+
+    request_context = context.get_current()
+
+    if request_context is not None:
+        request_context.api_calls.append('{method} {path}'.format(
+            method=method.upper(), path=path
+        ))
@@ -0,0 +1,92 @@
+"""
+Concurrent fan-out of independent API calls.
+
+Most of the studio pages need a handful of unrelated API resources, fetching
+them one after another makes a page as slow as the sum of all calls. Calls
+declared together are sent from a bounded, process-wide thread pool instead,
+so a page is only as slow as the slowest call.
+"""
+import contextvars
+import logging
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+_worker = threading.local()
+
+
+def get_executor():
+    """Returns the process-wide executor, creates it on first use"""
+
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.API_FANOUT_WORKERS,
+                    thread_name_prefix='api-fanout'
+                )
+
+    return _executor
+
+
+def _call(function, *args):
+    """Runs a single resource call, errors are returned not raised"""
+
+    active, _worker.active = getattr(_worker, 'active', False), True
+    try:
+        return function(*args), None
+    except Exception as error:
+        return None, error
+    finally:
+        _worker.active = active
+
+
+def fetch_all(resources, return_exceptions=False):
+    """
+    Calls every resource concurrently and returns a dictionary of results with
+    the same keys. Resources are described as `name: (function, *args)`.
+
+    Errors are handled per resource, every call runs to completion. If
+    `return_exceptions` is set failures are returned in place of results,
+    otherwise the first failed resource, in declaration order, re-raises its
+    error so an `Http404` behaves as if calls were made one by one.
+    """
+
+    serial = (
+        len(resources) < 2 or
+        settings.API_FANOUT_WORKERS < 2 or
+        # Nested fan-out would wait for workers held by its own caller
+        getattr(_worker, 'active', False)
+    )
+
+    if serial:
+        outcomes = {
+            name: _call(*resource) for name, resource in resources.items()
+        }
+    else:
+        # Workers run in a copy of the caller's context to share request state
+        futures = {
+            name: get_executor().submit(contextvars.copy_context().run, _call, *resource)
+            for name, resource in resources.items()
+        }
+        outcomes = {name: future.result() for name, future in futures.items()}
+
+    results = {}
+
+    for name, (result, error) in outcomes.items():
+        if error is None:
+            results[name] = result
+        elif return_exceptions:
+            results[name] = error
+        else:
+            raise error
+
+    return results
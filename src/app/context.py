@@ -0,0 +1,60 @@
+"""
+Request context, state of the HTTP request being handled, available to code
+which doesn't get a request object, like `app.services.fetch_api`.
+
+It's activated by `app.middleware.RequestContextMiddleware` and stored in a
+context variable, fan-out workers run in a copy of the caller's context.
+"""
+import re
+import uuid
+
+from contextvars import ContextVar
+
+from app.identity_map import IdentityMap
+
+_current = ContextVar('request_context', default=None)
+
+# Request IDs set by a proxy are kept if they look like one
+REQUEST_ID = re.compile(r'^[\w.:-]{1,200}$')
+
+
+def get_request_id(request):
+    """Returns ID of a request, sent by a proxy in `X-Request-ID` or a new one"""
+
+    request_id = request.META.get('HTTP_X_REQUEST_ID', '')
+    return request_id if REQUEST_ID.match(request_id) else uuid.uuid4().hex
+
+
+class RequestContext(object):
+    """State of a single HTTP request"""
+
+    def __init__(self, request_id=None, session=None):
+        self.identity_map = IdentityMap()
+
+        # API calls sent while handling the request, see `app.budget`
+        self.api_calls = []
+
+        self.request_id = request_id
+        self.session = session
+
+    @property
+    def dev_id(self):
+        """
+        Developer ID of the user, read from the session the view has already
+        loaded, so it costs no round trip to the session store
+        """
+        return self.session.get('dev_id') if self.session is not None else None
+
+
+def get_current():
+    """Returns context of the current request, `None` outside of a request"""
+    return _current.get()
+
+
+def activate(context):
+    """Makes the context current, returns a token used to deactivate it"""
+    return _current.set(context)
+
+
+def deactivate(token):
+    _current.reset(token)
@@ -1,4 +1,6 @@
+from django.http import JsonResponse
 from django.shortcuts import render
+import math
 import sys
 
 
@@ -28,3 +30,21 @@ def handler500(request):
     }
 
     return render(request, '500.html', context, status=500)
+
+
+def handler503(request, exception):
+    """API is failing and calls fail fast, Ajax requests get a JSON response"""
+
+    if 'text/html' in request.META.get('HTTP_ACCEPT', ''):
+        context = {
+            'request': request,
+            'error_type': type(exception).__name__
+        }
+        response = render(request, '500.html', context, status=503)
+    else:
+        response = JsonResponse({
+            'status': {'code': 503, 'info': str(exception)}
+        }, status=503)
+
+    response['Retry-After'] = math.ceil(exception.retry_after)
+    return response
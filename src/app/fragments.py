@@ -0,0 +1,75 @@
+"""
+Cache of rendered template fragments, the chrome repeated on every page.
+
+Fragments are kept in the `default` cache, rendered once per language and
+the values they vary on, like the user, see `app.templatetags.app_tags.fragment`. Every
+fragment carries versions it was rendered with, a global one and one of its
+bot. Bumping a version after a write, e.g. in `studio.services.invalidate_ai`,
+makes fragments render again without having to know their keys. A fragment
+and its versions are read in a single round trip. Fragments of a previous
+release of the console, with different templates, are never served.
+"""
+import hashlib
+import uuid
+
+from constance import config
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import translation
+
+GLOBAL_VERSION_KEY = 'fragment.version'
+AI_VERSION_KEY = 'fragment.version:ai:{aiid}'
+
+
+def make_key(name, aiid, vary_on):
+    digest = hashlib.sha256(
+        repr((settings.CONSOLE_VERSION, aiid, translation.get_language(), vary_on)).encode()
+    ).hexdigest()[:32]
+
+    return 'fragment:{name}:{digest}'.format(name=name, digest=digest)
+
+
+def get_version_keys(aiid):
+    return [GLOBAL_VERSION_KEY] + ([AI_VERSION_KEY.format(aiid=aiid)] if aiid else [])
+
+
+def create_version(key):
+    """
+    Stores a new version if there is none, a version evicted from cache must
+    not match fragments rendered before it was lost
+    """
+
+    version = uuid.uuid4().hex
+
+    if cache.add(key, version, timeout=None):
+        return version
+
+    return cache.get(key, version)
+
+
+def bump(aiid=None):
+    """Invalidates fragments of a bot, or all of them, and API responses of its version"""
+
+    key = AI_VERSION_KEY.format(aiid=aiid) if aiid else GLOBAL_VERSION_KEY
+    cache.set(key, uuid.uuid4().hex, timeout=None)
+
+
+def get_or_render(name, aiid, vary_on, render):
+    """Returns a cached fragment, renders and caches it if it's missing or outdated"""
+
+    key = make_key(name, aiid, vary_on)
+    version_keys = get_version_keys(aiid)
+
+    found = cache.get_many([key] + version_keys)
+    versions = tuple(found.get(version_key) or create_version(version_key)
+                     for version_key in version_keys)
+
+    fragment = found.get(key)
+
+    if fragment is not None and fragment[0] == versions:
+        return fragment[1]
+
+    content = render()
+    cache.set(key, (versions, content), timeout=config.FRAGMENT_CACHE_TTL)
+
+    return content
@@ -0,0 +1,34 @@
+"""
+gunicorn server hooks, used with `gunicorn --config python:app.gunicorn`.
+
+Workers write their metrics to files in `prometheus_multiproc_dir`, files of
+previous runs are removed when the server starts and gauges of exited workers
+are dropped. Workers parse all templates before they take requests.
+"""
+import os
+import shutil
+
+from prometheus_client import multiprocess
+
+
+def get_metrics_dir():
+    return os.environ.get('prometheus_multiproc_dir')
+
+
+def on_starting(server):
+    path = get_metrics_dir()
+
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def post_worker_init(worker):
+    from app import template_cache
+
+    template_cache.warm_up()
+
+
+def child_exit(server, worker):
+    if get_metrics_dir():
+        multiprocess.mark_process_dead(worker.pid)
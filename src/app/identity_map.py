@@ -0,0 +1,54 @@
+"""
+Identity map of API responses read during a single HTTP request.
+
+A request often reads the same resource more than once, e.g. the studio
+navigation and a settings form both need `get_ai`. Responses of safe calls
+are kept for the lifetime of the request, keyed by token, path and params,
+and any mutating call drops responses it could have changed.
+"""
+import copy
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class IdentityMap(object):
+    """Thread safe store of API responses, shared by fan-out workers"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    @staticmethod
+    def key(token, url, params):
+        return (token, url, json.dumps(params, sort_keys=True, default=str))
+
+    def get(self, key):
+        """Returns a copy of a stored response, views are free to mutate it"""
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+        return copy.deepcopy(entry[1]) if entry else None
+
+    def set(self, key, aiid, response):
+        with self._lock:
+            self._entries[key] = (aiid, copy.deepcopy(response))
+
+    def invalidate(self, token, aiid=None):
+        """
+        Drops responses of a token read for an AI and responses not related to
+        any AI (lists), if the AI is unknown drops all responses of the token.
+        """
+
+        with self._lock:
+            self._entries = {
+                key: (entry_aiid, response)
+                for key, (entry_aiid, response) in self._entries.items()
+                if key[0] != token or (aiid and entry_aiid and entry_aiid != aiid)
+            }
+
+    def __len__(self):
+        return len(self._entries)
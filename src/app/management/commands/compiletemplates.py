@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app import template_cache
+
+
+class Command(BaseCommand):
+    help = 'Checks every template in template directories parses'
+
+    def handle(self, *args, **options):
+        names, errors = template_cache.compile_all()
+
+        for name, error in errors.items():
+            self.stderr.write('{name}: {error}'.format(name=name, error=error))
+
+        if errors:
+            raise CommandError('{count} of {total} templates failed to parse'.format(
+                count=len(errors), total=len(names)
+            ))
+
+        self.stdout.write(self.style.SUCCESS(
+            '{total} templates parsed'.format(total=len(names))
+        ))
@@ -0,0 +1,117 @@
+"""
+Metrics of API calls, exposed on `/metrics` in Prometheus text format.
+
+Calls are labelled by their unformatted path template, e.g. `/ai/{aiid}/chat`,
+so all the AIs share a single time series. Under gunicorn every worker writes
+its metrics to `prometheus_multiproc_dir` and `/metrics` aggregates all of
+them, see `app.gunicorn` for the server hooks.
+"""
+import contextlib
+import hmac
+import os
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess
+)
+from requests import RequestException, Timeout
+
+# Buckets cover fast reads as well as long polling calls, in seconds
+BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+api_latency = Histogram(
+    'console_api_request_duration_seconds',
+    'Time until API responded, by path template',
+    ['method', 'path'],
+    buckets=BUCKETS
+)
+api_responses = Counter(
+    'console_api_responses_total',
+    'API responses, by path template and status code',
+    ['method', 'path', 'status']
+)
+api_timeouts = Counter(
+    'console_api_timeouts_total',
+    'API calls which timed out, by path template',
+    ['method', 'path']
+)
+api_errors = Counter(
+    'console_api_errors_total',
+    'API calls which failed without a response, timeouts aside',
+    ['method', 'path']
+)
+api_in_flight = Gauge(
+    'console_api_requests_in_flight',
+    'API calls waiting for a response, by path template',
+    ['path'],
+    multiprocess_mode='livesum'
+)
+
+
+class Call(object):
+    """Outcome of a tracked API call"""
+
+    def __init__(self, method, path):
+        self.method = method.upper()
+        self.path = path
+
+    def responded(self, response):
+        api_latency.labels(self.method, self.path).observe(response.elapsed.total_seconds())
+        api_responses.labels(self.method, self.path, str(response.status_code)).inc()
+
+
+@contextlib.contextmanager
+def track(method, path):
+    """Tracks an API call, the caller reports its response to the yielded `Call`"""
+
+    call = Call(method, path)
+    in_flight = api_in_flight.labels(path)
+    in_flight.inc()
+
+    try:
+        yield call
+    except Timeout:
+        api_timeouts.labels(call.method, path).inc()
+        raise
+    except RequestException:
+        api_errors.labels(call.method, path).inc()
+        raise
+    finally:
+        in_flight.dec()
+
+
+def get_registry():
+    """Metrics of all gunicorn workers if multi-process mode is on, otherwise of this one"""
+
+    if 'prometheus_multiproc_dir' not in os.environ:
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint, protected by the bearer token `METRICS_TOKEN`.
+    Without a token metrics are only served in debug mode, the console is public.
+    """
+
+    if not settings.METRICS_TOKEN:
+        if not settings.DEBUG:
+            return HttpResponseForbidden()
+    else:
+        expected = 'Bearer {token}'.format(token=settings.METRICS_TOKEN)
+
+        if not hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), expected):
+            return HttpResponseForbidden()
+
+    return HttpResponse(generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST)
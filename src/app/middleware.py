@@ -0,0 +1,168 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from app import budget, context, profiling, timing
+from app.breaker import CircuitOpenError
+from app.errors import handler503
+
+logger = logging.getLogger(__name__)
+
+
+class RequestContextMiddleware(object):
+    """
+    Activates a fresh request context for every request, its ID is sent back
+    in `X-Request-ID` header
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_context = context.RequestContext(
+            request_id=context.get_request_id(request),
+            session=getattr(request, 'session', None)
+        )
+        token = context.activate(request_context)
+        try:
+            response = self.get_response(request)
+        finally:
+            context.deactivate(token)
+
+        response['X-Request-ID'] = request_context.request_id
+        return response
+
+
+class ServerTimingMiddleware(object):
+    """
+    Logs time spent per resource in a request and sends it to staff in a
+    `Server-Timing` header, comes before session middleware to measure it
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = timing.Timings()
+        token = timing.activate(timings)
+        start = time.perf_counter()
+
+        try:
+            with connection.execute_wrapper(timing.timed_query):
+                response = self.get_response(request)
+        finally:
+            timing.deactivate(token)
+
+        total = time.perf_counter() - start
+        summary = timings.summary()
+
+        logger.info(
+            '%s %s %s in %.1fms %s',
+            request.method,
+            request.path,
+            response.status_code,
+            total * 1e3,
+            ' '.join('{}={}'.format(name, duration) for name, duration in summary.items()),
+            extra={
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration': round(total * 1e3, 1),
+                'timings': summary,
+                'api_calls': timings.counts.get('api', 0),
+            }
+        )
+
+        user = getattr(request, 'user', None)
+
+        if settings.DEBUG or (user is not None and user.is_staff):
+            response['Server-Timing'] = timings.header(total)
+
+        return response
+
+
+class ProfilerMiddleware(object):
+    """Profiles requests switched on in constance, see `app.profiling`"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiling.should_profile(request):
+            return self.get_response(request)
+
+        sampler = profiling.Sampler(threading.get_ident())
+        sampler.start()
+        start = time.perf_counter()
+
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+
+        try:
+            profiling.save(request, response, sampler, time.perf_counter() - start)
+        except Exception:
+            # A profile is never worth failing the request
+            logger.exception('Profile of %s couldn\'t be saved', request.path)
+
+        return response
+
+
+class CircuitBreakerMiddleware(object):
+    """Renders API calls failing fast as Service Unavailable responses"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, CircuitOpenError):
+            logger.warning('Failing fast %s: %s', request.path, exception)
+            return handler503(request, exception)
+
+
+class APIBudgetMiddleware(object):
+    """
+    Checks API calls of a request against budget of its view, must come after
+    `RequestContextMiddleware`. Calls made are available to specs as
+    `response.api_calls`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        request_context = context.get_current()
+
+        if request_context is None:
+            return response
+
+        calls = request_context.api_calls
+        response.api_calls = calls
+        limit = getattr(request, 'api_budget', None)
+
+        if limit is not None and len(calls) > limit:
+            view = request.resolver_match.view_name
+            exceeded = budget.APIBudgetExceeded(view, limit, calls)
+
+            if settings.API_BUDGET_STRICT:
+                raise exceeded
+
+            logger.warning('API budget exceeded: %s', exceeded, extra={
+                'view': view,
+                'path': request.path,
+                'budget': limit,
+                'api_calls': calls,
+            })
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.api_budget = budget.get_budget(view_func, request.method)
@@ -0,0 +1,31 @@
+# Generated by Django 2.1.3 on 2026-10-18 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(db_index=True)),
+                ('method', models.CharField(max_length=8)),
+                ('path', models.CharField(max_length=255)),
+                ('url_name', models.CharField(blank=True, max_length=128)),
+                ('status', models.PositiveSmallIntegerField()),
+                ('duration', models.FloatField(help_text='Milliseconds')),
+                ('samples', models.PositiveIntegerField()),
+                ('filename', models.CharField(max_length=255)),
+            ],
+            options={
+                'ordering': ['-created'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.1.3 on 2026-10-18 21:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='requestprofile',
+            name='host',
+            field=models.CharField(blank=True, help_text='Host storing the file', max_length=255),
+        ),
+    ]
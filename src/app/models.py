@@ -0,0 +1,38 @@
+import os
+import socket
+
+from django.conf import settings
+from django.db import models
+
+
+class RequestProfile(models.Model):
+    """
+    Profile of a request sampled by `app.profiling`, stacks are kept in
+    collapsed format in `PROFILER_DIR` of the host which served the request.
+    """
+    created = models.DateTimeField(db_index=True)
+    method = models.CharField(max_length=8)
+    path = models.CharField(max_length=255)
+    url_name = models.CharField(max_length=128, blank=True)
+    status = models.PositiveSmallIntegerField()
+    duration = models.FloatField(help_text='Milliseconds')
+    samples = models.PositiveIntegerField()
+    filename = models.CharField(max_length=255)
+    host = models.CharField(max_length=255, blank=True, help_text='Host storing the file')
+
+    class Meta:
+        ordering = ['-created']
+
+    @property
+    def is_local(self):
+        """Whether the file is stored on this host, the catalogue is shared by all of them"""
+        return self.host == socket.gethostname()
+
+    @property
+    def path_on_disk(self):
+        return os.path.join(settings.PROFILER_DIR, self.filename)
+
+    def __str__(self):
+        return '{method} {path} {created:%Y-%m-%d %H:%M:%S}'.format(
+            method=self.method, path=self.path, created=self.created
+        )
@@ -0,0 +1,147 @@
+"""
+Process-wide pooled HTTP client used by `app.services.fetch_api`.
+
+Connections to the API are kept alive between calls and shared by every
+thread of a worker, so a studio page pays for a single TCP/TLS handshake
+instead of one per API call. Pool size, keep-alive and retry policy are
+configured in `settings`, see `API_POOL_*` and `API_MAX_RETRIES`.
+"""
+import logging
+import threading
+import time
+
+from http.cookiejar import DefaultCookiePolicy
+
+from django.conf import settings
+from requests import Session
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.connectionpool import (
+    HTTPConnectionPool,
+    HTTPSConnectionPool
+)
+from requests.packages.urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStats(object):
+    """Thread safe counters of pool hits, misses and evictions"""
+
+    FIELDS = ('hits', 'misses', 'evictions')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def increment(self, field):
+        with self._lock:
+            self._counters[field] += 1
+
+    def reset(self):
+        with self._lock:
+            self._counters = dict.fromkeys(self.FIELDS, 0)
+
+    def as_dict(self):
+        with self._lock:
+            return dict(self._counters)
+
+
+stats = PoolStats()
+
+
+class KeepAliveMixin(object):
+    """
+    Count connection reuse and close connections which were idle for longer
+    than `API_POOL_KEEPALIVE` seconds, the API load balancer would drop them
+    anyway and reusing a half closed socket fails the request.
+    """
+
+    def _get_conn(self, timeout=None):
+        conn = super(KeepAliveMixin, self)._get_conn(timeout=timeout)
+        released_at = getattr(conn, 'released_at', None)
+
+        if conn.sock is None:
+            # Freshly created or dropped connection, a handshake is needed
+            stats.increment('misses')
+        elif released_at and time.monotonic() - released_at > settings.API_POOL_KEEPALIVE:
+            conn.close()
+            stats.increment('evictions')
+            stats.increment('misses')
+        else:
+            stats.increment('hits')
+
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is not None:
+            conn.released_at = time.monotonic()
+
+        if conn is not None and self.pool is not None and self.pool.full():
+            # Pool has already `maxsize` idle connections, this one is dropped
+            stats.increment('evictions')
+
+        super(KeepAliveMixin, self)._put_conn(conn)
+
+
+class KeepAliveHTTPConnectionPool(KeepAliveMixin, HTTPConnectionPool):
+    pass
+
+
+class KeepAliveHTTPSConnectionPool(KeepAliveMixin, HTTPSConnectionPool):
+    pass
+
+
+class PooledAdapter(HTTPAdapter):
+    """Transport adapter using bounded, counted, keep-alive connection pools"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(PooledAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': KeepAliveHTTPConnectionPool,
+            'https': KeepAliveHTTPSConnectionPool,
+        }
+
+
+def build_session():
+    """Create a session with pooled adapters mounted for both schemes"""
+
+    session = Session()
+
+    # The session is shared between users, never store cookies set by the API
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+    adapter = PooledAdapter(
+        pool_connections=settings.API_POOL_CONNECTIONS,
+        pool_maxsize=settings.API_POOL_MAXSIZE,
+        max_retries=Retry(
+            total=settings.API_MAX_RETRIES,
+            read=0,
+            backoff_factor=settings.API_RETRY_BACKOFF
+        )
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    return session
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Returns the process-wide session, creates it on first use"""
+
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+
+    return _session
+
+
+def get_stats():
+    """Returns pool counters, useful for logs and health checks"""
+    return stats.as_dict()
@@ -0,0 +1,176 @@
+"""
+Sampling profiler of requests, switched on at runtime through constance.
+
+A share of requests (`PROFILER_SAMPLE_RATE`) and every request of the URL
+names in `PROFILER_URL_NAMES` are profiled by a thread sampling the stack of
+the request thread. Stacks are written in collapsed format, one `frame;frame
+count` line per stack, which flame graph tools and speedscope open, to
+`PROFILER_DIR`. Admins browse profiles of every host in Django admin, files
+stay on the host which wrote them. Only the last `PROFILER_MAX_FILES` profiles
+are kept in the catalogue and in the directory of each host.
+"""
+import collections
+import logging
+import os
+import random
+import socket
+import sys
+import threading
+import time
+
+from constance import config
+from django.conf import settings
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+from django.utils.text import slugify
+
+from app.models import RequestProfile
+
+logger = logging.getLogger(__name__)
+
+# Switches are read from constance at most once per this many seconds
+SWITCHES_TTL = 10
+
+_switches = {'expires': 0, 'rate': 0, 'url_names': frozenset()}
+
+
+def get_switches():
+    """Returns sample rate and URL names profiled, as set in constance"""
+
+    now = time.monotonic()
+
+    if now >= _switches['expires']:
+        _switches.update({
+            'expires': now + SWITCHES_TTL,
+            'rate': float(config.PROFILER_SAMPLE_RATE),
+            'url_names': frozenset(
+                name.strip() for name in config.PROFILER_URL_NAMES.split(',') if name.strip()
+            ),
+        })
+
+    return _switches['rate'], _switches['url_names']
+
+
+def should_profile(request):
+    rate, url_names = get_switches()
+
+    if url_names:
+        try:
+            if resolve(request.path_info).view_name in url_names:
+                return True
+        except Resolver404:
+            pass
+
+    return rate > 0 and random.random() * 100 < rate
+
+
+def collapse(frame):
+    """Collapsed stack of a frame, outermost frame first"""
+
+    frames = []
+
+    while frame is not None:
+        frames.append('{module}.{function}:{line}'.format(
+            module=frame.f_globals.get('__name__', '?'),
+            function=frame.f_code.co_name,
+            line=frame.f_lineno
+        ))
+        frame = frame.f_back
+
+    return ';'.join(reversed(frames))
+
+
+class Sampler(threading.Thread):
+    """Samples stack of a thread every `interval` seconds until stopped"""
+
+    def __init__(self, thread_id, interval=None):
+        super(Sampler, self).__init__(name='profiler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval or settings.PROFILER_INTERVAL
+        self.stacks = collections.Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def delete(profiles):
+    """Deletes profiles, with their files if they are stored on this host"""
+
+    for profile in profiles:
+        if profile.is_local:
+            try:
+                os.remove(profile.path_on_disk)
+            except FileNotFoundError:
+                pass
+
+        profile.delete()
+
+
+def rotate():
+    """
+    Drops the oldest profiles over `PROFILER_MAX_FILES` from the catalogue,
+    and the oldest files over it from the directory of this host. Other hosts
+    rotate their own directory, files of profiles they wrote can't be removed
+    from here.
+    """
+
+    delete(RequestProfile.objects.order_by('-created')[settings.PROFILER_MAX_FILES:])
+
+    try:
+        # Names start with the time they were written at, newest sort first
+        filenames = sorted(
+            (name for name in os.listdir(settings.PROFILER_DIR) if name.endswith('.folded')),
+            reverse=True
+        )
+    except FileNotFoundError:
+        return
+
+    expired = filenames[settings.PROFILER_MAX_FILES:]
+
+    for filename in expired:
+        try:
+            os.remove(os.path.join(settings.PROFILER_DIR, filename))
+        except FileNotFoundError:
+            pass
+
+    RequestProfile.objects.filter(host=socket.gethostname(), filename__in=expired).delete()
+
+
+def save(request, response, sampler, duration):
+    """Writes profile of a request and records it for admin"""
+
+    created = timezone.now()
+    match = getattr(request, 'resolver_match', None)
+    url_name = match.view_name if match else ''
+    filename = '{created:%Y%m%d-%H%M%S-%f}-{name}.folded'.format(
+        created=created, name=slugify(url_name or request.path_info) or 'request'
+    )
+
+    os.makedirs(settings.PROFILER_DIR, exist_ok=True)
+
+    with open(os.path.join(settings.PROFILER_DIR, filename), 'w') as output:
+        for stack, count in sampler.stacks.most_common():
+            output.write('{stack} {count}\n'.format(stack=stack, count=count))
+
+    RequestProfile.objects.create(
+        created=created,
+        method=request.method,
+        path=request.path[:255],
+        url_name=url_name,
+        status=response.status_code,
+        duration=round(duration * 1e3, 1),
+        samples=sum(sampler.stacks.values()),
+        filename=filename,
+        host=socket.gethostname()
+    )
+
+    rotate()
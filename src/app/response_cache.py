@@ -0,0 +1,152 @@
+"""
+Cache of API responses shared by all workers, kept in the `default` cache.
+
+Entries are fresh for `ttl` seconds and then served stale for `stale_ttl`
+seconds more while a single background refresh fetches a new value. On a
+miss only one caller across all workers fetches the value, the others wait
+for it for a moment instead of hitting the API all at once.
+
+Entries may carry a version kept under `version_key`, the same versions as
+`app.fragments` uses. Bumping it after a write makes entries stored before it
+misses, and a refresh which started before it isn't stored.
+"""
+import hashlib
+import logging
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+
+from app import fragments
+
+logger = logging.getLogger(__name__)
+
+# Lock expires on its own if a holder dies before releasing it
+LOCK_TIMEOUT = 10
+
+# How long to wait for a value fetched by another caller, in seconds
+LOCK_WAIT = 2
+LOCK_POLL_INTERVAL = 0.05
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Returns executor used for background refreshes, creates it on first use"""
+
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=2,
+                    thread_name_prefix='cache-refresh'
+                )
+
+    return _executor
+
+
+def make_key(name, token, *args):
+    """
+    Build a cache key, responses for a token are cached separately from
+    anonymous ones. Neither token nor arguments are stored in plain text.
+    """
+
+    variant = hashlib.sha256(str(token).encode()).hexdigest()[:16] if token else 'anonymous'
+    digest = hashlib.sha256(repr(args).encode()).hexdigest()[:16]
+
+    return 'api:{name}:{variant}:{digest}'.format(name=name, variant=variant, digest=digest)
+
+
+def is_successful(response):
+    """Only successful API responses are worth caching"""
+    return response.get('status', {}).get('code') == 200
+
+
+def is_current(entry, version):
+    return entry is not None and entry.get('version') == version
+
+
+def store(key, value, ttl, stale_ttl, cacheable=is_successful, version=None):
+    if cacheable(value):
+        cache.set(
+            key,
+            {'expires': time.time() + ttl, 'value': value, 'version': version},
+            timeout=ttl + stale_ttl
+        )
+    return value
+
+
+def refresh(key, fetch, ttl, stale_ttl, cacheable=is_successful, version_key=None,
+            version=None):
+    """Fetch a new value, release lock acquired by the caller"""
+
+    try:
+        value = fetch()
+
+        # A write bumped the version meanwhile, the value may be older than it
+        if version_key is not None and cache.get(version_key) != version:
+            return value
+
+        return store(key, value, ttl, stale_ttl, cacheable, version)
+    finally:
+        cache.delete(key + ':lock')
+
+
+def refresh_in_background(key, fetch, ttl, stale_ttl, cacheable=is_successful,
+                          version_key=None, version=None):
+    """Stale value is still served if a refresh fails"""
+
+    try:
+        refresh(key, fetch, ttl, stale_ttl, cacheable, version_key, version)
+    except Exception as error:
+        logger.warning('Failed to refresh %s: %s', key, error)
+
+
+def get_or_fetch(key, fetch, ttl, stale_ttl=0, cacheable=is_successful, version_key=None):
+    """
+    Returns a cached value of `key` or the value returned by `fetch` callable,
+    caching is disabled if `ttl` is 0. Entries of another version than the
+    one under `version_key` are misses, the entry and version are read in a
+    single round trip.
+    """
+
+    if not ttl:
+        return fetch()
+
+    version = None
+
+    if version_key is None:
+        entry = cache.get(key)
+    else:
+        found = cache.get_many([key, version_key])
+        entry = found.get(key)
+        version = found.get(version_key) or fragments.create_version(version_key)
+
+    if is_current(entry, version):
+        if entry['expires'] < time.time() and cache.add(key + ':lock', 1, LOCK_TIMEOUT):
+            get_executor().submit(
+                refresh_in_background, key, fetch, ttl, stale_ttl, cacheable, version_key,
+                version
+            )
+
+        return entry['value']
+
+    if cache.add(key + ':lock', 1, LOCK_TIMEOUT):
+        return refresh(key, fetch, ttl, stale_ttl, cacheable, version_key, version)
+
+    # Somebody else is fetching the value, give them a moment
+    deadline = time.time() + LOCK_WAIT
+
+    while time.time() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+
+        if is_current(entry, version):
+            return entry['value']
+
+    return fetch()
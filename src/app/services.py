@@ -5,10 +5,13 @@ from django.conf import settings
 from django.core.cache import cache
 from django.http import Http404
 from django.utils.translation import ugettext_lazy as _
-from json import JSONDecodeError
-from requests import Request, Session, packages
+from requests import Request, RequestException, packages
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 
+from app import budget, context, metrics, timing
+from app.breaker import CircuitBreaker
+from app.pool import get_session
+
 logger = logging.getLogger(__name__)
 packages.urllib3.disable_warnings(InsecureRequestWarning)
 
@@ -22,6 +25,10 @@ LEVELS = {
 }
 
 
+# Size of chunks relayed from streamed responses, in bytes
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
 class ResponseFormatError(Exception):
     pass
 
@@ -35,45 +42,139 @@ def set_headers(token):
     return headers
 
 
+def get_identity_map():
+    """Returns identity map of the current request, `None` outside of a request"""
+
+    request_context = context.get_current()
+    return request_context.identity_map if request_context else None
+
+
 def fetch_api(
     path, token, method='GET', data={}, json={}, files={}, headers={}, params={},
-    timeout=0, verify=VERIFY, **kwargs
+    timeout=0, verify=VERIFY, memoize=True, stream=False, **kwargs
 ):
     """
     Fetches data from the API using token (if provided),logs request and
-    response data, if in debug mode also logs CURL command
+    response data, if in debug mode also logs CURL command.
+
+    Within a request responses of GET calls are memoized, unless `memoize` is
+    off, and any other call drops memoized responses of the same AI.
+
+    Calls are guarded by a circuit breaker of their endpoint family, chat
+    calls by one of their AI, while it's open `CircuitOpenError` is raised
+    without calling the API.
+
+    With `stream` on a raw response is returned before its body is read, the
+    connection is held until the body is consumed with `iter_stream`.
     """
 
     url = settings.API_URL + path.format(**kwargs)
     headers = {**headers, **set_headers(token)}
 
-    timeout = timeout or config.API_DEFAULT_TIMEOUT
+    identity_map = get_identity_map()
+    safe = method.upper() == 'GET'
+    raw = kwargs.get('raw') or stream
+
+    if identity_map is not None and safe and memoize and not raw:
+        key = identity_map.key(token, url, params)
+        memoized = identity_map.get(key)
+
+        if memoized is not None:
+            return memoized
+    else:
+        key = None
 
-    session = Session()
     request = Request(
         method, url, data=data, json=json, files=files, headers=headers, params=params
     )
-    response = session.send(request.prepare(), timeout=timeout, verify=verify)
+    response = send(path, request.prepare(), timeout, verify, stream, kwargs.get('aiid'))
+
+    if identity_map is not None and not safe:
+        identity_map.invalidate(token, kwargs.get('aiid'))
+
+    decoded = log_response(response, token, method, url, raw)
+
+    check_access(response)
+
+    if raw:
+        return response
+
+    json_response = validate_response(response, decoded)
+
+    if key:
+        identity_map.set(key, kwargs.get('aiid'), json_response)
+
+    return json_response
+
+
+def send(path, request, timeout, verify, stream, aiid=None):
+    """
+    Sends a request through the shared session, guarded by a circuit breaker
+    and tracked in metrics
+    """
+
+    budget.record(request.method, path)
+
+    breaker = CircuitBreaker(path, aiid)
+    timeout = breaker.before(timeout or config.API_DEFAULT_TIMEOUT)
+
+    with metrics.track(request.method, path) as call:
+        try:
+            with timing.measure('api', '{method} {path}'.format(
+                method=request.method, path=path
+            )):
+                response = get_session().send(
+                    request, timeout=timeout, verify=verify, stream=stream
+                )
+        except RequestException:
+            breaker.failure()
+            raise
+
+        call.responded(response)
+
+    breaker.record(response)
+    return response
+
+
+def log_response(response, token, method, url, raw):
+    """
+    Logs API response, if in debug mode also logs CURL command. Log records
+    are only built if they are going to be emitted, returns decoded response
+    if it had to be decoded for logging.
+    """
 
     level = LEVELS.get(int(response.status_code / 100), logging.ERROR)
 
+    if settings.DEBUG and logger.isEnabledFor(level):
+        # Print curl for debug purpose
+        to_curl(response.request, level)
+
+    if not logger.isEnabledFor(logging.DEBUG):
+        return None
+
+    decoded = None
+    request_context = context.get_current()
+
+    if request_context is not None:
+        dev_id, request_id = request_context.dev_id, request_context.request_id
+    else:
+        # Outside of a request, fall back to the token:dev_id pair stored at login
+        dev_id, request_id = cache.get(token, None), None
+
     extra = {
-        'request_dev_id': cache.get(token, None),
+        'request_dev_id': dev_id,
+        'request_id': request_id,
         'request_method': method,
         'request_url': url,
         'response_status_code': response.status_code,
         'response_time_in_seconds': response.elapsed.total_seconds()
     }
 
-    if settings.DEBUG:
-        # Print curl for debug purpose
-        to_curl(response.request, level)
-
     if settings.API_RESPONSE_BODY_LOGS:
-        if kwargs.get('raw'):
+        if raw:
             extra['response_raw'] = response
         else:
-            extra['response_json'] = response.json()
+            decoded = extra['response_json'] = decode(response)
 
     message = ('API responded with %(response_status_code)s in %(response_time_in_seconds)s for '
                '%(request_method)s request %(request_url)s')
@@ -87,22 +188,64 @@ def fetch_api(
         extra=extra
     )
 
+    return decoded
+
+
+def decode(response):
+    """Returns decoded JSON response, `None` if it isn't a JSON"""
+
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+def check_access(response):
+    """Raises `Http404` if API refused access to a resource"""
+
     if response.status_code in [401, 403, 404]:
-        # We don't reveal if Resource exists
+        # We don't reveal if Resource exists, nor keep the connection busy
+        response.close()
         raise Http404(_('Resource doesn’t exist'))
 
-    if kwargs.get('raw'):
-        return response
-    else:
-        try:
-            json_response = response.json()
-            status = json_response.get('status')
-            if not status or not status.get('code') or not status.get('info'):
-                raise ResponseFormatError('API response is missing missing mandatory properties')
-            else:
-                return json_response
-        except (AttributeError, JSONDecodeError) as error:
-            raise ResponseFormatError('API response should be a JSON response')
+
+def iter_stream(response, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yields body of a streamed response chunk by chunk as it was sent, content
+    is not decoded so `Content-Length` and `Content-Encoding` still apply.
+    """
+
+    completed = False
+
+    try:
+        for chunk in response.raw.stream(chunk_size, decode_content=False):
+            yield chunk
+        completed = True
+    finally:
+        if completed:
+            # Body was read to the end, connection can be reused
+            response.raw.release_conn()
+        else:
+            response.close()
+
+
+def validate_response(response, decoded=None):
+    """
+    Returns decoded JSON response if it has all mandatory properties, response
+    is decoded unless it was already
+    """
+
+    json_response = decode(response) if decoded is None else decoded
+
+    try:
+        status = json_response.get('status')
+    except AttributeError:
+        raise ResponseFormatError('API response should be a JSON response')
+
+    if not status or not status.get('code') or not status.get('info'):
+        raise ResponseFormatError('API response is missing missing mandatory properties')
+
+    return json_response
 
 
 def to_curl(request, level):
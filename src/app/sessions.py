@@ -0,0 +1,26 @@
+"""
+Cache based session engine measuring time spent in the session store, see
+`app.timing`.
+"""
+from django.contrib.sessions.backends import cache
+
+from app.timing import measure
+
+
+class SessionStore(cache.SessionStore):
+
+    def load(self):
+        with measure('session'):
+            return super(SessionStore, self).load()
+
+    def create(self):
+        with measure('session'):
+            return super(SessionStore, self).create()
+
+    def save(self, must_create=False):
+        with measure('session'):
+            return super(SessionStore, self).save(must_create)
+
+    def delete(self, session_key=None):
+        with measure('session'):
+            return super(SessionStore, self).delete(session_key)
@@ -9,6 +9,7 @@ https://docs.djangoproject.com/en/1.11/ref/settings/
 import base64       # for ENV_VAR decoding
 import json         # for JSON parsing
 import os           # for ENV_VARs and path
+import tempfile     # for default profiles directory
 
 # General
 
@@ -68,6 +69,7 @@ INSTALLED_APPS = [
     'widget_tweaks',    # Tweak the form field rendering in templates
 
     # Apps specific for console:
+    'app',              # Request profiles
     'botstore',         # Bot store
     'studio',           # Bot studio
     'users',            # All user stuff
@@ -94,10 +96,17 @@ MIDDLEWARE = [
     # WhiteNoise will now serve your static files
     'whitenoise.middleware.WhiteNoiseMiddleware',
 
+    # Comes first so time spent saving session is measured
+    'app.middleware.ServerTimingMiddleware',
+    'app.middleware.ProfilerMiddleware',
+
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'app.middleware.RequestContextMiddleware',
+    'app.middleware.CircuitBreakerMiddleware',
+    'app.middleware.APIBudgetMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -203,7 +212,8 @@ NOCAPTCHA = True
 # https://docs.djangoproject.com/en/1.11/ref/settings/#sessions
 # http://niwinz.github.io/django-redis/latest/#_configure_as_session_backend
 
-SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
+# Cache backend measuring time spent loading and saving sessions, see app.timing
+SESSION_ENGINE = 'app.sessions'
 
 # We’re using cache-based session storage, this selects the cache to use.
 SESSION_CACHE_ALIAS = 'sessions'
@@ -229,7 +239,8 @@ ROOT_URLCONF = 'app.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django templates with rendering time measured, see app.timing
+        'BACKEND': 'app.timing.DjangoTemplates',
         'DIRS': [
             os.path.join(BASE_DIR, 'botstore', 'templates'),
             os.path.join(BASE_DIR, 'studio', 'templates'),
@@ -368,6 +379,7 @@ CACHES = {
 
 # Key strings:
 CRM_DATA_KEY = 'user.crm_data:{user_id}'
+USER_GROUPS_KEY = 'user.groups:{user_id}'
 
 # Don't cache templates for development
 TEMPLATES_CACHE_AGE = 0
@@ -456,6 +468,65 @@ API_LOGS_TIMEOUT = 20
 # allow a much longer timeout for actions like retraining and deletion
 API_LONG_POLLING = 30
 
+# Connections to the API are pooled and kept alive, shared by all threads of
+# a worker. `API_POOL_CONNECTIONS` is a number of hosts to keep pools for,
+# `API_POOL_MAXSIZE` a number of connections kept per host and
+# `API_POOL_KEEPALIVE` a number of seconds an idle connection can be reused.
+API_POOL_CONNECTIONS = int(os.environ.get('API_POOL_CONNECTIONS', 4))
+API_POOL_MAXSIZE = int(os.environ.get('API_POOL_MAXSIZE', 10))
+API_POOL_KEEPALIVE = int(os.environ.get('API_POOL_KEEPALIVE', 30))
+
+# Calls made by ASGI views share a pool of up to `API_ASYNC_CONNECTIONS`
+# connections per event loop
+API_ASYNC_CONNECTIONS = int(os.environ.get('API_ASYNC_CONNECTIONS', 100))
+
+# Failed connection attempts are retried with an exponential backoff, requests
+# which reached the API are never retried
+API_MAX_RETRIES = int(os.environ.get('API_MAX_RETRIES', 2))
+API_RETRY_BACKOFF = float(os.environ.get('API_RETRY_BACKOFF', 0.1))
+
+# Timeouts of API calls failing according to the circuit breaker are cut to
+# `API_ADAPTIVE_TIMEOUT_FACTOR` times the usual response time, but never below
+# `API_ADAPTIVE_TIMEOUT_MIN` seconds
+API_ADAPTIVE_TIMEOUT_FACTOR = float(os.environ.get('API_ADAPTIVE_TIMEOUT_FACTOR', 4))
+API_ADAPTIVE_TIMEOUT_MIN = float(os.environ.get('API_ADAPTIVE_TIMEOUT_MIN', 2))
+
+# Independent API calls needed by a page are sent concurrently from a pool of
+# threads shared by a worker, 1 or less makes all the calls sequential
+API_FANOUT_WORKERS = int(os.environ.get('API_FANOUT_WORKERS', 8))
+
+# Training status is pushed to studio pages of an AI being trained as
+# Server-Sent Events, other pages poll it. Status is polled every
+# `TRAINING_STREAM_INTERVAL` seconds by a single thread per AI, idle streams
+# send a heartbeat every `TRAINING_STREAM_HEARTBEAT` seconds and are closed
+# once training ends or after `TRAINING_STREAM_DURATION` seconds.
+TRAINING_STREAM_INTERVAL = float(os.environ.get('TRAINING_STREAM_INTERVAL', 2))
+TRAINING_STREAM_HEARTBEAT = float(os.environ.get('TRAINING_STREAM_HEARTBEAT', 15))
+TRAINING_STREAM_DURATION = float(os.environ.get('TRAINING_STREAM_DURATION', 120))
+
+# Views declare how many API calls a request may make, requests going over
+# budget are logged, or fail if `API_BUDGET_STRICT` is on, see `app.budget`
+API_BUDGET_STRICT = False
+
+# Requests switched on in constance are profiled by sampling their stack every
+# `PROFILER_INTERVAL` seconds, the last `PROFILER_MAX_FILES` profiles are kept
+# in `PROFILER_DIR` of every host, admin only serves files of the host it runs
+# on unless the directory is a volume shared by all of them, see app.profiling
+PROFILER_DIR = os.environ.get('PROFILER_DIR', os.path.join(tempfile.gettempdir(), 'profiles'))
+PROFILER_MAX_FILES = int(os.environ.get('PROFILER_MAX_FILES', 200))
+PROFILER_INTERVAL = float(os.environ.get('PROFILER_INTERVAL', 0.005))
+
+# Messages storage measuring time spent storing messages, see app.timing
+MESSAGE_STORAGE = 'app.timing.MessageStorage'
+
+# Chat exchanges are kept in the sessions cache so the studio chat survives page
+# reloads, only the last `CHAT_TRANSCRIPT_LENGTH` exchanges of an AI are kept
+CHAT_TRANSCRIPT_LENGTH = int(os.environ.get('CHAT_TRANSCRIPT_LENGTH', 50))
+
+# Metrics are served on `/metrics` to scrapers sending the token in
+# `Authorization: Bearer <token>` header, without a token only in debug mode
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
 # Enables logging of API payloads coming from the API, disabled by default,
 # should be used extremely careful as it can potentially log sensitive data
 API_RESPONSE_BODY_LOGS = os.environ.get('API_RESPONSE_BODY_LOGS', False)
@@ -474,6 +545,9 @@ KB_MAX_FILE_SIZE = os.environ.get('KB_MAX_FILE_SIZE', 1024 * 1024 * 1.0)  # 1.0M
 KB_ALLOWED_EXT = ['txt']
 KB_ALLOWED_CONTENT_TYPES = ['text/plain']
 
+# Number of Knowledge Base files written concurrently, per process
+KB_UPLOAD_WORKERS = int(os.environ.get('KB_UPLOAD_WORKERS', 4))
+
 # --------------------------------------------------------------------------
 
 # ------------------------------------------------------------------------------
@@ -494,6 +568,15 @@ CONSTANCE_ADDITIONAL_FIELDS = {
         'widget': 'django.forms.Select',
         'choices': (('on', 'On'), ('off', 'Off'))
     }],
+    'ttl': ['django.forms.fields.IntegerField', {
+        'widget': 'django.forms.NumberInput',
+        'widget_kwargs': {
+            'attrs': {
+                'max': 24 * 60 * 60,
+                'min': 0,
+            }
+        }
+    }],
     'timeout': ['django.forms.fields.IntegerField', {
         'widget': 'django.forms.NumberInput',
         'widget_kwargs': {
@@ -534,13 +617,88 @@ CONSTANCE_CONFIG = {
         'Timeouts for long API actions, Training and bot deletion, in seconds, max 60s',
         'timeout'
     ),
+    'API_BREAKER_MIN_CALLS': (
+        20,
+        'Number of API calls of a family (chat per bot, insights, facebook, '
+        'training or other) within a window before its failures are considered',
+        int
+    ),
+    'API_BREAKER_FAILURE_RATIO': (
+        0.5,
+        'Ratio of failed API calls of a family within a window, from 0 to 1, '
+        'at which its calls fail fast',
+        float
+    ),
+    'API_BREAKER_WINDOW': (
+        30,
+        'API calls and their failures are counted within windows of this '
+        'length, in seconds',
+        'ttl'
+    ),
+    'API_BREAKER_COOLDOWN': (
+        30,
+        'For how long calls fail fast before the API is probed again, in seconds',
+        'ttl'
+    ),
+    'BOTSTORE_CACHE_TTL': (
+        5 * 60,
+        'For how long Bot Store categories and bots are cached, in seconds, 0 '
+        'disables caching',
+        'ttl'
+    ),
+    'BOTSTORE_CACHE_STALE_TTL': (
+        60 * 60,
+        'For how long expired Bot Store data is served while it\'s being '
+        'refreshed, in seconds',
+        'ttl'
+    ),
+    'PROFILER_SAMPLE_RATE': (
+        0.0,
+        'Percentage of requests profiled, profiles are listed in Request '
+        'profiles, 0 disables sampling',
+        float
+    ),
+    'PROFILER_URL_NAMES': (
+        '',
+        'Comma separated URL names of which every request is profiled, e.g. '
+        'studio:intents.edit',
+    ),
+    'AI_CACHE_TTL': (
+        5,
+        'For how long bot data and details are cached per developer, in '
+        'seconds, 0 disables caching',
+        'ttl'
+    ),
+    'AI_CACHE_STALE_TTL': (
+        60,
+        'For how long expired bot data is served while it\'s being refreshed, '
+        'in seconds',
+        'ttl'
+    ),
+    'FRAGMENT_CACHE_TTL': (
+        10 * 60,
+        'For how long rendered navigation, header and footer are cached, in '
+        'seconds, 0 disables caching',
+        'ttl'
+    ),
 }
 
 CONSTANCE_CONFIG_FIELDSETS = {
-    'API': ['API_DEFAULT_TIMEOUT', 'API_CHAT_TIMEOUT', 'API_LOGS_TIMEOUT', 'API_LONG_POLLING'],
+    'API': [
+        'API_DEFAULT_TIMEOUT', 'API_CHAT_TIMEOUT', 'API_LOGS_TIMEOUT', 'API_LONG_POLLING',
+        'API_BREAKER_MIN_CALLS', 'API_BREAKER_FAILURE_RATIO', 'API_BREAKER_WINDOW',
+        'API_BREAKER_COOLDOWN',
+    ],
     'Facebook integration': [
         'FACEBOOK_INTEGRATION', 'FACEBOOK_WARNING', 'API_FACEBOOK_TIMEOUT',
-    ]
+    ],
+    'Cache': [
+        'BOTSTORE_CACHE_TTL', 'BOTSTORE_CACHE_STALE_TTL', 'AI_CACHE_TTL', 'AI_CACHE_STALE_TTL',
+        'FRAGMENT_CACHE_TTL',
+    ],
+    'Profiler': [
+        'PROFILER_SAMPLE_RATE', 'PROFILER_URL_NAMES',
+    ],
 }
 
 EMAIL_BACKEND = 'app.mail.backends.smtp.EmailBackend'
@@ -686,6 +844,9 @@ elif ENVIRONMENT == 'test':
     DJANGO_LOG_LEVEL = 'DEBUG'
     TEMPLATES[0]['OPTIONS']['debug'] = False
 
+    # Views going over their API budget fail specs
+    API_BUDGET_STRICT = True
+
     # Statics
     #
     # Use built-in Django storage
@@ -918,4 +1079,14 @@ elif ENVIRONMENT == 'production':
     # Default cache for Templates set to 15 minutes
     TEMPLATES_CACHE_AGE = 60 * 15
 
+    # Parsed templates are kept in memory by every worker, they are parsed
+    # when a worker boots, see app.template_cache
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
     # --------------------------------------------------------------------------
@@ -0,0 +1,71 @@
+"""
+Templates parsed ahead of requests.
+
+With the cached template loader every worker parses a template the first
+time it's rendered, which makes the first requests after a deploy or a scale
+out slow. `warm_up` parses templates of all template directories when a
+worker boots, see `app.gunicorn.post_worker_init`, and the
+`compiletemplates` command checks all of them parse before serving.
+"""
+import logging
+import os
+import time
+
+from django.template import Engine, TemplateSyntaxError
+
+logger = logging.getLogger(__name__)
+
+
+def get_template_names(engine=None):
+    """Names of templates in directories of the engine, first one of a name wins"""
+
+    engine = engine or Engine.get_default()
+    names = []
+
+    for directory in engine.dirs:
+        for root, dirs, files in os.walk(directory):
+            dirs[:] = sorted(name for name in dirs if not name.startswith('.'))
+
+            for filename in sorted(files):
+                if filename.startswith('.'):
+                    continue
+
+                name = os.path.relpath(os.path.join(root, filename), directory)
+                name = name.replace(os.sep, '/')
+
+                if name not in names:
+                    names.append(name)
+
+    return names
+
+
+def compile_all(engine=None):
+    """Parses every template, returns names parsed and errors by name"""
+
+    engine = engine or Engine.get_default()
+    names = get_template_names(engine)
+    errors = {}
+
+    for name in names:
+        try:
+            engine.get_template(name)
+        except (TemplateSyntaxError, UnicodeDecodeError) as error:
+            errors[name] = error
+
+    return names, errors
+
+
+def warm_up():
+    """Fills cache of the template loader, errors are left to the request rendering them"""
+
+    start = time.perf_counter()
+    names, errors = compile_all()
+
+    for name, error in errors.items():
+        logger.error('Template %s failed to parse: %s', name, error)
+
+    logger.info(
+        'Parsed %d templates in %.1fms',
+        len(names) - len(errors),
+        (time.perf_counter() - start) * 1e3
+    )
@@ -0,0 +1,62 @@
+"""
+`app` template tags. To use in a template just put the following *load* tag
+inside a template:
+
+    `{% load app_tags %}`
+"""
+from django import template
+
+from app import fragments
+
+register = template.Library()
+
+
+class FragmentNode(template.Node):
+
+    def __init__(self, nodelist, name, aiid, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.aiid = aiid
+        self.vary_on = vary_on
+
+    def render(self, context):
+        return fragments.get_or_render(
+            self.name,
+            self.aiid.resolve(context) if self.aiid else None,
+            [variable.resolve(context) for variable in self.vary_on],
+            lambda: self.nodelist.render(context)
+        )
+
+
+@register.tag(name='fragment')
+def fragment(parser, token):
+    """
+    Caches a fragment of a template per language and the values it varies on,
+    fragments of a bot are invalidated together when `aiid` is given:
+
+        {% fragment 'navigation' aiid=ai.aiid request.user.pk active %}
+            ...
+        {% endfragment %}
+    """
+
+    bits = token.split_contents()
+
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            '{tag} tag requires a fragment name'.format(tag=bits[0])
+        )
+
+    name = bits[1].strip('\'"')
+    aiid = None
+    vary_on = []
+
+    for bit in bits[2:]:
+        if bit.startswith('aiid='):
+            aiid = parser.compile_filter(bit[len('aiid='):])
+        else:
+            vary_on.append(parser.compile_filter(bit))
+
+    nodelist = parser.parse(('endfragment',))
+    parser.delete_first_token()
+
+    return FragmentNode(nodelist, name, aiid, vary_on)
@@ -0,0 +1,142 @@
+import asyncio
+import json
+
+from unittest.mock import patch
+
+import factory
+
+from django.contrib.auth.signals import user_logged_in
+from django.http import JsonResponse
+from django.middleware.csrf import _get_new_csrf_token
+from django.test import Client, TransactionTestCase
+
+from app.asgi import application, wsgi_application
+from app.asgi_handler import AsyncViewsHandler
+from app.sessions import SessionStore
+from users.models import Profile
+from users.tests.factories import UserFactory
+
+AIID = '0b2f2d3a-8c2e-4e5b-9a4e-2a8d3e3b1c11'
+
+
+async def chat_response(token, aiid, payload):
+    return {'status': {'code': 200, 'info': 'OK'}, 'token': token, 'payload': payload}
+
+
+class TestAsyncViews(TransactionTestCase):
+
+    @factory.django.mute_signals(user_logged_in)
+    def setUp(self):
+        self.user = UserFactory()
+        Profile.objects.create(user=self.user)
+
+        client = Client()
+        client.force_login(self.user)
+        session = client.session
+        session['token'] = 'token'
+        session.save()
+
+        self.session_key = session.session_key
+        self.csrf_token = _get_new_csrf_token()
+        self.cookie = 'sessionid={session}; csrftoken={csrf}'.format(
+            session=session.session_key,
+            csrf=self.csrf_token
+        )
+
+    def request(self, path, body, headers=(), application=application):
+        """Sends a request to the ASGI application, returns status, headers and body"""
+
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            'type': 'http',
+            'http_version': '1.1',
+            'method': 'POST',
+            'scheme': 'http',
+            'path': path,
+            'query_string': b'',
+            'headers': [(b'host', b'testserver')] + list(headers),
+        }
+        asyncio.get_event_loop().run_until_complete(application(scope, receive, send))
+
+        return (
+            sent[0]['status'],
+            [(name.decode(), value.decode()) for name, value in sent[0]['headers']],
+            b''.join(message.get('body', b'') for message in sent[1:])
+        )
+
+    def authenticated(self):
+        return [
+            (b'cookie', self.cookie.encode()),
+            (b'x-csrftoken', self.csrf_token.encode()),
+        ]
+
+    def test_anonymous(self):
+        """Anonymous users get the same response as from json_login_required"""
+
+        self.cookie = 'csrftoken={csrf}'.format(csrf=self.csrf_token)
+        status, headers, body = self.request(
+            '/proxy/ai/{aiid}/chat'.format(aiid=AIID),
+            b'{}',
+            self.authenticated()
+        )
+
+        self.assertEqual(status, 401)
+
+    @patch('studio.async_views.post_chat', side_effect=chat_response)
+    def test_chat(self, mock_post_chat):
+        """Chat is proxied with a token of the user"""
+
+        status, headers, body = self.request(
+            '/proxy/ai/{aiid}/chat'.format(aiid=AIID),
+            json.dumps({'q': 'Hi'}).encode(),
+            self.authenticated()
+        )
+
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body.decode())['token'], 'token')
+        self.assertEqual(json.loads(body.decode())['payload'], {'q': 'Hi'})
+
+        # Middleware run around async views too
+        self.assertIn('X-Request-ID', dict(headers))
+        self.assertEqual(dict(headers)['X-Frame-Options'], 'SAMEORIGIN')
+
+    def test_session(self):
+        """Sessions changed by async views are saved"""
+
+        async def remember(request, aiid):
+            request.session['remembered'] = str(aiid)
+            return JsonResponse({})
+
+        status, headers, body = self.request(
+            '/proxy/ai/{aiid}/chat'.format(aiid=AIID),
+            b'{}',
+            self.authenticated(),
+            AsyncViewsHandler({'studio:proxy.ai.chat': remember}, wsgi_application)
+        )
+
+        self.assertEqual(status, 200)
+        self.assertTrue(any(
+            name == 'Set-Cookie' and value.startswith('sessionid=') for name, value in headers
+        ))
+        self.assertEqual(SessionStore(self.session_key)['remembered'], AIID)
+
+    @patch('studio.async_views.post_chat', side_effect=chat_response)
+    def test_csrf(self, mock_post_chat):
+        """Requests without a CSRF token are rejected"""
+
+        status, headers, body = self.request(
+            '/proxy/ai/{aiid}/chat'.format(aiid=AIID),
+            b'{}',
+            [(b'cookie', self.cookie.encode())]
+        )
+
+        self.assertEqual(status, 403)
+        self.assertFalse(mock_post_chat.called)
@@ -0,0 +1,172 @@
+import time
+
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import RequestFactory, override_settings
+from requests import ConnectionError
+from test_plus.test import TestCase
+
+from app.breaker import CircuitBreaker, CircuitOpenError, get_family, latency
+from app.middleware import CircuitBreakerMiddleware
+from app.services import fetch_api
+
+
+@patch('app.breaker.config', API_BREAKER_MIN_CALLS=2, API_BREAKER_FAILURE_RATIO=0.5,
+       API_BREAKER_WINDOW=30, API_BREAKER_COOLDOWN=30)
+class TestCircuitBreaker(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.path = '/ai/{aiid}/chat'
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_families(self, mock_config):
+        """Calls are grouped into families by their path"""
+
+        self.assertEqual(get_family('/ai/{aiid}/chat'), 'chat')
+        self.assertEqual(get_family('/insights/{aiid}/chatlogs?format=csv'), 'insights')
+        self.assertEqual(get_family('/ai/{aiid}/facebook/custom'), 'facebook')
+        self.assertEqual(get_family('/ai/{aiid}/training/start'), 'training')
+        self.assertEqual(get_family('/ai'), 'api')
+
+    def test_opens(self, mock_config):
+        """Breaker opens once a family fails too often"""
+
+        CircuitBreaker(self.path).failure()
+        CircuitBreaker(self.path).before(10)
+        CircuitBreaker(self.path).failure()
+
+        with self.assertRaises(CircuitOpenError):
+            CircuitBreaker(self.path).before(10)
+
+        # Other families aren't affected
+        CircuitBreaker('/ai').before(10)
+
+    def test_min_calls(self, mock_config):
+        """Failures of a few calls don't open breaker"""
+
+        mock_config.API_BREAKER_MIN_CALLS = 4
+
+        for attempt in range(3):
+            CircuitBreaker(self.path).failure()
+
+        CircuitBreaker(self.path).before(10)
+        CircuitBreaker(self.path).failure()
+
+        with self.assertRaises(CircuitOpenError):
+            CircuitBreaker(self.path).before(10)
+
+    def test_failure_ratio(self, mock_config):
+        """Breaker opens once enough of the calls fail"""
+
+        for attempt in range(3):
+            CircuitBreaker(self.path).success(0.1)
+
+        CircuitBreaker(self.path).failure()
+        CircuitBreaker(self.path).failure()
+        CircuitBreaker(self.path).before(10)
+        CircuitBreaker(self.path).failure()
+
+        with self.assertRaises(CircuitOpenError):
+            CircuitBreaker(self.path).before(10)
+
+    def test_per_ai(self, mock_config):
+        """Chat calls of a failing AI don't stop chats with other AIs"""
+
+        CircuitBreaker(self.path, 'broken').failure()
+        CircuitBreaker(self.path, 'broken').failure()
+
+        with self.assertRaises(CircuitOpenError):
+            CircuitBreaker(self.path, 'broken').before(10)
+
+        CircuitBreaker(self.path, 'other').before(10)
+        CircuitBreaker('/ai/{aiid}', 'broken').before(10)
+
+    def test_half_open(self, mock_config):
+        """Single probe is let through after cooldown, its success closes breaker"""
+
+        cache.set('breaker:chat:open', time.time() - 1)
+
+        probe = CircuitBreaker(self.path)
+        probe.before(10)
+
+        with self.assertRaises(CircuitOpenError):
+            CircuitBreaker(self.path).before(10)
+
+        probe.success(0.1)
+        CircuitBreaker(self.path).before(10)
+
+    def test_failed_probe(self, mock_config):
+        """Failed probe opens breaker again"""
+
+        cache.set('breaker:chat:open', time.time() - 1)
+
+        probe = CircuitBreaker(self.path)
+        probe.before(10)
+        probe.failure()
+
+        with self.assertRaises(CircuitOpenError):
+            CircuitBreaker(self.path).before(10)
+
+    @override_settings(API_ADAPTIVE_TIMEOUT_FACTOR=4, API_ADAPTIVE_TIMEOUT_MIN=2)
+    def test_adaptive_timeout(self, mock_config):
+        """Failing family gets a timeout based on usual latency"""
+
+        latency.add(self.path, 1)
+
+        self.assertEqual(CircuitBreaker(self.path).before(30), 30)
+
+        CircuitBreaker(self.path).failure()
+
+        self.assertEqual(CircuitBreaker(self.path).before(30), 4)
+        self.assertEqual(CircuitBreaker(self.path).before(3), 3)
+
+    @patch('app.services.get_session')
+    def test_fetch_api(self, mock_session, mock_config):
+        """Connection errors trip the breaker, then calls fail fast"""
+
+        mock_session.return_value.send.side_effect = ConnectionError()
+
+        for attempt in range(2):
+            with self.assertRaises(ConnectionError):
+                fetch_api(self.path, token='token', aiid='aiid')
+
+        with self.assertRaises(CircuitOpenError):
+            fetch_api(self.path, token='token', aiid='aiid')
+
+        self.assertEqual(mock_session.return_value.send.call_count, 2)
+
+
+class TestCircuitBreakerMiddleware(TestCase):
+
+    def setUp(self):
+        self.middleware = CircuitBreakerMiddleware(MagicMock())
+        self.exception = CircuitOpenError('chat', 9.5)
+
+    def test_json(self):
+        """Ajax calls get a JSON response"""
+
+        request = RequestFactory().get('/proxy/ai/aiid/chat')
+        response = self.middleware.process_exception(request, self.exception)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '10')
+
+    def test_html(self):
+        """Pages get an error page"""
+
+        request = RequestFactory().get('/bots', HTTP_ACCEPT='text/html')
+        response = self.middleware.process_exception(request, self.exception)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertContains(response, 'trouble reaching', status_code=503)
+
+    def test_other_errors(self):
+        """Other errors are left to Django"""
+
+        request = RequestFactory().get('/bots')
+
+        self.assertIsNone(self.middleware.process_exception(request, ValueError()))
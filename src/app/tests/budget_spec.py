@@ -0,0 +1,78 @@
+from unittest.mock import MagicMock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.views import View
+from test_plus.test import TestCase
+
+from app import budget, context
+from app.middleware import APIBudgetMiddleware, RequestContextMiddleware
+
+
+class BudgetView(View):
+    api_budget = {'get': 1, 'post': 2}
+
+
+@budget.api_budget(2)
+def budget_view(request):
+    pass
+
+
+class TestAPIBudget(TestCase):
+
+    def request(self, view, calls, method='get'):
+        """Handles a request making `calls`, returns its response"""
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+
+            for call in calls:
+                budget.record(request.method, call)
+
+            return HttpResponse()
+
+        middleware = APIBudgetMiddleware(get_response)
+        request = getattr(RequestFactory(), method)('/bots')
+        request.resolver_match = MagicMock(view_name='studio:summary')
+
+        return RequestContextMiddleware(middleware)(request)
+
+    def test_budget(self):
+        """Budget is declared on a class, per method, or by a decorator"""
+
+        self.assertEqual(budget.get_budget(BudgetView.as_view(), 'GET'), 1)
+        self.assertEqual(budget.get_budget(BudgetView.as_view(), 'POST'), 2)
+        self.assertEqual(budget.get_budget(budget_view, 'GET'), 2)
+        self.assertIsNone(budget.get_budget(View.as_view(), 'GET'))
+
+    def test_calls(self):
+        """Calls made are available to specs"""
+
+        response = self.request(budget_view, ['/ai', '/ai/{aiid}'])
+
+        self.assertEqual(response.api_calls, ['GET /ai', 'GET /ai/{aiid}'])
+
+    @override_settings(API_BUDGET_STRICT=False)
+    def test_warning(self):
+        """Going over budget is logged with the calls made"""
+
+        with self.assertLogs('app.middleware', 'WARNING') as logs:
+            self.request(BudgetView.as_view(), ['/ai', '/ai'])
+
+        self.assertEqual(logs.records[0].api_calls, ['GET /ai', 'GET /ai'])
+        self.assertEqual(logs.records[0].budget, 1)
+
+    def test_strict(self):
+        """Specs fail when a view goes over budget"""
+
+        self.request(BudgetView.as_view(), ['/ai', '/ai'], method='post')
+
+        with self.assertRaises(budget.APIBudgetExceeded):
+            self.request(BudgetView.as_view(), ['/ai', '/ai'])
+
+    def test_outside_request(self):
+        """Calls outside of a request aren't recorded"""
+
+        budget.record('GET', '/ai')
+
+        self.assertIsNone(context.get_current())
@@ -0,0 +1,86 @@
+import threading
+import time
+
+from django.http import Http404
+from django.test import override_settings
+from test_plus.test import TestCase
+
+from app.concurrency import fetch_all
+
+
+def slow(value, delay=0.2):
+    time.sleep(delay)
+    return value
+
+
+def not_found(*args):
+    raise Http404('Resource doesn’t exist')
+
+
+def failing(*args):
+    raise ValueError('Failed')
+
+
+class TestFetchAll(TestCase):
+
+    def test_results(self):
+        """Results are returned under resources names"""
+
+        results = fetch_all({
+            'ai': (slow, 'ai', 0),
+            'intents': (slow, ['intent'], 0),
+        })
+
+        self.assertEqual(results, {'ai': 'ai', 'intents': ['intent']})
+
+    def test_concurrent(self):
+        """Calls are sent in parallel, total time is the slowest call"""
+
+        start = time.monotonic()
+        fetch_all({name: (slow, name) for name in ['a', 'b', 'c', 'd']})
+
+        self.assertLess(time.monotonic() - start, 0.6)
+
+    @override_settings(API_FANOUT_WORKERS=1)
+    def test_serial(self):
+        """Fan-out can be turned off"""
+
+        threads = fetch_all({
+            'a': (threading.current_thread,),
+            'b': (threading.current_thread,),
+        })
+
+        self.assertEqual(set(threads.values()), {threading.current_thread()})
+
+    def test_not_found(self):
+        """Http404 of any resource is raised"""
+
+        with self.assertRaises(Http404):
+            fetch_all({'ai': (slow, 'ai', 0), 'intents': (not_found,)})
+
+    def test_first_error(self):
+        """Errors are raised in resources declaration order"""
+
+        with self.assertRaises(Http404):
+            fetch_all({'ai': (not_found,), 'intents': (failing,)})
+
+    def test_return_exceptions(self):
+        """Errors can be handled per resource"""
+
+        results = fetch_all(
+            {'ai': (slow, 'ai', 0), 'intents': (failing,)},
+            return_exceptions=True
+        )
+
+        self.assertEqual(results['ai'], 'ai')
+        self.assertIsInstance(results['intents'], ValueError)
+
+    def test_nested(self):
+        """Fan-out started from a fan-out call runs sequentially"""
+
+        results = fetch_all({
+            'outer': (fetch_all, {'a': (slow, 'a', 0), 'b': (slow, 'b', 0)}),
+            'other': (slow, 'other', 0),
+        })
+
+        self.assertEqual(results['outer'], {'a': 'a', 'b': 'b'})
@@ -0,0 +1,99 @@
+from unittest.mock import patch
+
+import factory
+
+from django.contrib.auth.signals import user_logged_in
+from django.core.cache import cache
+from django.template import Context, Template
+from django.urls import reverse
+from django.utils import translation
+from test_plus.test import TestCase
+
+from app import fragments
+from users.models import Profile
+from users.tests.factories import UserFactory
+
+TEMPLATE = Template(
+    '{% load app_tags %}'
+    '{% fragment "test" aiid=aiid user %}{{ name }}{% endfragment %}'
+)
+
+
+def render(**context):
+    return TEMPLATE.render(Context({'aiid': 'aiid', 'user': 1, **context}))
+
+
+class TestFragments(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cached(self):
+        """Fragments are rendered once"""
+
+        self.assertEqual(render(name='first'), 'first')
+        self.assertEqual(render(name='second'), 'first')
+
+    def test_vary_on(self):
+        """Fragments are rendered for every user and language"""
+
+        render(name='first')
+
+        self.assertEqual(render(name='second', user=2), 'second')
+
+        with translation.override('es'):
+            self.assertEqual(render(name='third'), 'third')
+
+    def test_bump(self):
+        """Fragments of a bot are invalidated together"""
+
+        render(name='first')
+        render(name='first', aiid='other')
+        fragments.bump('aiid')
+
+        self.assertEqual(render(name='second'), 'second')
+        self.assertEqual(render(name='second', aiid='other'), 'first')
+
+        fragments.bump()
+
+        self.assertEqual(render(name='third', aiid='other'), 'third')
+
+    def test_lost_version(self):
+        """Fragments don't outlive versions evicted from cache"""
+
+        render(name='first')
+        cache.delete(fragments.AI_VERSION_KEY.format(aiid='aiid'))
+
+        self.assertEqual(render(name='second'), 'second')
+
+    @patch('app.fragments.config', FRAGMENT_CACHE_TTL=0)
+    def test_disabled(self, mock_config):
+        """Fragments aren't cached without a TTL"""
+
+        render(name='first')
+
+        self.assertEqual(render(name='second'), 'second')
+
+
+@patch('botstore.templatetags.botstore_tags.get_categories')
+@patch('studio.views.get_ai_list', return_value={'ai_list': []})
+class TestNavigation(TestCase):
+
+    @factory.django.mute_signals(user_logged_in)
+    def setUp(self):
+        cache.clear()
+
+        self.user = UserFactory()
+        Profile.objects.create(user=self.user)
+        self.client.force_login(self.user)
+
+    def test_botstore(self, mock_get_ai_list, mock_get_categories):
+        """Bot Store categories of navigation aren't fetched on warm pages"""
+
+        mock_get_categories.return_value = {'categories': {'Finance': []}}
+
+        for attempt in range(2):
+            response = self.client.get(reverse('studio:summary'))
+            self.assertContains(response, reverse('botstore:category', args=['finance']))
+
+        self.assertEqual(mock_get_categories.call_count, 1)
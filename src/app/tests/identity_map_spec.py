@@ -0,0 +1,115 @@
+import datetime
+
+from unittest.mock import MagicMock, patch
+
+from test_plus.test import TestCase
+
+from app import context
+from app.identity_map import IdentityMap
+from app.services import fetch_api
+
+
+def api_response(status_code=200):
+    response = MagicMock(status_code=status_code)
+    response.elapsed = datetime.timedelta(seconds=0.1)
+    response.json.return_value = {'status': {'code': status_code, 'info': 'OK'}}
+    return response
+
+
+class TestIdentityMap(TestCase):
+
+    def setUp(self):
+        self.identity_map = IdentityMap()
+        self.ai = self.identity_map.key('token', '/ai/1', {})
+        self.other_ai = self.identity_map.key('token', '/ai/2', {})
+        self.ai_list = self.identity_map.key('token', '/ai', {})
+        self.other_user = self.identity_map.key('other', '/ai/1', {})
+
+        self.identity_map.set(self.ai, '1', {'name': 'ai'})
+        self.identity_map.set(self.other_ai, '2', {'name': 'other ai'})
+        self.identity_map.set(self.ai_list, None, {'ai_list': []})
+        self.identity_map.set(self.other_user, '1', {'name': 'ai'})
+
+    def test_copy(self):
+        """Mutating a response doesn't change the stored one"""
+
+        self.identity_map.get(self.ai)['name'] = 'changed'
+        self.assertEqual(self.identity_map.get(self.ai), {'name': 'ai'})
+
+    def test_params(self):
+        """Params order doesn't matter"""
+
+        self.assertEqual(
+            IdentityMap.key('token', '/ai', {'a': 1, 'b': 2}),
+            IdentityMap.key('token', '/ai', {'b': 2, 'a': 1}),
+        )
+
+    def test_invalidate_ai(self):
+        """Write to an AI drops its responses and lists"""
+
+        self.identity_map.invalidate('token', '1')
+
+        self.assertIsNone(self.identity_map.get(self.ai))
+        self.assertIsNone(self.identity_map.get(self.ai_list))
+        self.assertIsNotNone(self.identity_map.get(self.other_ai))
+        self.assertIsNotNone(self.identity_map.get(self.other_user))
+
+    def test_invalidate_unknown(self):
+        """Write without an AI drops all responses of a token"""
+
+        self.identity_map.invalidate('token')
+
+        self.assertEqual(len(self.identity_map), 1)
+
+
+@patch('app.services.get_session')
+class TestFetchApiMemoization(TestCase):
+
+    def setUp(self):
+        self.token = context.activate(context.RequestContext())
+
+    def tearDown(self):
+        context.deactivate(self.token)
+
+    def test_get_memoized(self, mock_session):
+        """Second read of the same resource doesn't call the API"""
+
+        mock_session.return_value.send.return_value = api_response()
+
+        fetch_api('/ui/ai/{aiid}', token='token', aiid='1')
+        fetch_api('/ui/ai/{aiid}', token='token', aiid='1')
+
+        self.assertEqual(mock_session.return_value.send.call_count, 1)
+
+    def test_write_invalidates(self, mock_session):
+        """Write to an AI makes next read call the API"""
+
+        mock_session.return_value.send.return_value = api_response()
+
+        fetch_api('/ui/ai/{aiid}', token='token', aiid='1')
+        fetch_api('/ai/{aiid}', token='token', aiid='1', method='post')
+        fetch_api('/ui/ai/{aiid}', token='token', aiid='1')
+
+        self.assertEqual(mock_session.return_value.send.call_count, 3)
+
+    def test_opt_out(self, mock_session):
+        """Calls can opt out from memoization"""
+
+        mock_session.return_value.send.return_value = api_response()
+
+        fetch_api('/ai/{aiid}/chat', token='token', aiid='1', memoize=False)
+        fetch_api('/ai/{aiid}/chat', token='token', aiid='1', memoize=False)
+
+        self.assertEqual(mock_session.return_value.send.call_count, 2)
+
+    def test_outside_request(self, mock_session):
+        """Nothing is memoized outside of a request"""
+
+        mock_session.return_value.send.return_value = api_response()
+        context.deactivate(self.token)
+        self.token = context.activate(None)
+
+        fetch_api('/ui/ai/{aiid}', token='token', aiid='1')
+        fetch_api('/ui/ai/{aiid}', token='token', aiid='1')
+
+        self.assertEqual(mock_session.return_value.send.call_count, 2)
@@ -0,0 +1,90 @@
+import datetime
+
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import override_settings
+from prometheus_client import REGISTRY
+from requests import Timeout
+from test_plus.test import TestCase
+
+from app.services import fetch_api
+
+PATH = '/ai/{aiid}/metrics'
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@patch('app.services.get_session')
+class TestApiMetrics(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_response(self, mock_session):
+        """Responses are counted and timed by path template"""
+
+        response = MagicMock(status_code=200, elapsed=datetime.timedelta(seconds=0.2))
+        response.json.return_value = {'status': {'code': 200, 'info': 'OK'}}
+        mock_session.return_value.send.return_value = response
+
+        labels = {'method': 'GET', 'path': PATH}
+        responses = sample('console_api_responses_total', status='200', **labels)
+        timed = sample('console_api_request_duration_seconds_count', **labels)
+
+        fetch_api(PATH, token='token', aiid='1')
+        fetch_api(PATH, token='token', aiid='2')
+
+        self.assertEqual(sample('console_api_responses_total', status='200', **labels),
+                         responses + 2)
+        self.assertEqual(sample('console_api_request_duration_seconds_count', **labels),
+                         timed + 2)
+        self.assertEqual(sample('console_api_requests_in_flight', path=PATH), 0)
+
+    def test_timeout(self, mock_session):
+        """Timeouts are counted"""
+
+        mock_session.return_value.send.side_effect = Timeout()
+        timeouts = sample('console_api_timeouts_total', method='GET', path=PATH)
+
+        with self.assertRaises(Timeout):
+            fetch_api(PATH, token='token', aiid='1')
+
+        self.assertEqual(sample('console_api_timeouts_total', method='GET', path=PATH),
+                         timeouts + 1)
+
+
+class TestMetricsView(TestCase):
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics(self):
+        """Metrics are served in Prometheus text format"""
+
+        response = self.get('metrics', extra={'HTTP_AUTHORIZATION': 'Bearer secret'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'console_api_requests_in_flight')
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token(self):
+        """Metrics can be protected by a token"""
+
+        self.assertEqual(self.get('metrics').status_code, 403)
+        self.assertEqual(
+            self.get('metrics', extra={'HTTP_AUTHORIZATION': 'Bearer secret'}).status_code,
+            200
+        )
+
+    @override_settings(METRICS_TOKEN='')
+    def test_no_token(self):
+        """Metrics aren't served without a token, unless in debug mode"""
+
+        self.assertEqual(self.get('metrics').status_code, 403)
+
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.get('metrics').status_code, 200)
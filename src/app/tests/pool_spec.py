@@ -0,0 +1,100 @@
+import gzip
+import json
+import threading
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+from django.test import override_settings
+from test_plus.test import TestCase
+
+from app import pool
+from app.services import fetch_api, iter_stream
+
+CSV = gzip.compress(b'date,message\n' * 1000)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Keep-alive API stub answering every request with an OK status"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        # Requests are sent with a JSON body, consume it to keep connection clean
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        if self.path == '/logs':
+            return self.send_logs()
+
+        body = json.dumps({'status': {'code': 200, 'info': 'OK'}}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_logs(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/csv')
+        self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(CSV)))
+        self.end_headers()
+        self.wfile.write(CSV)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class TestPooledSession(TestCase):
+
+    def setUp(self):
+        self.server = StubServer(('127.0.0.1', 0), StubHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.api_url = 'http://127.0.0.1:{port}'.format(port=self.server.server_port)
+        pool.stats.reset()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_session_is_shared(self):
+        """The same session is used by every call"""
+        self.assertIs(pool.get_session(), pool.get_session())
+
+    def test_connection_is_reused(self):
+        """Second call reuses connection opened by the first one"""
+
+        with override_settings(API_URL=self.api_url):
+            fetch_api('/ai', token='token', timeout=1)
+            fetch_api('/ai', token='token', timeout=1)
+
+        self.assertEqual(pool.get_stats(), {'hits': 1, 'misses': 1, 'evictions': 0})
+
+    def test_idle_connection_is_evicted(self):
+        """Connection idle for longer than keep-alive is closed before reuse"""
+
+        with override_settings(API_URL=self.api_url, API_POOL_KEEPALIVE=-1):
+            fetch_api('/ai', token='token', timeout=1)
+            fetch_api('/ai', token='token', timeout=1)
+
+        self.assertEqual(pool.get_stats(), {'hits': 0, 'misses': 2, 'evictions': 1})
+
+    def test_stream(self):
+        """Streamed body is relayed as sent and connection is reused after"""
+
+        with override_settings(API_URL=self.api_url):
+            response = fetch_api('/logs', token='token', timeout=1, stream=True)
+            chunks = list(iter_stream(response, chunk_size=16))
+            fetch_api('/ai', token='token', timeout=1)
+
+        self.assertEqual(b''.join(chunks), CSV)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(pool.get_stats(), {'hits': 1, 'misses': 1, 'evictions': 0})
+
+    def test_cookies_are_not_shared(self):
+        """Cookies set by the API are never stored by the shared session"""
+        self.assertFalse(pool.get_session().cookies.get_policy().allowed_domains())
@@ -0,0 +1,149 @@
+import shutil
+import tempfile
+import threading
+import time
+
+from unittest.mock import patch
+
+import factory
+
+from django.contrib.auth.signals import user_logged_in
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from test_plus.test import TestCase
+
+from app import profiling
+from app.models import RequestProfile
+from users.models import Profile
+from users.tests.factories import UserFactory
+
+
+def busy(seconds):
+    until = time.perf_counter() + seconds
+
+    while time.perf_counter() < until:
+        pass
+
+
+class TestSampler(TestCase):
+
+    def test_stacks(self):
+        """Stacks of the sampled thread are counted"""
+
+        sampler = profiling.Sampler(threading.get_ident(), interval=0.001)
+        sampler.start()
+        busy(0.05)
+        sampler.stop()
+
+        self.assertTrue(any(
+            ';app.tests.profiling_spec.busy:' in stack for stack in sampler.stacks
+        ))
+
+
+@patch('botstore.templatetags.botstore_tags.get_categories')
+@patch('studio.views.get_ai_list', return_value={'ai_list': []})
+@patch('app.profiling.config', PROFILER_SAMPLE_RATE=0, PROFILER_URL_NAMES='studio:summary')
+class TestProfilerMiddleware(TestCase):
+
+    @factory.django.mute_signals(user_logged_in)
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.settings = override_settings(PROFILER_DIR=self.directory, PROFILER_MAX_FILES=2)
+        self.settings.enable()
+        profiling._switches['expires'] = 0
+
+        self.user = UserFactory(is_staff=True, is_superuser=True)
+        Profile.objects.create(user=self.user)
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.directory)
+        profiling._switches['expires'] = 0
+
+    def test_url_names(self, mock_config, mock_get_ai_list, mock_get_categories):
+        """Requests of the URL names are profiled"""
+
+        self.client.get(reverse('studio:summary'))
+        self.client.get(reverse('account_login'))
+
+        profile = RequestProfile.objects.get()
+
+        self.assertEqual(profile.url_name, 'studio:summary')
+        self.assertEqual(profile.status, 200)
+
+        response = self.client.get(
+            reverse('admin:app_requestprofile_download', args=[profile.pk])
+        )
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_rotation(self, mock_config, mock_get_ai_list, mock_get_categories):
+        """Only the last profiles are kept"""
+
+        for attempt in range(3):
+            self.client.get(reverse('studio:summary'))
+
+        self.assertEqual(RequestProfile.objects.count(), 2)
+        self.assertEqual(
+            sorted(RequestProfile.objects.values_list('filename', flat=True)),
+            sorted(profiling.os.listdir(self.directory))
+        )
+
+    def test_hosts(self, mock_config, mock_get_ai_list, mock_get_categories):
+        """Directory of a host is rotated on disk, files of other hosts are left to them"""
+
+        with open(profiling.os.path.join(self.directory, '20000101-000000-000000-old.folded'),
+                  'w'):
+            # Written before a restart, missing from the catalogue
+            pass
+
+        other = RequestProfile.objects.create(
+            created=timezone.now(), method='GET', path='/', status=200, duration=1,
+            samples=1, filename='other.folded', host='other-pod'
+        )
+
+        with patch('app.profiling.os.remove', wraps=profiling.os.remove) as mock_remove:
+            for attempt in range(2):
+                self.client.get(reverse('studio:summary'))
+
+        self.assertEqual(len(profiling.os.listdir(self.directory)), 2)
+        self.assertNotIn(
+            profiling.os.path.join(self.directory, other.filename),
+            [call[0][0] for call in mock_remove.call_args_list]
+        )
+        self.assertEqual(
+            sorted(RequestProfile.objects.values_list('filename', flat=True)),
+            sorted(profiling.os.listdir(self.directory))
+        )
+
+    def test_other_host(self, mock_config, mock_get_ai_list, mock_get_categories):
+        """Profiles stored on another host are listed without a download"""
+
+        profile = RequestProfile.objects.create(
+            created=timezone.now(), method='GET', path='/', status=200, duration=1,
+            samples=1, filename='other.folded', host='other-pod'
+        )
+
+        response = self.client.get(reverse('admin:app_requestprofile_changelist'))
+        self.assertContains(response, 'other.folded (on other-pod)')
+
+        response = self.client.get(
+            reverse('admin:app_requestprofile_download', args=[profile.pk])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_admin(self, mock_config, mock_get_ai_list, mock_get_categories):
+        """Admins browse profiles"""
+
+        self.client.get(reverse('studio:summary'))
+        profile = RequestProfile.objects.get()
+
+        response = self.client.get(reverse('admin:app_requestprofile_changelist'))
+        self.assertContains(response, profile.filename)
+
+        response = self.client.get(
+            reverse('admin:app_requestprofile_change', args=[profile.pk])
+        )
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,111 @@
+import time
+
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from test_plus.test import TestCase
+
+from app import response_cache
+
+OK = {'status': {'code': 200, 'info': 'OK'}}
+ERROR = {'status': {'code': 500, 'info': 'Error'}}
+
+
+class TestResponseCache(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.key = response_cache.make_key('test', 'token', 1)
+        self.fetch = MagicMock(return_value=OK)
+
+    def test_keys(self):
+        """Token variants are cached separately from anonymous ones"""
+
+        self.assertNotEqual(
+            response_cache.make_key('test', 'token', 1),
+            response_cache.make_key('test', False, 1)
+        )
+        self.assertNotIn('token', response_cache.make_key('test', 'token', 1))
+
+    def test_hit(self):
+        """Fresh value is served from cache"""
+
+        response_cache.get_or_fetch(self.key, self.fetch, ttl=60)
+        response = response_cache.get_or_fetch(self.key, self.fetch, ttl=60)
+
+        self.assertEqual(response, OK)
+        self.assertEqual(self.fetch.call_count, 1)
+
+    def test_disabled(self):
+        """Zero TTL disables cache"""
+
+        response_cache.get_or_fetch(self.key, self.fetch, ttl=0)
+        response_cache.get_or_fetch(self.key, self.fetch, ttl=0)
+
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_errors_not_cached(self):
+        """Unsuccessful responses are not cached"""
+
+        self.fetch.return_value = ERROR
+
+        response_cache.get_or_fetch(self.key, self.fetch, ttl=60)
+        response_cache.get_or_fetch(self.key, self.fetch, ttl=60)
+
+        self.assertEqual(self.fetch.call_count, 2)
+
+    @patch('app.response_cache.get_executor')
+    def test_stale(self, mock_executor):
+        """Stale value is served while it's refreshed in background"""
+
+        cache.set(self.key, {'expires': time.time() - 1, 'value': ERROR})
+
+        response = response_cache.get_or_fetch(self.key, self.fetch, ttl=60, stale_ttl=60)
+        response_cache.get_or_fetch(self.key, self.fetch, ttl=60, stale_ttl=60)
+
+        self.assertEqual(response, ERROR)
+        self.assertEqual(mock_executor.return_value.submit.call_count, 1)
+
+    def test_refresh(self):
+        """Background refresh stores a new value and releases the lock"""
+
+        cache.add(self.key + ':lock', 1)
+        response_cache.refresh_in_background(self.key, self.fetch, 60, 60)
+
+        self.assertEqual(cache.get(self.key)['value'], OK)
+        self.assertIsNone(cache.get(self.key + ':lock'))
+
+    @patch('app.response_cache.LOCK_WAIT', 0.2)
+    def test_single_flight(self):
+        """While somebody else fetches a value, wait for it"""
+
+        cache.add(self.key + ':lock', 1)
+        response_cache.get_or_fetch(self.key, self.fetch, ttl=60)
+
+        # Value never arrived, fetch it as the last resort
+        self.assertEqual(self.fetch.call_count, 1)
+
+    def test_version(self):
+        """Values stored before their version was bumped are misses"""
+
+        response_cache.get_or_fetch(self.key, self.fetch, ttl=60, version_key='version')
+        cache.set('version', 'bumped')
+        response_cache.get_or_fetch(self.key, self.fetch, ttl=60, version_key='version')
+        response_cache.get_or_fetch(self.key, self.fetch, ttl=60, version_key='version')
+
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_outdated_refresh(self):
+        """Refresh started before a version was bumped isn't stored"""
+
+        def fetch():
+            cache.set('version', 'bumped')
+            return OK
+
+        cache.add(self.key + ':lock', 1)
+        response_cache.refresh_in_background(
+            self.key, fetch, 60, 60, version_key='version', version='initial'
+        )
+
+        self.assertIsNone(cache.get(self.key))
+        self.assertIsNone(cache.get(self.key + ':lock'))
@@ -0,0 +1,110 @@
+import datetime
+import logging
+
+from unittest.mock import MagicMock, patch
+
+from django.test import RequestFactory, override_settings
+from test_plus.test import TestCase
+
+from app import context
+from app.services import ResponseFormatError, fetch_api
+
+
+def api_response(body):
+    response = MagicMock(status_code=200)
+    response.elapsed = datetime.timedelta(seconds=0.1)
+    response.json.return_value = body
+    return response
+
+
+@patch('app.services.cache')
+@patch('app.services.get_session')
+class TestFetchApiLogging(TestCase):
+
+    def setUp(self):
+        self.body = {'status': {'code': 200, 'info': 'OK'}}
+        self.level = logging.getLogger('app.services').level
+
+    def tearDown(self):
+        logging.getLogger('app.services').setLevel(self.level)
+
+    def test_disabled(self, mock_session, mock_cache):
+        """Nothing is prepared for disabled log records"""
+
+        logging.getLogger('app.services').setLevel(logging.INFO)
+        mock_session.return_value.send.return_value = api_response(self.body)
+
+        self.assertEqual(fetch_api('/ai', token='token', memoize=False), self.body)
+        self.assertFalse(mock_cache.get.called)
+
+    @override_settings(API_RESPONSE_BODY_LOGS=True)
+    def test_decoded_once(self, mock_session, mock_cache):
+        """Response logged with its body is decoded only once"""
+
+        logging.getLogger('app.services').setLevel(logging.DEBUG)
+        response = api_response(self.body)
+        mock_session.return_value.send.return_value = response
+
+        with self.assertLogs('app.services', logging.DEBUG):
+            fetch_api('/ai', token='token', memoize=False)
+
+        self.assertEqual(response.json.call_count, 1)
+
+    def test_invalid(self, mock_session, mock_cache):
+        """Response which isn't a JSON is an invalid response"""
+
+        response = api_response(None)
+        response.json.side_effect = ValueError()
+        mock_session.return_value.send.return_value = response
+
+        with self.assertRaises(ResponseFormatError):
+            fetch_api('/ai', token='token', memoize=False)
+
+    def test_request_context(self, mock_session, mock_cache):
+        """Developer and request IDs are taken from the request, not the cache"""
+
+        logging.getLogger('app.services').setLevel(logging.DEBUG)
+        mock_session.return_value.send.return_value = api_response(self.body)
+        request = RequestFactory().get('/', HTTP_X_REQUEST_ID='proxy-id')
+
+        token = context.activate(context.RequestContext(
+            request_id=context.get_request_id(request), session={'dev_id': 'dev'}
+        ))
+        try:
+            with self.assertLogs('app.services', logging.DEBUG) as logs:
+                fetch_api('/ai', token='token', memoize=False)
+        finally:
+            context.deactivate(token)
+
+        self.assertEqual(logs.records[0].request_dev_id, 'dev')
+        self.assertEqual(logs.records[0].request_id, 'proxy-id')
+        self.assertFalse(mock_cache.get.called)
+
+    def test_outside_request(self, mock_session, mock_cache):
+        """Outside of a request developer ID is looked up by token"""
+
+        logging.getLogger('app.services').setLevel(logging.DEBUG)
+        mock_session.return_value.send.return_value = api_response(self.body)
+        mock_cache.get.return_value = 'dev'
+
+        with self.assertLogs('app.services', logging.DEBUG) as logs:
+            fetch_api('/ai', token='token', memoize=False)
+
+        self.assertEqual(logs.records[0].request_dev_id, 'dev')
+        mock_cache.get.assert_called_once_with('token', None)
+
+
+class TestRequestId(TestCase):
+
+    def test_header(self):
+        """Request ID set by a proxy is kept if it's valid"""
+
+        factory = RequestFactory()
+
+        self.assertEqual(
+            context.get_request_id(factory.get('/', HTTP_X_REQUEST_ID='a1-b2')), 'a1-b2'
+        )
+        self.assertRegex(
+            context.get_request_id(factory.get('/', HTTP_X_REQUEST_ID='a b\n')), r'^[0-9a-f]{32}$'
+        )
+        self.assertRegex(context.get_request_id(factory.get('/')), r'^[0-9a-f]{32}$')
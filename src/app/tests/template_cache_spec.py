@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.template import Engine
+from test_plus.test import TestCase
+
+from app import template_cache
+
+
+class TestTemplateCache(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.directory, 'email'))
+
+        for name, content in [
+            ('base.html', '{% block content %}{% endblock %}'),
+            ('email/welcome.txt', 'Hello {{ name }}'),
+            ('broken.html', '{% if %}'),
+        ]:
+            with open(os.path.join(self.directory, name), 'w') as template:
+                template.write(content)
+
+        self.engine = Engine(dirs=[self.directory], loaders=[
+            ('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+            ]),
+        ])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_compile_all(self):
+        """Every template is parsed, templates which don't parse are reported"""
+
+        names, errors = template_cache.compile_all(self.engine)
+
+        self.assertEqual(names, ['base.html', 'broken.html', 'email/welcome.txt'])
+        self.assertEqual(list(errors), ['broken.html'])
+        self.assertEqual(
+            len(self.engine.template_loaders[0].get_template_cache), 2
+        )
+
+    def test_templates(self):
+        """Templates of the console parse"""
+
+        names, errors = template_cache.compile_all()
+
+        self.assertIn('studio_navigation.html', names)
+        self.assertEqual(errors, {})
+
+    def test_command(self):
+        """Command fails when a template doesn't parse"""
+
+        with patch('app.template_cache.Engine.get_default', return_value=self.engine):
+            with self.assertRaises(CommandError):
+                call_command('compiletemplates', stderr=StringIO())
+
+        output = StringIO()
+        call_command('compiletemplates', stdout=output)
+
+        self.assertIn('templates parsed', output.getvalue())
@@ -0,0 +1,97 @@
+from unittest.mock import patch
+
+import factory
+
+from django.contrib.auth.signals import user_logged_in
+from django.urls import reverse
+from test_plus.test import TestCase
+
+from app import timing
+from users.models import Profile
+from users.tests.factories import UserFactory
+
+
+class TestTimings(TestCase):
+
+    def setUp(self):
+        self.token = timing.activate(timing.Timings())
+
+    def tearDown(self):
+        timing.deactivate(self.token)
+
+    def test_header(self):
+        """Every API call is listed, other resources are summed up"""
+
+        with timing.measure('api', 'GET /ai'):
+            pass
+
+        with timing.measure('db'):
+            with timing.measure('db'):
+                pass
+
+        with timing.measure('db'):
+            pass
+
+        timings = timing.get_current()
+        header = timings.header(0.1)
+
+        self.assertRegex(
+            header, r'^api;dur=[\d.]+;desc="GET /ai", db;dur=[\d.]+, total;dur=100.0$'
+        )
+        self.assertEqual(timings.counts, {'api': 1, 'db': 2})
+
+    def test_outside_request(self):
+        """Nothing is measured outside of a request"""
+
+        timing.deactivate(self.token)
+        self.token = timing.activate(None)
+
+        with timing.measure('db'):
+            pass
+
+        self.assertIsNone(timing.get_current())
+
+
+@patch('botstore.templatetags.botstore_tags.get_categories')
+@patch('studio.views.get_ai_list', return_value={'ai_list': []})
+class TestServerTimingMiddleware(TestCase):
+
+    @factory.django.mute_signals(user_logged_in)
+    def setUp(self):
+        self.user = UserFactory(is_staff=True)
+        Profile.objects.create(user=self.user)
+
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['token'] = 'token'
+        session.save()
+
+    def test_staff(self, mock_get_ai_list, mock_get_categories):
+        """Staff gets breakdown of a request in a header"""
+
+        response = self.client.get(reverse('studio:summary'))
+
+        for resource in ['session', 'db', 'template', 'total']:
+            self.assertIn(resource + ';dur=', response['Server-Timing'])
+
+    def test_users(self, mock_get_ai_list, mock_get_categories):
+        """Other users don't get it"""
+
+        self.user.is_staff = False
+        self.user.save()
+
+        response = self.client.get(reverse('studio:summary'))
+
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_log(self, mock_get_ai_list, mock_get_categories):
+        """Every request is logged with its breakdown"""
+
+        with self.assertLogs('app.middleware', 'INFO') as logs:
+            self.client.get(reverse('studio:summary'))
+
+        record = logs.records[-1]
+
+        self.assertEqual(record.path, reverse('studio:summary'))
+        self.assertIn('template', record.timings)
+        self.assertEqual(record.api_calls, 0)
@@ -0,0 +1,145 @@
+"""
+Breakdown of time spent handling a request, by resource.
+
+Session store (Redis), database queries, every API call, template rendering
+and message storage are measured into timings of the current request, kept in
+a context variable like `app.context`. After a request
+`app.middleware.ServerTimingMiddleware` logs a single record with all of them
+and sends them to staff in a `Server-Timing` header, where browser developer
+tools show them next to the request.
+"""
+import contextlib
+import threading
+import time
+
+from contextvars import ContextVar
+
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.template.backends import django as django_backend
+
+_current = ContextVar('timings', default=None)
+
+# Resources in the order they are reported
+RESOURCES = ('session', 'db', 'api', 'template', 'messages')
+
+
+class Timings(object):
+    """Time spent per resource, API calls made in fan-out threads included"""
+
+    def __init__(self):
+        self.totals = {}
+        self.counts = {}
+        self.entries = []
+        self.depth = threading.local()
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds, description=None):
+        with self._lock:
+            self.totals[name] = self.totals.get(name, 0) + seconds
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+            if description is not None:
+                self.entries.append((name, seconds, description))
+
+    def header(self, total):
+        """Value of `Server-Timing` header, every API call is listed"""
+
+        metrics = [
+            '{name};dur={duration:.1f};desc="{description}"'.format(
+                name=name, duration=seconds * 1e3, description=description
+            )
+            for name, seconds, description in self.entries
+        ]
+        metrics += [
+            '{name};dur={duration:.1f}'.format(name=name, duration=self.totals[name] * 1e3)
+            for name in RESOURCES if name in self.totals and name != 'api'
+        ]
+        metrics.append('total;dur={duration:.1f}'.format(duration=total * 1e3))
+
+        return ', '.join(metrics)
+
+    def summary(self):
+        """Milliseconds spent per resource"""
+        return {
+            name: round(self.totals[name] * 1e3, 1)
+            for name in RESOURCES if name in self.totals
+        }
+
+
+def get_current():
+    """Returns timings of the current request, `None` outside of a request"""
+    return _current.get()
+
+
+def activate(timings):
+    """Makes the timings current, returns a token used to deactivate them"""
+    return _current.set(timings)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+@contextlib.contextmanager
+def measure(name, description=None):
+    """
+    Adds time spent in the block to the current request, nested blocks of the
+    same resource count only once
+    """
+
+    timings = get_current()
+
+    if timings is None:
+        yield
+        return
+
+    depth = getattr(timings.depth, name, 0)
+    setattr(timings.depth, name, depth + 1)
+    start = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        setattr(timings.depth, name, depth)
+
+        if depth == 0:
+            timings.add(name, time.perf_counter() - start, description)
+
+
+def timed_query(execute, sql, params, many, query_context):
+    """Database execute wrapper, see `connection.execute_wrapper`"""
+
+    with measure('db'):
+        return execute(sql, params, many, query_context)
+
+
+class Template(django_backend.Template):
+
+    def render(self, context=None, request=None):
+        with measure('template'):
+            return super(Template, self).render(context, request)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Django template backend measuring rendering time"""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except django_backend.TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
+
+
+class MessageStorage(FallbackStorage):
+    """Default message storage measuring time spent reading and storing messages"""
+
+    def _get(self, *args, **kwargs):
+        with measure('messages'):
+            return super(MessageStorage, self)._get(*args, **kwargs)
+
+    def _store(self, *args, **kwargs):
+        with measure('messages'):
+            return super(MessageStorage, self)._store(*args, **kwargs)
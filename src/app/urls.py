@@ -25,6 +25,7 @@ from django.urls import include, path, re_path
 from django.views import defaults, generic
 from django.views.generic.base import RedirectView
 
+from app.metrics import metrics_view
 from users.views import PasswordChangeView
 
 
@@ -50,6 +51,13 @@ urlpatterns = [
         admin.site.urls
     ),
 
+    # Metrics of API calls in Prometheus format
+    path(
+        'metrics',
+        metrics_view,
+        name='metrics'
+    ),
+
     path(
         'accounts/password/change/',
         PasswordChangeView.as_view(),
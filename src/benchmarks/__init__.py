@@ -0,0 +1,4 @@
+"""
+Benchmarks of the console, run from `src` with the settings of the measured
+environment, e.g. `python -m benchmarks.fetch_api`.
+"""
@@ -0,0 +1,124 @@
+"""
+Per-call overhead of `fetch_api` against a local stub of the API.
+
+Every scenario makes the same calls, the `session` scenario calls the stub
+directly through the pooled session and is the baseline the overhead of
+`fetch_api` is measured against. Times are in microseconds.
+
+    python -m benchmarks.fetch_api --calls 5000 --json
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import time
+
+import django
+
+
+def percentile(samples, percent):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+def measure(call, calls, warmup):
+    """Returns call times in microseconds"""
+
+    for attempt in range(warmup):
+        call()
+
+    samples = []
+
+    for attempt in range(calls):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1e6)
+
+    return samples
+
+
+def summarize(samples, baseline=None):
+    mean = statistics.mean(samples)
+    summary = {
+        'mean': round(mean, 1),
+        'p50': round(percentile(samples, 50), 1),
+        'p95': round(percentile(samples, 95), 1),
+        'p99': round(percentile(samples, 99), 1),
+    }
+
+    if baseline is not None:
+        summary['overhead'] = round(mean - baseline, 1)
+
+    return summary
+
+
+def run(calls, warmup):
+    from django.test import override_settings
+    from requests import Request
+
+    from app.pool import get_session
+    from app.services import fetch_api
+    from benchmarks.stub import StubServer
+
+    logger = logging.getLogger('app.services')
+    level = logger.level
+    results = {}
+
+    with StubServer() as stub, override_settings(API_URL=stub.url):
+        request = Request('GET', stub.url + '/ai', json={})
+        scenarios = (
+            ('session', logging.INFO, False, lambda: get_session().send(
+                request.prepare(), timeout=5
+            ).json()),
+            ('fetch_api', logging.INFO, False, lambda: fetch_api('/ai', token='token')),
+            ('fetch_api_debug', logging.DEBUG, False, lambda: fetch_api('/ai', token='token')),
+            ('fetch_api_body_logs', logging.DEBUG, True, lambda: fetch_api('/ai', token='token')),
+        )
+
+        try:
+            for name, scenario_level, body_logs, call in scenarios:
+                logger.setLevel(scenario_level)
+
+                with override_settings(API_RESPONSE_BODY_LOGS=body_logs):
+                    samples = measure(call, calls, warmup)
+
+                baseline = results.get('session', {}).get('mean')
+                results[name] = summarize(samples, baseline)
+        finally:
+            logger.setLevel(level)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=2000, help='Measured calls per scenario')
+    parser.add_argument('--warmup', type=int, default=100, help='Calls made before measuring')
+    parser.add_argument('--json', action='store_true', help='Machine readable output')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    django.setup()
+
+    # Benchmark measures building of log records, not writing them
+    logging.getLogger('app.services').propagate = False
+    logging.getLogger('app.services').handlers = [logging.NullHandler()]
+
+    results = run(args.calls, args.warmup)
+
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+        return
+
+    print('{:<22}{:>10}{:>10}{:>10}{:>10}{:>10}'.format(
+        'scenario', 'mean', 'p50', 'p95', 'p99', 'overhead'
+    ))
+    for name, summary in results.items():
+        print('{:<22}{mean:>10}{p50:>10}{p95:>10}{p99:>10}{overhead:>10}'.format(
+            name, **{'overhead': '', **summary}
+        ))
+
+
+if __name__ == '__main__':
+    main()
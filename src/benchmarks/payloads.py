@@ -0,0 +1,107 @@
+"""
+API responses served by the stub to the console pages, built from the spec
+factories so benchmarks render the same data as the specs.
+"""
+import re
+
+import factory
+
+from botstore.tests.factories import BotDetailsFactory
+from studio.tests.factories import AIDetails, AiFactory, IntentFactory
+
+AIID = AiFactory.aiid
+
+OK = {'code': 200, 'info': 'OK'}
+CREATED = {'code': 201, 'info': 'OK'}
+
+
+def ai():
+    return {
+        **factory.build(dict, FACTORY_CLASS=AiFactory),
+        'can_chat': True,
+        'training': {'status': 'completed', 'progress': 1},
+        'status': OK,
+    }
+
+
+def ai_list():
+    return {'ai_list': [ai() for index in range(10)], 'status': OK}
+
+
+def ai_details():
+    return {**factory.build(dict, FACTORY_CLASS=AIDetails), 'status': OK}
+
+
+def entities():
+    return {
+        'entities': [
+            {'entity_name': 'sys.places', 'is_system': True},
+            {'entity_name': 'colours', 'is_system': False},
+        ],
+        'status': OK,
+    }
+
+
+def intents():
+    return {
+        'intents': [{'intent_name': 'intent_{index}'.format(index=index)} for index in range(20)],
+        'status': OK,
+    }
+
+
+def intent():
+    intent = factory.build(dict, FACTORY_CLASS=IntentFactory)
+
+    return {
+        **intent,
+        'user_says': intent['user_says'].split('\x9d'),
+        'responses': intent['responses'].split('\x9d'),
+        'status': OK,
+    }
+
+
+def chat():
+    return {
+        'chatId': 'c8c9a9c4-3b0e-4b61-8d1e-4f8a8d6e7b52',
+        'result': {'answer': 'Hi there', 'score': 0.9, 'chatTarget': 'ai', 'intents': []},
+        'status': OK,
+    }
+
+
+def categories():
+    bot = factory.build(dict, FACTORY_CLASS=BotDetailsFactory)
+
+    return {
+        'categories': {
+            category: [bot] * 8 for category in ['Entertainment', 'Education', 'Finance']
+        },
+        'status': OK,
+    }
+
+
+ROUTES = (
+    ('GET', r'/ai$', ai_list),
+    ('GET', r'/ui/ai/[^/]+$', ai),
+    ('GET', r'/ui/ai/[^/]+/details$', ai_details),
+    ('GET', r'/experiment/', lambda: {'state': False, 'status': OK}),
+    ('GET', r'/entities/', entities),
+    ('GET', r'/intents/', intents),
+    ('GET', r'/intent/', intent),
+    ('POST', r'/intent/', lambda: {'status': CREATED}),
+    ('GET', r'/ai/[^/]+/chat$', chat),
+    ('GET', r'/ui/botstore/per_category$', categories),
+    ('GET', r'/botstore/purchased$', lambda: {'bots': [], 'status': OK}),
+)
+
+
+def routes(method, path):
+    """Returns status code and payload of an API call, unknown calls succeed"""
+
+    path = path.split('?')[0]
+
+    for route_method, pattern, payload in ROUTES:
+        if method == route_method and re.match(pattern, path):
+            response = payload()
+            return response['status']['code'], response
+
+    return 200, {'status': OK}
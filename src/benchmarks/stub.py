@@ -0,0 +1,79 @@
+"""
+Stub of the API used by benchmarks, answers calls over keep-alive connections,
+optionally after a delay. Without routes every call gets a minimal valid
+response, see `benchmarks.payloads` for responses of the console pages.
+"""
+import json
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+OK = json.dumps({'status': {'code': 200, 'info': 'OK'}}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    # Headers and body are written separately, don't let them wait for ACKs
+    disable_nagle_algorithm = True
+
+    def respond(self):
+        # Requests are sent with a JSON body, consume it to keep connection clean
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        self.server.count()
+        status, body = self.server.respond(self.command, self.path)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_DELETE = respond
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    """Serves stub API on a free local port from a background thread"""
+
+    daemon_threads = True
+
+    def __init__(self, latency=0, routes=None):
+        """`routes` returns status code and payload of a method and a path"""
+
+        super(StubServer, self).__init__(('127.0.0.1', 0), StubHandler)
+        self.latency = latency
+        self.routes = routes
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{port}'.format(port=self.server_port)
+
+    def respond(self, method, path):
+        if self.routes is None:
+            return 200, OK
+
+        status, payload = self.routes(method, path)
+        return status, json.dumps(payload).encode()
+
+    def count(self):
+        with self._lock:
+            self.calls += 1
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,19 @@
+from django.test import override_settings
+from test_plus.test import TestCase
+
+from benchmarks import payloads
+from benchmarks.stub import StubServer
+from studio.services import post_chat
+
+
+class TestRoutes(TestCase):
+
+    def test_chat(self):
+        """Chat calls of the console are answered by the chat stub"""
+
+        with StubServer(routes=payloads.routes) as stub, override_settings(API_URL=stub.url):
+            response = post_chat('token', payloads.AIID, {'q': 'Hi', 'chatId': ''})
+
+        # The default payload of unknown calls has no result
+        self.assertEqual(response['result'], payloads.chat()['result'])
+        self.assertEqual(stub.calls, 1)
@@ -0,0 +1,254 @@
+"""
+Latency and throughput of console pages, rendered by the whole Django stack
+against a local stub of the API.
+
+Every page is requested by `--concurrency` clients logged in as a throwaway
+user of a test database. Latencies are in milliseconds, `upstream` is the
+number of API calls made per request. Response caches stay warm between
+requests unless `--cold` is given. Results of two commits are compared with
+
+    python -m benchmarks.views --latency 0.05 --json > before.json
+    python -m benchmarks.views --latency 0.05 --compare before.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+from benchmarks.fetch_api import percentile
+
+# Pages as `name: (method, URL name, body)`, bodies of POST requests are form
+# data, or JSON when given as a string
+PAGES = {
+    'AIListView': ('get', 'studio:summary', None),
+    'AIDetailView': ('get', 'studio:edit_bot', None),
+    'IntentsEditView.get': ('get', 'studio:intents.add', None),
+    'IntentsEditView.post': ('post', 'studio:intents.add', {
+        'intent_name': 'benchmark',
+        'user_says': 'Hi',
+        'responses': 'Hello',
+        **{
+            '{prefix}-{field}'.format(prefix=prefix, field=field): 0
+            for prefix in ['CONDITIONS_IN', 'ENTITIES', 'CONTEXT_IN', 'CONTEXT_OUT',
+                           'CONDITIONS_OUT']
+            for field in ['TOTAL_FORMS', 'INITIAL_FORMS']
+        }
+    }),
+    'ProxyAiView': ('get', 'studio:proxy.ai', None),
+    'ProxyChatView': ('post', 'studio:proxy.ai.chat', json.dumps({'q': 'Hi', 'chatId': ''})),
+    'CategoriesListView': ('get', 'botstore:all', None),
+}
+
+
+def create_client(user):
+    from django.test import Client
+
+    client = Client()
+    client.force_login(user)
+    session = client.session
+    session['token'] = 'token'
+    session['dev_id'] = 'dev_id'
+    session.save()
+    return client
+
+
+def create_clients(count):
+    """Returns clients logged in as the same new user, as in the specs"""
+
+    from django.contrib.auth.signals import user_logged_in
+
+    import factory
+
+    from users.models import Profile
+    from users.tests.factories import UserFactory
+
+    with factory.django.mute_signals(user_logged_in):
+        user = UserFactory()
+        Profile.objects.create(user=user)
+        return [create_client(user) for index in range(count)]
+
+
+def build_request(client, name):
+    from django.urls import reverse
+
+    from benchmarks.payloads import AIID
+
+    method, url_name, body = PAGES[name]
+    url = reverse(url_name, kwargs={} if url_name in [
+        'studio:summary', 'botstore:all'
+    ] else {'aiid': AIID})
+
+    if method == 'get':
+        return lambda: client.get(url)
+
+    if isinstance(body, str):
+        return lambda: client.post(url, body, content_type='application/json')
+
+    return lambda: client.post(url, body)
+
+
+def measure(name, clients, stub, requests, warmup, cold):
+    """Requests a page, returns its summary"""
+
+    from django.core.cache import caches
+
+    calls = [build_request(client, name) for client in clients]
+    sessions = [client.session for client in clients]
+
+    for session in sessions:
+        # Loaded now to be saved again once caches are cleared
+        session.items()
+
+    for attempt in range(warmup):
+        calls[0]()
+
+    samples = []
+    errors = []
+    lock = threading.Lock()
+
+    def call(index):
+        if cold:
+            # Sessions may share the store with the default cache, restore them
+            caches['default'].clear()
+
+            for session in sessions:
+                session.save(must_create=True)
+
+        start = time.perf_counter()
+        response = calls[index % len(calls)]()
+        elapsed = (time.perf_counter() - start) * 1e3
+
+        with lock:
+            samples.append(elapsed)
+
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+
+    upstream = stub.calls
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(len(clients)) as executor:
+        list(executor.map(call, range(requests)))
+
+    duration = time.perf_counter() - start
+
+    return {
+        'mean': round(statistics.mean(samples), 2),
+        'p50': round(percentile(samples, 50), 2),
+        'p95': round(percentile(samples, 95), 2),
+        'p99': round(percentile(samples, 99), 2),
+        'rps': round(requests / duration, 1),
+        'upstream': round((stub.calls - upstream) / requests, 2),
+        'errors': len(errors),
+    }
+
+
+def run(pages, requests, warmup, concurrency, latency, cold):
+    from django.db import connection
+    from django.test import override_settings
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    from benchmarks.payloads import routes
+    from benchmarks.stub import StubServer
+
+    setup_test_environment()
+    database = connection.creation.create_test_db(verbosity=0, serialize=False)
+    results = {}
+
+    try:
+        clients = create_clients(concurrency)
+
+        with StubServer(latency, routes) as stub, override_settings(API_URL=stub.url):
+            for name in pages:
+                results[name] = measure(name, clients, stub, requests, warmup, cold)
+    finally:
+        connection.creation.destroy_test_db(database, verbosity=0)
+        teardown_test_environment()
+
+    return results
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, previous=None):
+    columns = ['p50', 'p95', 'p99', 'rps', 'upstream', 'errors']
+
+    print('{:<24}'.format('page') + ''.join('{:>14}'.format(column) for column in columns))
+
+    for name, summary in results.items():
+        cells = []
+
+        for column in columns:
+            cell = str(summary[column])
+            before = (previous or {}).get(name, {}).get(column)
+
+            if before:
+                cell += ' {:+.0%}'.format(summary[column] / before - 1)
+
+            cells.append('{:>14}'.format(cell))
+
+        print('{:<24}'.format(name) + ''.join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--page', action='append', choices=list(PAGES),
+                        help='Page to benchmark, may be repeated, all by default')
+    parser.add_argument('--requests', type=int, default=500, help='Measured requests per page')
+    parser.add_argument('--warmup', type=int, default=20, help='Requests made before measuring')
+    parser.add_argument('--concurrency', type=int, default=4, help='Concurrent clients')
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help='Seconds the stub API waits before responding')
+    parser.add_argument('--cold', action='store_true', help='Clear caches before requests')
+    parser.add_argument('--json', action='store_true', help='Machine readable output')
+    parser.add_argument('--compare', type=argparse.FileType(),
+                        help='JSON output of a previous run to compare against')
+    args = parser.parse_args()
+
+    if args.cold and args.concurrency > 1:
+        parser.error('--cold clears caches shared by all clients, use --concurrency 1')
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    django.setup()
+
+    results = run(
+        args.page or list(PAGES),
+        args.requests,
+        args.warmup,
+        args.concurrency,
+        args.latency,
+        args.cold
+    )
+
+    if args.json:
+        print(json.dumps({
+            'commit': get_commit(),
+            'options': {
+                'requests': args.requests,
+                'concurrency': args.concurrency,
+                'latency': args.latency,
+                'cold': args.cold,
+            },
+            'results': results,
+        }, indent=2, sort_keys=True))
+        return
+
+    print_results(results, json.load(args.compare)['results'] if args.compare else None)
+
+
+if __name__ == '__main__':
+    main()
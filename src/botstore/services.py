@@ -1,24 +1,38 @@
 import logging
 import urllib
 
+from constance import config
+from django.core.cache import cache
+
+from app import fragments, response_cache
 from app.services import fetch_api
 
 logger = logging.getLogger(__name__)
 
 
+def cached(name, token, args, fetch):
+    """Bot Store catalogue is public and read mostly, share it between workers"""
+    return response_cache.get_or_fetch(
+        response_cache.make_key('botstore.' + name, token, *args),
+        fetch,
+        ttl=config.BOTSTORE_CACHE_TTL,
+        stale_ttl=config.BOTSTORE_CACHE_STALE_TTL
+    )
+
+
 def get_categories(token=False, start=0, offset=8):
     """Returns a list of categories, with a list bots in each of them"""
-    return fetch_api(
+    return cached('categories', token, (start, offset), lambda: fetch_api(
         '/ui/botstore/per_category?startFrom={start}&pageSize={offset}',
         token=token,
         start=start,
         offset=offset
-    )
+    ))
 
 
 def get_bots(category, token=False, start=0, offset=24):
     """Returns a list of bots, filtered by category"""
-    return fetch_api(
+    return cached('bots', token, (category, start, offset), lambda: fetch_api(
         '/ui/botstore?filter={filter}&startFrom={start}&pageSize={offset}',
         token=token,
         filter=urllib.parse.quote_plus(
@@ -26,12 +40,14 @@ def get_bots(category, token=False, start=0, offset=24):
         ),
         start=start,
         offset=offset
-    )
+    ))
 
 
 def get_bot(bot_id, token=False):
     """Returns details about a single bot"""
-    return fetch_api('/ui/botstore/{bot_id:d}', token=token, bot_id=bot_id)
+    return cached('bot', token, (bot_id,), lambda: fetch_api(
+        '/ui/botstore/{bot_id:d}', token=token, bot_id=bot_id
+    ))
 
 
 def get_purchased(token):
@@ -46,12 +62,15 @@ def post_bot(token, aiid, bot_data):
         'aiid': aiid,
     }
 
-    return fetch_api(
-        '/botstore',
-        token=token,
-        data={**defaults, **bot_data},
-        method='post'
-    )
+    try:
+        return fetch_api(
+            '/botstore',
+            token=token,
+            data={**defaults, **bot_data},
+            method='post'
+        )
+    finally:
+        fragments.bump(aiid)
 
 
 def post_icon(token, bot_id, icon_file):
@@ -65,10 +84,12 @@ def post_icon(token, bot_id, icon_file):
 
 
 def post_purchase(token, bot_id):
-    """Purchase a bot"""
-    return fetch_api(
+    """Purchase a bot, cached bot details of the buyer are not valid anymore"""
+    purchased = fetch_api(
         '/botstore/purchase/{bot_id:d}',
         token=token,
         bot_id=bot_id,
         method='post'
     )
+    cache.delete(response_cache.make_key('botstore.bot', token, bot_id))
+    return purchased
@@ -1,9 +1,10 @@
 import factory
 
 from unittest.mock import patch
+from django.core.cache import cache
 from test_plus.test import TestCase
 
-from botstore.services import get_bot, get_bots, get_categories
+from botstore.services import get_bot, get_bots, get_categories, post_purchase
 from botstore.tests.factories import BotDetailsFactory
 
 
@@ -100,3 +101,49 @@ class TestGetCategories(TestCase):
         # If the request is sent successfully, then I expect a response to be
         # returned.
         self.assertDictEqual(categories, response)
+
+
+@patch('botstore.services.config')
+@patch('botstore.services.fetch_api')
+class TestCatalogueCache(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.response = {'status': {'code': 200, 'info': 'OK'}}
+
+    def test_categories_cached(self, mock_fetch_api, mock_config):
+        """Categories are fetched once for all anonymous users"""
+
+        mock_config.BOTSTORE_CACHE_TTL = 60
+        mock_config.BOTSTORE_CACHE_STALE_TTL = 0
+        mock_fetch_api.return_value = self.response
+
+        get_categories()
+        get_categories()
+
+        self.assertEqual(mock_fetch_api.call_count, 1)
+
+    def test_token_variants(self, mock_fetch_api, mock_config):
+        """Data fetched with a token isn't served to anonymous users"""
+
+        mock_config.BOTSTORE_CACHE_TTL = 60
+        mock_config.BOTSTORE_CACHE_STALE_TTL = 0
+        mock_fetch_api.return_value = self.response
+
+        get_bot(1, token='token')
+        get_bot(1)
+
+        self.assertEqual(mock_fetch_api.call_count, 2)
+
+    def test_purchase(self, mock_fetch_api, mock_config):
+        """Purchase drops cached details of purchased bot"""
+
+        mock_config.BOTSTORE_CACHE_TTL = 60
+        mock_config.BOTSTORE_CACHE_STALE_TTL = 0
+        mock_fetch_api.return_value = self.response
+
+        get_bot(1, token='token')
+        post_purchase('token', 1)
+        get_bot(1, token='token')
+
+        self.assertEqual(mock_fetch_api.call_count, 3)
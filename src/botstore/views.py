@@ -18,6 +18,7 @@ from botstore.forms import PublishForm
 from studio.services import get_ai
 
 from users.decorators import has_info
+from users.groups import has_group
 from users.forms import DeveloperInfoForm
 from users.services import get_info
 
@@ -34,7 +35,7 @@ class PurchaseView(RedirectView):
         purchased = post_purchase(self.request.session.get('token'), kwargs['bot_id'])
         template = 'messages/purchased_skill.html'
 
-        if self.request.user.groups.filter(name='feature.templates').exists():
+        if has_group(self.request.user, 'feature.templates'):
             # new template flow
             template = 'messages/purchased_template.html'
 
@@ -151,6 +152,7 @@ class CategoriesListView(ListView):
     """List of categories"""
     context_object_name = 'categories'
     template_name = 'categorie_list.html'
+    api_budget = 2
 
     def get_queryset(self, **kwargs):
         return get_categories(
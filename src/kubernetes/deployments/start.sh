@@ -12,6 +12,11 @@ echo "Checking Django configuration works"
 python manage.py version
 check_return_code
 
+# Fail early on templates which don't parse
+echo "Checking templates"
+python manage.py compiletemplates
+check_return_code
+
 # Process statics so we can run further commands
 echo "Process statics"
 python manage.py collectstatic --noinput
@@ -36,7 +41,21 @@ echo "Running migrations"
 python manage.py migrate
 check_return_code
 
+# Knowledge Base bundles pick up their files on disk when they are first
+# used, `make reconcile-kb` repairs the catalogue if it drifts. It walks and
+# hashes the whole KB_BASE_DIR, too slow to hold up every start.
+
+# Workers share their metrics through files in this directory
+export prometheus_multiproc_dir=${prometheus_multiproc_dir:-/tmp/prometheus}
+
 # Launch serve app, we run 3 workers, each will be restarted after 1024 requests
-# to free the memmory.
+# to free the memmory. Each worker serves requests from a pool of threads so
+# long lived training status streams don't block other requests.
+# With ASGI set, workers run an event loop instead and chat calls to the API
+# wait on sockets, see app.asgi.
 echo "Starting Django"
-gunicorn --max-requests 1024 --workers 3 --bind :8000 app.wsgi
+if [[ -n "$ASGI" ]]; then
+  gunicorn --config python:app.gunicorn --max-requests 1024 --workers 3 --worker-class uvicorn.workers.UvicornWorker --bind :8000 app.asgi:application
+else
+  gunicorn --config python:app.gunicorn --max-requests 1024 --workers 3 --worker-class gthread --threads ${GUNICORN_THREADS:-16} --bind :8000 app.wsgi
+fi
@@ -0,0 +1,409 @@
+"""
+Streaming validation of bot exports uploaded for import.
+
+Exports can be large, because of their training file and their intents. The
+export object is read chunk by chunk: its strings are scanned for their end
+without being decoded, and items of its intents and entities are decoded one
+at a time by the standard decoder, then checked against the export schema.
+Memory stays within a chunk and the largest item, no object of the whole
+export is built. Errors name the JSON path of the value at fault, e.g.
+`$.intents[2].intent_name`. A valid upload is then sent to the API as it is,
+see `studio.services.post_import_ai`.
+"""
+import codecs
+import json
+import re
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# Characters of a string up to its closing quote, escapes are checked but not resolved
+STRING_BODY = re.compile(
+    r'[^"\\\x00-\x1f]*(?:\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4})[^"\\\x00-\x1f]*)*'
+)
+
+# Characters read after a token before it's complete, more than a literal or an escape
+LOOKAHEAD = 8
+
+DECODER = json.JSONDecoder()
+
+# Kinds of values, by their first character or their decoded type
+FIRST_CHARACTERS = {
+    '{': 'object',
+    '[': 'array',
+    '"': 'string',
+    't': 'boolean',
+    'f': 'boolean',
+    'n': 'null',
+}
+
+NUMBER_START = set('-0123456789')
+
+TYPES = {
+    dict: 'object',
+    list: 'array',
+    str: 'string',
+    bool: 'boolean',
+    int: 'number',
+    float: 'number',
+    type(None): 'null',
+}
+
+DESCRIPTIONS = {
+    'object': 'an object',
+    'array': 'an array',
+    'string': 'a string',
+    'number': 'a number',
+    'boolean': 'a boolean',
+    'null': 'null',
+}
+
+
+def format_path(path):
+    """JSON path of a value, from keys and indexes leading to it"""
+
+    return '$' + ''.join(
+        '[{}]'.format(part) if isinstance(part, int) else
+        '.{}'.format(part) if part.isidentifier() else
+        '[{}]'.format(json.dumps(part))
+        for part in path
+    )
+
+
+class ExportError(ValueError):
+    """Export is not valid JSON, or doesn't match the schema"""
+
+    def __init__(self, path, message):
+        self.path = tuple(path)
+        self.message = message
+        super(ExportError, self).__init__('{path}: {message}'.format(
+            path=format_path(self.path), message=message
+        ))
+
+
+def is_truncated(error):
+    """Whether a decoding error may only be caused by the end of text read so far"""
+
+    return error.msg.startswith('Unterminated string') or \
+        error.pos > len(error.doc) - LOOKAHEAD
+
+
+class Reader(object):
+    """Text of chunks of UTF-8, read ahead only as far as values need"""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+
+    def fill(self, size=1):
+        """
+        Reads at least `size` characters more, or up to the end, and drops
+        text consumed. Returns `False` if there was nothing left to read.
+        """
+
+        if self.eof:
+            return False
+
+        texts = [self.buffer[self.position:]]
+        read = 0
+
+        for chunk in self.chunks:
+            texts.append(self.decoder.decode(chunk))
+            read += len(texts[-1])
+
+            if read >= size:
+                break
+        else:
+            texts.append(self.decoder.decode(b'', final=True))
+            read += len(texts[-1])
+            self.eof = True
+
+        self.buffer = ''.join(texts)
+        self.position = 0
+
+        return read > 0
+
+    def peek(self):
+        """Next character after whitespace, empty at the end"""
+
+        while True:
+            self.position = WHITESPACE.match(self.buffer, self.position).end()
+
+            if self.position < len(self.buffer) or not self.fill():
+                return self.buffer[self.position:self.position + 1]
+
+    def advance(self):
+        self.position += 1
+
+    def skip_string(self):
+        """Reads a string after its opening quote without decoding it, returns if it's empty"""
+
+        empty = True
+
+        while True:
+            end = STRING_BODY.match(self.buffer, self.position).end()
+            empty = empty and end == self.position
+            self.position = end
+
+            # The end of the buffer may cut an escape
+            if len(self.buffer) - end < LOOKAHEAD and self.fill():
+                continue
+
+            character = self.buffer[self.position:self.position + 1]
+
+            if character == '"':
+                self.advance()
+                return empty
+
+            if not character:
+                raise ValueError('Unterminated string')
+
+            if character == '\\':
+                raise ValueError('Invalid \\escape')
+
+            raise ValueError('Invalid control character')
+
+    def decode(self):
+        """Decodes the value at the current position with the standard decoder"""
+
+        while True:
+            try:
+                value, end = DECODER.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError as error:
+                if self.eof or not is_truncated(error):
+                    raise ValueError(re.sub(r' (starting )?at$', '', error.msg))
+            else:
+                # Digits of a number may follow in text not read yet
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    return value
+
+            # Reading as much again as is buffered keeps retries linear
+            self.fill(len(self.buffer) - self.position)
+
+
+class Schema(object):
+    """
+    Expected types of a value, any value if none. Properties of objects which
+    aren't required may be null, properties not in the schema aren't checked.
+    Streamed objects and arrays are read an item at a time, other values are
+    decoded as a whole.
+    """
+
+    def __init__(self, *types, items=None, properties=None, required=(), empty=True,
+                 streamed=False):
+        self.types = types
+        self.items = items
+        self.properties = properties or {}
+        self.required = required
+        self.empty = empty
+        self.streamed = streamed
+
+        self.python_types = {python_type for python_type, kind in TYPES.items() if kind in types}
+        self.is_scalar = empty and not items and not properties
+
+    def get(self, key):
+        """Schema of an item or a property"""
+
+        if isinstance(key, int):
+            return self.items or ANY
+
+        return self.properties.get(key, ANY)
+
+    def check_kind(self, path, kind, nullable=False):
+        if self.types and kind not in self.types and not (kind == 'null' and nullable):
+            raise ExportError(path, 'Expected {expected}, found {found}'.format(
+                expected=' or '.join(DESCRIPTIONS[name] for name in self.types),
+                found=DESCRIPTIONS[kind]
+            ))
+
+    def check_empty(self, path, empty):
+        if empty and not self.empty:
+            raise ExportError(path, 'Must not be empty')
+
+    def check_required(self, path, found):
+        for key in self.required:
+            if key not in found:
+                raise ExportError(path, "Missing '{}'".format(key))
+
+    def check(self, path, value, nullable=False):
+        """Checks a decoded value"""
+
+        if self is ANY:
+            return
+
+        kind = TYPES[type(value)]
+        self.check_kind(path, kind, nullable)
+
+        if kind == 'string':
+            self.check_empty(path, not value)
+
+        elif kind == 'object':
+            for key, schema in self.properties.items():
+                if key in value:
+                    schema.check(path + (key,), value[key], key not in self.required)
+
+            self.check_required(path, value)
+
+        elif kind == 'array':
+            self.check_items(path, value)
+
+    def check_items(self, path, value):
+        items = self.items or ANY
+
+        # Items only checked for their type are checked at once, one by one if any is wrong
+        if items is ANY or items.is_scalar and set(map(type, value)) <= items.python_types:
+            return
+
+        for index, item in enumerate(value):
+            items.check(path + (index,), item)
+
+
+ANY = Schema()
+
+STRINGS = Schema('array', items=Schema('string'))
+
+INTENT = Schema('object', required=('intent_name',), properties={
+    'intent_name': Schema('string', empty=False),
+    'responses': STRINGS,
+    'user_says': STRINGS,
+    'variables': Schema('array', items=Schema('object')),
+})
+
+ENTITY = Schema('object', required=('entity_name',), properties={
+    'entity_name': Schema('string', empty=False),
+    'entity_values': STRINGS,
+})
+
+EXPORT = Schema('object', required=('name',), streamed=True, properties={
+    'name': Schema('string', empty=False),
+    'description': Schema('string'),
+    'isPrivate': Schema('boolean'),
+    'personality': Schema('number'),
+    'confidence': Schema('number'),
+    'voice': Schema('number'),
+    'language': Schema('string'),
+    'timezone': Schema('string'),
+    'version': Schema('number'),
+    'default_chat_responses': STRINGS,
+    'intents': Schema('array', items=INTENT, streamed=True),
+    'entities': Schema('array', items=ENTITY, streamed=True),
+    'trainingFile': Schema('string'),
+    'linked_bots': Schema('array'),
+})
+
+
+def read_value(reader, path, schema, nullable=False):
+    """
+    Reads a value at `path`, keys and indexes of the value being read are
+    pushed to it as they are read
+    """
+
+    character = reader.peek()
+    kind = FIRST_CHARACTERS.get(character, 'number' if character in NUMBER_START else None)
+
+    if kind is None:
+        raise ValueError('Expecting value')
+
+    schema.check_kind(tuple(path), kind, nullable)
+
+    if kind == 'string':
+        reader.advance()
+        schema.check_empty(tuple(path), reader.skip_string())
+
+    elif kind == 'object' and schema.streamed:
+        read_object(reader, path, schema)
+
+    elif kind == 'array' and schema.streamed:
+        read_array(reader, path, schema)
+
+    else:
+        schema.check(tuple(path), reader.decode(), nullable)
+
+
+def read_object(reader, path, schema):
+    reader.advance()
+    found = set()
+    path.append(None)
+
+    if reader.peek() == '}':
+        reader.advance()
+    else:
+        while True:
+            if reader.peek() != '"':
+                raise ValueError('Expecting property name enclosed in double quotes')
+
+            path[-1] = reader.decode()
+            found.add(path[-1])
+
+            if reader.peek() != ':':
+                raise ValueError("Expecting ':' delimiter")
+
+            reader.advance()
+            read_value(reader, path, schema.get(path[-1]), path[-1] not in schema.required)
+
+            if read_separator(reader, '}'):
+                break
+
+            path[-1] = None
+
+    path.pop()
+    schema.check_required(tuple(path), found)
+
+
+def read_array(reader, path, schema):
+    reader.advance()
+    path.append(0)
+
+    if reader.peek() == ']':
+        reader.advance()
+    else:
+        while True:
+            read_value(reader, path, schema.get(path[-1]))
+
+            if read_separator(reader, ']'):
+                break
+
+            path[-1] += 1
+
+    path.pop()
+
+
+def read_separator(reader, end):
+    """Reads a comma or the end of a container after a value, returns if it's the end"""
+
+    character = reader.peek()
+
+    if character not in (',', end):
+        raise ValueError("Expecting ',' delimiter")
+
+    reader.advance()
+    return character == end
+
+
+def trim(path):
+    """Path of containers, without the key of a property not read yet"""
+
+    return [part for part in path if part is not None]
+
+
+def validate(chunks, schema=EXPORT):
+    """Reads an export in chunks of bytes, raises `ExportError` at its first error"""
+
+    reader = Reader(chunks)
+    path = []
+
+    try:
+        read_value(reader, path, schema)
+
+        if reader.peek():
+            raise ValueError('Extra data')
+
+    except ExportError:
+        raise
+
+    except ValueError as error:
+        message = 'Invalid UTF-8' if isinstance(error, UnicodeDecodeError) else str(error)
+        raise ExportError(trim(path), message)
@@ -0,0 +1,42 @@
+"""Asynchronous versions of chat related `studio.services`, used by ASGI views"""
+import logging
+
+from constance import config
+
+from app.async_services import fetch_api_async, run_sync
+
+logger = logging.getLogger(__name__)
+
+
+async def post_chat(token, aiid, payload):
+    """Send chat message"""
+    return await fetch_api_async(
+        '/ai/{aiid}/chat',
+        token=token,
+        aiid=aiid,
+        params=payload,
+        timeout=await run_sync(lambda: config.API_CHAT_TIMEOUT)
+    )
+
+
+async def post_handover_reset(token, aiid, chatId, target='ai'):
+    """Reset handover status"""
+    return await fetch_api_async(
+        '/ai/{aiid}/chat/target?chatId={chatId}&target={target}',
+        token=token,
+        aiid=aiid,
+        chatId=chatId,
+        target=target,
+        method='post'
+    )
+
+
+async def post_context_reset(token, aiid, chatId):
+    """Reset chat context"""
+    return await fetch_api_async(
+        '/ai/{aiid}/chat/reset?chatId={chatId}',
+        token=token,
+        aiid=aiid,
+        chatId=chatId,
+        method='post'
+    )
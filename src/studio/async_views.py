@@ -0,0 +1,61 @@
+"""
+Asynchronous versions of the chat proxy views, served by `app.asgi`. The ASGI
+handler runs middleware and `json_login_required` around them, as around
+their synchronous versions.
+"""
+import json
+import logging
+
+from django.http import JsonResponse
+
+from app.async_services import run_sync
+from studio import transcripts
+from studio.async_services import post_chat, post_context_reset, post_handover_reset
+
+logger = logging.getLogger(__name__)
+
+
+async def proxy_handover_reset(request, aiid):
+    """Reset handover to human state"""
+
+    response = await post_handover_reset(
+        request.session.get('token', False),
+        aiid,
+        chatId=json.loads(request.body).get('chatId', '')
+    )
+    return JsonResponse(response, status=response['status']['code'])
+
+
+async def proxy_context_reset(request, aiid):
+    """Reset chat context"""
+
+    response = await post_context_reset(
+        request.session.get('token', False),
+        aiid,
+        chatId=json.loads(request.body).get('chatId', '')
+    )
+    return JsonResponse(response, status=response['status']['code'])
+
+
+async def proxy_chat(request, aiid):
+    """Send chat message"""
+
+    payload = json.loads(request.body)
+    response = await post_chat(
+        request.session.get('token', False),
+        aiid,
+        payload=payload
+    )
+
+    if response['status']['code'] == 200:
+        await run_sync(transcripts.append, request.session, aiid, payload.get('q'), response)
+
+    return JsonResponse(response, status=response['status']['code'])
+
+
+# Views served asynchronously by URL name, instead of their synchronous versions
+views = {
+    'studio:proxy.handover.reset': proxy_handover_reset,
+    'studio:proxy.context.reset': proxy_context_reset,
+    'studio:proxy.ai.chat': proxy_chat,
+}
@@ -30,6 +30,8 @@ from studio.services import (
 )
 from botstore.services import get_purchased
 
+from studio import ai_import
+
 from .models import KnowledgeBaseFileBundle
 from django.core.validators import FileExtensionValidator
 from django.core.exceptions import ValidationError
@@ -655,8 +657,23 @@ class CloneAIForm(AddAIForm):
 
     form_id = 'CLONE_BOT_FORM'
 
-    def save(self, *args, **kwargs):
-        return post_clone_ai(ai_data=self.cleaned_data, **kwargs)
+    def save(self, *args, devid=None, **kwargs):
+        ai = post_clone_ai(ai_data=self.cleaned_data, **kwargs)
+
+        if not devid or ai['status']['code'] not in [200, 201] or not ai.get('aiid'):
+            return ai
+
+        bundle = KnowledgeBaseFileBundle.objects.filter(devid=devid, aiid=kwargs['aiid']).first()
+
+        if bundle:
+            try:
+                bundle.copy_to(devid, ai['aiid'])
+            except OSError as error:
+                logger.error('Could not copy Knowledge Base of a clone', extra={
+                    'aiid': ai['aiid'], 'error': error
+                })
+
+        return ai
 
 
 class SettingsAIForm(AddAIForm):
@@ -736,12 +753,16 @@ class ImportAIForm(forms.Form):
     )
 
     def clean_ai_data(self):
-        """Check if imported data is a valid JSON"""
+        """
+        Check if imported data is a valid export, it's read in chunks and the
+        uploaded file is sent to the API as it is
+        """
         ai_data = self.cleaned_data['ai_data']
         try:
-            ai_data = json.loads(ai_data.read().decode('utf8'))
-        except (json.JSONDecodeError, UnicodeDecodeError):
-            raise forms.ValidationError('Invalid JSON file')
+            ai_import.validate(ai_data.chunks())
+        except ai_import.ExportError as error:
+            raise forms.ValidationError('Invalid JSON file, {}'.format(error))
+        ai_data.seek(0)
         return ai_data
 
     def save(self, *args, **kwargs):
@@ -869,7 +890,7 @@ class KnowledgeBaseRemoveFileForm(forms.Form):
 
     def save(self, *args, **kwargs):
         bundle = KnowledgeBaseFileBundle.create(kwargs['devid'], kwargs['aiid'])
-        return bundle.delete(filename=kwargs['filename'])
+        return bundle.delete_files(filename=kwargs['filename'])
 
 
 def file_size_validator(file):
@@ -900,10 +921,7 @@ class KnowledgeBaseUploadFileForm(forms.Form):
         
         bundle = KnowledgeBaseFileBundle.create(kwargs['devid'], kwargs['aiid'])
         # count how many files we'll end up, considering any files being replaced
-        existing_files = bundle.scan_folder()
-        resulting = set()
-        for f in existing_files:
-            resulting.add(f.name)
+        resulting = bundle.file_names() | {f.name for f in uploaded_files}
         if len(uploaded_files) > settings.KB_MAX_NUM_FILES or len(resulting) > settings.KB_MAX_NUM_FILES:
             self.add_error('kbfiles', ValidationError(
                 _('You cannot exceed the maximum number of files ({num_files})').format(num_files=settings.KB_MAX_NUM_FILES),
@@ -0,0 +1,289 @@
+"""
+Preprocessing and keyword search of Knowledge Base files.
+
+Content of a file is decoded, normalised, split in passages and tokenized
+once per SHA-256, the analysis is cached next to the blob store so only new
+content is processed. An inverted index of every bot is built from analyses
+of its files whenever they change. Postings are arrays of passage numbers,
+stored with a small header in a single binary file per bot.
+"""
+import array
+import bisect
+import codecs
+import collections
+import json
+import os
+import re
+import struct
+import sys
+import threading
+import unicodedata
+
+from django.conf import settings
+
+from studio import knowledge_base
+
+# Directory of analyses and indexes in KB_BASE_DIR
+INDEX_DIR = '.index'
+
+MAGIC = b'KBI1'
+
+# Paragraphs longer than this many tokens are split on line breaks
+PASSAGE_MAX_TOKENS = 200
+
+TOKEN = re.compile(r'\w+')
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+
+# Number of indexes of bots kept loaded per process
+INDEX_CACHE_SIZE = 32
+
+_indexes = collections.OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_analysis_path(sha256):
+    return os.path.join(
+        settings.KB_BASE_DIR, INDEX_DIR, 'blobs', sha256[:2], '{}.json'.format(sha256)
+    )
+
+
+def get_index_path(devid, aiid):
+    return os.path.join(settings.KB_BASE_DIR, INDEX_DIR, devid, '{}.idx'.format(aiid))
+
+
+def decode(content):
+    """Returns text of a file and the encoding it was written in"""
+
+    if content.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return content.decode('utf-16'), 'utf-16'
+
+    for encoding, name in [('utf-8-sig', 'utf-8'), ('cp1252', 'cp1252')]:
+        try:
+            return content.decode(encoding), name
+        except UnicodeDecodeError:
+            pass
+
+    return content.decode('latin-1'), 'latin-1'
+
+
+def normalise(text):
+    return unicodedata.normalize('NFC', text.replace('\r\n', '\n').replace('\r', '\n'))
+
+
+def tokenize(text):
+    return [token.casefold() for token in TOKEN.findall(text)]
+
+
+def split_passages(text):
+    """Splits text in paragraphs, long paragraphs in groups of lines"""
+
+    passages = []
+
+    for paragraph in PARAGRAPH_BREAK.split(text):
+        lines, tokens = [], 0
+
+        for line in paragraph.strip().split('\n'):
+            count = len(tokenize(line))
+
+            if lines and tokens + count > PASSAGE_MAX_TOKENS:
+                passages.append('\n'.join(lines))
+                lines, tokens = [], 0
+
+            lines.append(line)
+            tokens += count
+
+        if any(line.strip() for line in lines):
+            passages.append('\n'.join(lines))
+
+    return passages
+
+
+def analyse(content):
+    """Encoding, passages, sorted distinct terms of every passage and token count"""
+
+    text, encoding = decode(content)
+    passages = split_passages(normalise(text))
+    tokens = [tokenize(passage) for passage in passages]
+
+    return {
+        'encoding': encoding,
+        'passages': passages,
+        'terms': [sorted(set(passage_tokens)) for passage_tokens in tokens],
+        'tokens': sum(len(passage_tokens) for passage_tokens in tokens),
+    }
+
+
+def get_analysis(sha256, path):
+    """Returns analysis of content, analyses the file at `path` the first time"""
+
+    analysis_path = get_analysis_path(sha256)
+
+    try:
+        with open(analysis_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        pass
+
+    with open(path, 'rb') as f:
+        analysis = analyse(f.read())
+
+    os.makedirs(os.path.dirname(analysis_path), exist_ok=True)
+    knowledge_base.write_atomic([json.dumps(analysis).encode()], analysis_path)
+
+    return analysis
+
+
+def remove_analysis(sha256):
+    try:
+        os.remove(get_analysis_path(sha256))
+    except FileNotFoundError:
+        pass
+
+
+def to_little_endian(numbers):
+    if sys.byteorder == 'big':
+        numbers = array.array(numbers.typecode, numbers)
+        numbers.byteswap()
+    return numbers
+
+
+class Index(object):
+    """
+    Inverted index of passages of files. Passages are numbered across files,
+    postings of a term are a slice of a single array of passage numbers.
+    """
+
+    def __init__(self, files, starts, terms, postings):
+        # Names and hashes of files, and the number of their first passage
+        self.files = files
+        self.starts = starts
+
+        # Offset and length of postings of every term
+        self.terms = terms
+        self.postings = postings
+
+    @classmethod
+    def build(cls, files, analyses):
+        postings_by_term = collections.defaultdict(lambda: array.array('I'))
+        starts = array.array('I')
+        start = 0
+
+        for analysis in analyses:
+            starts.append(start)
+
+            for number, terms in enumerate(analysis['terms'], start):
+                for term in terms:
+                    postings_by_term[term].append(number)
+
+            start += len(analysis['terms'])
+
+        terms = {}
+        postings = array.array('I')
+
+        for term in sorted(postings_by_term):
+            terms[term] = (len(postings), len(postings_by_term[term]))
+            postings.extend(postings_by_term[term])
+
+        return cls(files, starts, terms, postings)
+
+    def to_bytes(self):
+        header = json.dumps({
+            'files': self.files,
+            'starts': self.starts.tolist(),
+            'terms': self.terms,
+        }).encode()
+
+        return MAGIC + struct.pack('<I', len(header)) + header + \
+            to_little_endian(self.postings).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError('Not a Knowledge Base index')
+
+        offset = len(MAGIC) + 4
+        length, = struct.unpack('<I', data[len(MAGIC):offset])
+        header = json.loads(data[offset:offset + length].decode())
+
+        postings = array.array('I')
+        postings.frombytes(data[offset + length:])
+
+        return cls(
+            [tuple(file) for file in header['files']],
+            array.array('I', header['starts']),
+            {term: tuple(posting) for term, posting in header['terms'].items()},
+            to_little_endian(postings)
+        )
+
+    def lookup(self, term):
+        offset, length = self.terms.get(term, (0, 0))
+        return self.postings[offset:offset + length]
+
+    def search(self, query, limit=20):
+        """
+        Passages with every term of the query, as (name, sha256, passage)
+        tuples in order of files and passages
+        """
+
+        terms = set(tokenize(query))
+
+        if not terms:
+            return []
+
+        postings = sorted((self.lookup(term) for term in terms), key=len)
+        matches = set(postings[0])
+
+        for other in postings[1:]:
+            matches.intersection_update(other)
+
+        results = []
+
+        for number in sorted(matches)[:limit]:
+            position = bisect.bisect_right(self.starts, number) - 1
+            name, sha256 = self.files[position]
+            results.append((name, sha256, number - self.starts[position]))
+
+        return results
+
+
+def save(devid, aiid, index):
+    path = get_index_path(devid, aiid)
+
+    if index is None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    knowledge_base.write_atomic([index.to_bytes()], path)
+
+
+def load(devid, aiid):
+    """Returns index of a bot, `None` if it has none, loaded indexes are cached"""
+
+    path = get_index_path(devid, aiid)
+
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    with _indexes_lock:
+        cached = _indexes.get(path)
+
+        if cached is not None and cached[0] == mtime:
+            _indexes.move_to_end(path)
+            return cached[1]
+
+    with open(path, 'rb') as f:
+        index = Index.from_bytes(f.read())
+
+    with _indexes_lock:
+        _indexes[path] = (mtime, index)
+
+        while len(_indexes) > INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+
+    return index
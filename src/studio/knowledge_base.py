@@ -0,0 +1,177 @@
+"""
+Storage of Knowledge Base files on disk, see `studio.models`.
+
+Content is stored once in a blob store in `KB_BASE_DIR`, keyed by its SHA-256,
+files of bots are hard links to blobs. Bots sharing a corpus, e.g. clones,
+share disk space, and readers of bot directories see regular files. Links of
+a blob share its mtime, upload times are kept in the catalogue.
+
+Files are written to a temporary file next to their destination and renamed
+over it once complete, readers see either the previous or the new content,
+never a partial one. Uploads of several files are written concurrently by a
+bounded, process-wide pool of threads.
+"""
+import contextlib
+import hashlib
+import os
+import tempfile
+import threading
+import uuid
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+# Size of chunks files are read in to be hashed, in bytes
+HASH_CHUNK_SIZE = 64 * 1024
+
+# Files are readable by processes serving the KB, as they were before
+FILE_MODE = 0o644
+
+# Directory of blobs in KB_BASE_DIR, hidden from listings of developers
+BLOBS_DIR = '.blobs'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Returns executor writing files, creates it on first use"""
+
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.KB_UPLOAD_WORKERS,
+                    thread_name_prefix='kb-upload'
+                )
+
+    return _executor
+
+
+def hash_chunks(chunks):
+    """SHA-256 of content in chunks, as a hex string"""
+
+    digest = hashlib.sha256()
+
+    for chunk in chunks:
+        digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def hash_file(path):
+    with open(path, 'rb') as f:
+        return hash_chunks(iter(lambda: f.read(HASH_CHUNK_SIZE), b''))
+
+
+def write_atomic(chunks, destination):
+    """Writes chunks to a temporary file, hidden from listings, and renames it"""
+
+    directory, filename = os.path.split(destination)
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix='.{}.'.format(filename))
+
+    try:
+        with os.fdopen(descriptor, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.chmod(temporary, FILE_MODE)
+        os.replace(temporary, destination)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temporary)
+        raise
+
+
+def get_blob_path(sha256):
+    return os.path.join(settings.KB_BASE_DIR, BLOBS_DIR, sha256[:2], sha256)
+
+
+def link_atomic(source, destination):
+    """Hard links a file at destination, replacing any file there"""
+
+    directory, filename = os.path.split(destination)
+    temporary = os.path.join(directory, '.{}.{}'.format(filename, uuid.uuid4().hex))
+
+    os.link(source, temporary)
+
+    try:
+        os.replace(temporary, destination)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temporary)
+        raise
+
+
+def adopt(path, sha256):
+    """
+    Moves content of a file written outside of the blob store into it, the
+    file becomes a link to its blob
+    """
+
+    blob = get_blob_path(sha256)
+
+    if not os.path.exists(blob):
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        link_atomic(path, blob)
+    elif not os.path.samefile(path, blob):
+        link_atomic(blob, path)
+
+
+def is_linked(path, sha256):
+    """Whether a file is a link to the blob of its content"""
+
+    try:
+        return os.path.samefile(path, get_blob_path(sha256))
+    except FileNotFoundError:
+        return False
+
+
+def store(uploaded_file, destination, stored_digest=None):
+    """
+    Writes an uploaded file straight from its chunks to its blob, unless the
+    blob exists. Returns hash of the file, or `None` if the stored copy has
+    the same content.
+    """
+
+    digest = hash_chunks(uploaded_file.chunks())
+
+    if digest == stored_digest and os.path.exists(destination):
+        return None
+
+    blob = get_blob_path(digest)
+
+    if not os.path.exists(blob):
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        write_atomic(uploaded_file.chunks(), blob)
+
+    return digest
+
+
+def place(uploaded_file, sha256, destination):
+    """
+    Links the blob of an uploaded file at destination, once a reference to
+    the blob is held. The blob is written again if it was removed since
+    `store`. Links share the mtime of their blob, it's set to now so readers
+    watching mtimes see the change.
+    """
+
+    blob = get_blob_path(sha256)
+
+    if not os.path.exists(blob):
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        write_atomic(uploaded_file.chunks(), blob)
+
+    link_atomic(blob, destination)
+    os.utime(destination)
+
+
+def remove_blob(sha256):
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(get_blob_path(sha256))
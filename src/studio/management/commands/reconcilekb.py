@@ -0,0 +1,110 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from studio import kb_index, knowledge_base
+from studio.models import KnowledgeBaseBlob, KnowledgeBaseFileBundle
+
+# Age of blobs missing from the catalogue after which they are removed, in seconds
+ORPHAN_AGE = 24 * 60 * 60
+
+
+class Command(BaseCommand):
+    help = (
+        'Repairs the Knowledge Base file catalogue and blob references against files in '
+        'KB_BASE_DIR'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true', help='Report differences without repairing them'
+        )
+
+    def get_bundles(self):
+        """Bundles in the catalogue and bundles with a directory on disk"""
+
+        bundles = {
+            (bundle.devid, bundle.aiid): bundle
+            for bundle in KnowledgeBaseFileBundle.objects.all()
+        }
+
+        if os.path.isdir(settings.KB_BASE_DIR):
+            for devid in sorted(os.listdir(settings.KB_BASE_DIR)):
+                path = os.path.join(settings.KB_BASE_DIR, devid)
+
+                if devid.startswith('.') or not os.path.isdir(path):
+                    continue
+
+                for aiid in sorted(os.listdir(path)):
+                    if (devid, aiid) not in bundles and os.path.isdir(os.path.join(path, aiid)):
+                        bundles[devid, aiid] = KnowledgeBaseFileBundle(devid=devid, aiid=aiid)
+
+        return [bundles[key] for key in sorted(bundles)]
+
+    def handle(self, *args, dry_run=False, **options):
+        changes, failures = 0, 0
+
+        for bundle in self.get_bundles():
+            try:
+                added, updated, removed = bundle.reconcile(dry_run=dry_run)
+            except OSError as e:
+                # One unreadable bundle doesn't stop the others from being repaired
+                self.stderr.write('{devid}/{aiid} failed: {error}'.format(
+                    devid=bundle.devid, aiid=bundle.aiid, error=e
+                ))
+                failures += 1
+                continue
+
+            for label, names in [('added', added), ('updated', updated), ('removed', removed)]:
+                for name in names:
+                    self.stdout.write('{devid}/{aiid}/{name} {label}'.format(
+                        devid=bundle.devid, aiid=bundle.aiid, name=name, label=label
+                    ))
+
+            changes += len(added) + len(updated) + len(removed)
+
+            # Bundles catalogued before files were indexed
+            index_path = kb_index.get_index_path(bundle.devid, bundle.aiid)
+            if not dry_run and bundle.pk and not os.path.exists(index_path):
+                bundle.index()
+
+        if not dry_run:
+            with transaction.atomic():
+                changes += KnowledgeBaseBlob.recount()
+                changes += KnowledgeBaseBlob.collect()
+
+            changes += self.remove_orphans()
+
+        self.stdout.write(self.style.SUCCESS('{changes} difference(s) {state}'.format(
+            changes=changes, state='found' if dry_run else 'repaired'
+        )))
+
+        if failures:
+            raise CommandError('{failures} bundle(s) could not be reconciled'.format(
+                failures=failures
+            ))
+
+    def remove_orphans(self):
+        """
+        Removes blobs on disk missing from the catalogue, left by interrupted
+        uploads, recent ones may belong to an upload in progress
+        """
+
+        removed = 0
+        path = os.path.join(settings.KB_BASE_DIR, knowledge_base.BLOBS_DIR)
+        known = set(KnowledgeBaseBlob.objects.values_list('sha256', flat=True))
+        expired = time.time() - ORPHAN_AGE
+
+        for root, dirs, files in os.walk(path):
+            for sha256 in files:
+                blob = os.path.join(root, sha256)
+
+                if sha256 not in known and os.stat(blob).st_mtime < expired:
+                    self.stdout.write('{blob} removed'.format(blob=blob))
+                    os.remove(blob)
+                    removed += 1
+
+        return removed
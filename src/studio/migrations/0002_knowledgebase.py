@@ -0,0 +1,47 @@
+# Generated by Django 2.1.3 on 2026-10-18 20:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('studio', '0001_templates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KnowledgeBaseFile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=128)),
+                ('size', models.IntegerField()),
+                ('last_update', models.IntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='KnowledgeBaseFileBundle',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('devid', models.CharField(max_length=50)),
+                ('aiid', models.CharField(max_length=50)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='knowledgebasefilebundle',
+            unique_together={('devid', 'aiid')},
+        ),
+        migrations.AddField(
+            model_name='knowledgebasefile',
+            name='bundle',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='files', to='studio.KnowledgeBaseFileBundle'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='knowledgebasefile',
+            unique_together={('bundle', 'name')},
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.1.3 on 2026-10-18 20:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('studio', '0002_knowledgebase'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KnowledgeBaseBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('size', models.IntegerField()),
+                ('references', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.1.3 on 2026-10-18 20:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('studio', '0003_knowledgebaseblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='knowledgebaseblob',
+            name='encoding',
+            field=models.CharField(blank=True, max_length=16),
+        ),
+        migrations.AddField(
+            model_name='knowledgebaseblob',
+            name='passages',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='knowledgebaseblob',
+            name='tokens',
+            field=models.IntegerField(null=True),
+        ),
+    ]
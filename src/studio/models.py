@@ -1,39 +1,28 @@
 import os
 import logging
-import datetime
+import time
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 
-logger = logging.getLogger(__name__)
-
-
-class KnowledgeBaseFile(models.Model):
-    path = models.CharField(max_length=4096)
-    name = models.CharField(max_length=128)
-    size = models.IntegerField()
-    last_update = models.IntegerField()
-
-    @classmethod
-    def create(cls, path, name, size, last_update):
-        file = cls(path=path, name=name, size=size, last_update=last_update)
-        return file
-
-    def delete(self):
-        if self.path and os.path.exists(self.path):
-            try:
-                logger.warn('removing file ' + self.path)
-                os.remove(self.path)
-                return True
-            except OSError as e:
-                logger.error('Could not remove file', extra = {'filename': self.path, 'error': e})
+from studio import kb_index, knowledge_base
 
-        return False
+logger = logging.getLogger(__name__)
 
 
 class KnowledgeBaseFileBundle(models.Model):
+    """
+    Knowledge Base files of an AI. Files are kept in `KB_BASE_DIR`, they are
+    listed in a catalogue so pages and quota checks don't scan the directory.
+    A bundle is reconciled with its directory when it's first catalogued, the
+    `reconcilekb` command repairs the catalogue if it drifts later. Files are
+    indexed for keyword search whenever they change, see `studio.kb_index`.
+    """
     devid = models.CharField(max_length=50)
     aiid = models.CharField(max_length=50)
-    files = []
+
+    class Meta:
+        unique_together = ('devid', 'aiid')
 
     def _ensure_path_exists(self, path):
         if not os.path.exists(path):
@@ -48,45 +37,332 @@ class KnowledgeBaseFileBundle(models.Model):
 
     @classmethod
     def create(cls, devid, aiid):
-        bundle = cls(devid=devid, aiid=aiid)
+        """
+        Returns bundle of an AI, a bundle new to the catalogue picks up files
+        already on disk, e.g. uploaded before the catalogue existed
+        """
+        bundle, created = cls.objects.get_or_create(devid=devid, aiid=aiid)
+        if created and os.path.isdir(bundle.basepath):
+            try:
+                bundle.reconcile()
+            except OSError as e:
+                logger.error('Could not reconcile files', extra={'aiid': aiid, 'error': e})
         return bundle
 
+    def list_files(self):
+        """Files in the catalogue, by name"""
+        return list(self.files.order_by('name'))
+
+    def file_names(self):
+        return set(self.files.values_list('name', flat=True))
 
     def scan_folder(self):
+        """Files on disk, with no hashes, they aren't saved in the catalogue"""
         path = self.basepath
-        self._ensure_path_exists(path)
-        self.files = []
+        files = []
+        if not os.path.isdir(path):
+            return files
         with os.scandir(path) as it:
             for entry in it:
-                if entry.is_file() and not entry.is_dir() and not entry.name.startswith('.'):
+                if entry.is_file() and not entry.name.startswith('.'):
                     stat = entry.stat()
-                    file = KnowledgeBaseFile.create(
-                        path = '{}/{}'.format(self.basepath, entry.name),
-                        name = entry.name, 
-                        size = stat.st_size, 
-                        last_update = stat.st_mtime
-                    )
-                    self.files.append(file)
+                    files.append(KnowledgeBaseFile(
+                        bundle=self,
+                        name=entry.name,
+                        size=stat.st_size,
+                        last_update=int(stat.st_mtime)
+                    ))
 
-        return self.files
+        return files
 
-    def delete(self, filename=None):
-        self.scan_folder()
-        for file in self.files:
-            if filename is None or file.name==filename:
-                result = file.delete()
-                if not result:
-                    return False
-        return True   
+    def delete_files(self, filename=None):
+        """Removes a file, or all of them, from disk and the catalogue"""
+        files = self.files.all()
+        if filename is not None:
+            files = files.filter(name=filename)
+        success = True
+        for file in files:
+            if not file.delete():
+                success = False
+                break
+        self.index()
+        return success
 
     def upload(self, uploaded_files):
-        for uploaded_file in uploaded_files:
-            destination = '{basepath}/{devid}/{aiid}/{filename}'.format(
-                basepath=settings.KB_BASE_DIR,
-                devid=self.devid,
-                aiid=self.aiid,
-                filename=uploaded_file.name)
-            with open(destination, 'wb+') as f_dest:
-                for chunk in uploaded_file.chunks():
-                    f_dest.write(chunk)
-        return True         
+        """
+        Writes uploaded files concurrently, each of them atomically, files with
+        the same content as the stored copy are skipped. Returns `False` if any
+        of them couldn't be written, the others are kept.
+        """
+        self._ensure_path_exists(self.basepath)
+        stored = dict(self.files.values_list('name', 'sha256'))
+        executor = knowledge_base.get_executor()
+        writes = [
+            (uploaded_file, executor.submit(
+                knowledge_base.store,
+                uploaded_file,
+                '{}/{}'.format(self.basepath, uploaded_file.name),
+                stored.get(uploaded_file.name)
+            ))
+            for uploaded_file in uploaded_files
+        ]
+        success, changed = True, False
+        with transaction.atomic():
+            for uploaded_file, write in writes:
+                try:
+                    sha256 = write.result()
+                    if sha256 is not None:
+                        with transaction.atomic():
+                            self._record(
+                                uploaded_file.name, uploaded_file.size, int(time.time()), sha256
+                            )
+                            knowledge_base.place(
+                                uploaded_file,
+                                sha256,
+                                '{}/{}'.format(self.basepath, uploaded_file.name)
+                            )
+                        changed = True
+                except OSError as e:
+                    logger.error(
+                        'Could not write file', extra={'file_name': uploaded_file.name, 'error': e}
+                    )
+                    success = False
+        if changed:
+            self.index()
+        return success
+
+    def _record(self, name, size, last_update, sha256):
+        """
+        Saves a file in the catalogue, blob references follow. A new blob is
+        locked until committed, the file is linked to it after this.
+        """
+        file, created = KnowledgeBaseFile.objects.select_for_update().get_or_create(
+            bundle=self,
+            name=name,
+            defaults={'size': size, 'last_update': last_update, 'sha256': sha256}
+        )
+        if created:
+            KnowledgeBaseBlob.acquire(sha256, size)
+            return file
+        if file.sha256 != sha256:
+            KnowledgeBaseBlob.acquire(sha256, size)
+            KnowledgeBaseBlob.release(file.sha256)
+        file.size, file.last_update, file.sha256 = size, last_update, sha256
+        file.save()
+        return file
+
+    def copy_to(self, devid, aiid):
+        """Copies files to another bundle, they share blobs so no content is copied"""
+        bundle = self.create(devid, aiid)
+        bundle._ensure_path_exists(bundle.basepath)
+        with transaction.atomic():
+            for file in self.files.all():
+                bundle._record(file.name, file.size, file.last_update, file.sha256)
+                knowledge_base.adopt(file.path, file.sha256)
+                knowledge_base.link_atomic(
+                    knowledge_base.get_blob_path(file.sha256),
+                    '{}/{}'.format(bundle.basepath, file.name)
+                )
+        bundle.index()
+        return bundle
+
+    def reconcile(self, dry_run=False):
+        """
+        Brings the catalogue in line with files on disk, files are hashed
+        only if they changed and moved to the blob store, returns names added,
+        updated and removed. A file is unchanged while it's a link to the blob
+        of its content, with the same size, link mtimes are those of blobs.
+        """
+        catalogue = {file.name: file for file in self.files.all()} if self.pk else {}
+        on_disk = {file.name: file for file in self.scan_folder()}
+
+        added = sorted(set(on_disk) - set(catalogue))
+        removed = sorted(set(catalogue) - set(on_disk))
+        stored = set(KnowledgeBaseBlob.objects.filter(
+            sha256__in=[file.sha256 for file in catalogue.values()]
+        ).values_list('sha256', flat=True))
+        updated = sorted(
+            name for name in set(on_disk) & set(catalogue)
+            if on_disk[name].size != catalogue[name].size or
+            catalogue[name].sha256 not in stored or
+            not knowledge_base.is_linked(on_disk[name].path, catalogue[name].sha256)
+        )
+
+        if not dry_run:
+            with transaction.atomic():
+                if self.pk is None:
+                    self.save()
+                for name in added + updated:
+                    file = on_disk[name]
+                    sha256 = knowledge_base.hash_file(file.path)
+                    self._record(name, file.size, file.last_update, sha256)
+                    knowledge_base.adopt(file.path, sha256)
+                for file in self.files.filter(name__in=removed):
+                    file.delete()
+            if added or updated or removed:
+                self.index()
+
+        return added, updated, removed
+
+    def index(self):
+        """
+        Rebuilds the keyword index of files, only content not analysed yet is
+        read. Returns `False` if it couldn't, search then serves the previous one.
+        """
+        files = self.list_files()
+        try:
+            analyses = [kb_index.get_analysis(file.sha256, file.path) for file in files]
+        except OSError as e:
+            logger.error('Could not analyse files', extra={'aiid': self.aiid, 'error': e})
+            return False
+        for file, analysis in zip(files, analyses):
+            KnowledgeBaseBlob.objects.filter(sha256=file.sha256, tokens__isnull=True).update(
+                encoding=analysis['encoding'],
+                passages=len(analysis['passages']),
+                tokens=analysis['tokens']
+            )
+        index = kb_index.Index.build(
+            [(file.name, file.sha256) for file in files], analyses
+        ) if files else None
+        try:
+            kb_index.save(self.devid, self.aiid, index)
+        except OSError as e:
+            logger.error('Could not save index', extra={'aiid': self.aiid, 'error': e})
+            return False
+        return True
+
+    def search(self, query, limit=20):
+        """Passages of files with every keyword of the query, as (name, text) tuples"""
+        index = kb_index.load(self.devid, self.aiid)
+        if index is None:
+            return []
+        results = []
+        # Analysis of a content is read once, however many of its passages match
+        analyses = {}
+        for name, sha256, passage in index.search(query, limit):
+            if sha256 not in analyses:
+                try:
+                    analyses[sha256] = kb_index.get_analysis(
+                        sha256, knowledge_base.get_blob_path(sha256)
+                    )
+                except OSError:
+                    # Content removed since the index was read
+                    analyses[sha256] = None
+            if analyses[sha256] is not None:
+                results.append((name, analyses[sha256]['passages'][passage]))
+        return results
+
+
+class KnowledgeBaseBlob(models.Model):
+    """
+    Content of Knowledge Base files, stored once by its SHA-256 however many
+    files use it, it's removed when the last of them is
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    size = models.IntegerField()
+    references = models.IntegerField(default=0)
+
+    # Statistics of the content, empty until it's analysed
+    encoding = models.CharField(max_length=16, blank=True)
+    passages = models.IntegerField(null=True)
+    tokens = models.IntegerField(null=True)
+
+    @property
+    def path(self):
+        return knowledge_base.get_blob_path(self.sha256)
+
+    @classmethod
+    def acquire(cls, sha256, size):
+        """
+        Adds a reference, the blob is locked until committed so it isn't
+        removed while a file is linked to it
+        """
+        cls.objects.select_for_update().get_or_create(sha256=sha256, defaults={'size': size})
+        cls.objects.filter(sha256=sha256).update(references=F('references') + 1)
+
+    @classmethod
+    def release(cls, sha256):
+        """Drops a reference, unreferenced blobs are removed once committed"""
+        cls.objects.filter(sha256=sha256).update(references=F('references') - 1)
+        cls.collect(cls.objects.filter(sha256=sha256))
+
+    @classmethod
+    def collect(cls, blobs=None):
+        """Removes unreferenced blobs once committed, returns their number"""
+        blobs = cls.objects.all() if blobs is None else blobs
+        unreferenced = list(blobs.filter(references__lte=0).values_list('sha256', flat=True))
+        if unreferenced:
+            transaction.on_commit(lambda: cls.remove(unreferenced))
+        return len(unreferenced)
+
+    @classmethod
+    def remove(cls, unreferenced):
+        """
+        Removes blobs from disk and the catalogue, unless they were acquired
+        since they were collected
+        """
+        for sha256 in unreferenced:
+            try:
+                with transaction.atomic():
+                    blobs = cls.objects.select_for_update().filter(
+                        sha256=sha256, references__lte=0
+                    )
+                    if blobs.exists():
+                        blobs.delete()
+                        knowledge_base.remove_blob(sha256)
+                        kb_index.remove_analysis(sha256)
+            except OSError as e:
+                logger.error('Could not remove blob', extra={'sha256': sha256, 'error': e})
+
+    @classmethod
+    def recount(cls):
+        """Recomputes references from the catalogue, returns blobs corrected"""
+        counts = dict(
+            KnowledgeBaseFile.objects.values_list('sha256').annotate(count=models.Count('id'))
+        )
+        corrected = 0
+        for blob in cls.objects.select_for_update():
+            if blob.references != counts.get(blob.sha256, 0):
+                blob.references = counts.get(blob.sha256, 0)
+                blob.save(update_fields=['references'])
+                corrected += 1
+        return corrected
+
+
+class KnowledgeBaseFile(models.Model):
+    bundle = models.ForeignKey(
+        KnowledgeBaseFileBundle, on_delete=models.CASCADE, related_name='files'
+    )
+    name = models.CharField(max_length=128)
+    size = models.IntegerField()
+    last_update = models.IntegerField()
+    sha256 = models.CharField(max_length=64)
+
+    class Meta:
+        unique_together = ('bundle', 'name')
+
+    @property
+    def path(self):
+        return '{}/{}'.format(self.bundle.basepath, self.name)
+
+    def delete(self):
+        """
+        Removes the file from disk and the catalogue, the file stays in the
+        catalogue if it can't be removed
+        """
+        path = self.path
+        try:
+            with transaction.atomic():
+                super(KnowledgeBaseFile, self).delete()
+                KnowledgeBaseBlob.release(self.sha256)
+                logger.warning('removing file ' + path)
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    # Already gone, the catalogue was out of date
+                    pass
+        except OSError as e:
+            logger.error('Could not remove file', extra={'path': path, 'error': e})
+            return False
+
+        return True
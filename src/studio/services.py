@@ -2,52 +2,94 @@ import logging
 import urllib
 
 from constance import config
+from django.core.cache import cache
+
+from app import fragments, response_cache
 from app.services import fetch_api
 
 logger = logging.getLogger(__name__)
 
+# Bot data and details are polled by every open studio tab
+CACHED_AI_RESOURCES = ('ai', 'ai_details')
+
+
+def cached_ai(name, token, aiid, fetch):
+    """
+    Cache bot resources per developer token and bot, versioned as fragments
+    of the bot so refreshes started before a write are discarded
+    """
+    return response_cache.get_or_fetch(
+        response_cache.make_key('studio.' + name, token, aiid),
+        fetch,
+        ttl=config.AI_CACHE_TTL,
+        stale_ttl=config.AI_CACHE_STALE_TTL,
+        version_key=fragments.AI_VERSION_KEY.format(aiid=aiid)
+    )
+
+
+def invalidate_ai(token, aiid):
+    """Drop cached bot resources and fragments rendered with them after a write"""
+    cache.delete_many([
+        response_cache.make_key('studio.' + name, token, aiid)
+        for name in CACHED_AI_RESOURCES
+    ])
+    fragments.bump(aiid)
+
 
 def delete_ai(token, aiid):
     """Deletes a particular AI"""
-    return fetch_api(
-        '/ai/{aiid}',
-        token=token,
-        aiid=aiid,
-        method='delete',
-        timeout=config.API_LONG_POLLING
-    )
+    try:
+        return fetch_api(
+            '/ai/{aiid}',
+            token=token,
+            aiid=aiid,
+            method='delete',
+            timeout=config.API_LONG_POLLING
+        )
+    finally:
+        invalidate_ai(token, aiid)
 
 
 def delete_entity(token, aiid, entity_name):
     """Delete an entity"""
-    return fetch_api(
-        '/entity/{aiid}?entity_name={entity_name}',
-        aiid=aiid,
-        token=token,
-        entity_name=entity_name,
-        method='delete'
-    )
+    try:
+        return fetch_api(
+            '/entity/{aiid}?entity_name={entity_name}',
+            aiid=aiid,
+            token=token,
+            entity_name=entity_name,
+            method='delete'
+        )
+    finally:
+        invalidate_ai(token, aiid)
 
 
 def delete_intent(token, aiid, intent_name):
     """Delete an Intent"""
-    return fetch_api(
-        '/intent/{aiid}?intent_name={intent_name}',
-        token=token,
-        aiid=aiid,
-        intent_name=intent_name,
-        method='delete'
-    )
+    try:
+        return fetch_api(
+            '/intent/{aiid}?intent_name={intent_name}',
+            token=token,
+            aiid=aiid,
+            intent_name=intent_name,
+            method='delete'
+        )
+    finally:
+        invalidate_ai(token, aiid)
 
 
 def get_ai(token, aiid):
     """Returns a particular AI data"""
-    return fetch_api('/ui/ai/{aiid}', token=token, aiid=aiid)
+    return cached_ai('ai', token, aiid, lambda: fetch_api(
+        '/ui/ai/{aiid}', token=token, aiid=aiid
+    ))
 
 
 def get_ai_details(token, aiid):
     """Returns a particular AI detailed data"""
-    return fetch_api('/ui/ai/{aiid}/details', token=token, aiid=aiid)
+    return cached_ai('ai_details', token, aiid, lambda: fetch_api(
+        '/ui/ai/{aiid}/details', token=token, aiid=aiid
+    ))
 
 
 def get_ai_export(token, aiid):
@@ -152,7 +194,7 @@ def get_insights_chatlogs(token, aiid, fromDate, toDate):
         fromDate=fromDate,
         toDate=toDate,
         timeout=config.API_LOGS_TIMEOUT,
-        raw=True
+        stream=True
     )
 
 
@@ -166,13 +208,16 @@ def post_ai(token, ai_data, aiid=''):
         'locale': 'en-US'
     }
 
-    return fetch_api(
-        '/ai/{aiid}',
-        token=token,
-        aiid=aiid,
-        method='post',
-        data={**ai_default, **ai_data}
-    )
+    try:
+        return fetch_api(
+            '/ai/{aiid}',
+            token=token,
+            aiid=aiid,
+            method='post',
+            data={**ai_default, **ai_data}
+        )
+    finally:
+        invalidate_ai(token, aiid)
 
 
 def post_clone_ai(token, ai_data, aiid=''):
@@ -198,50 +243,66 @@ def post_clone_ai(token, ai_data, aiid=''):
     )
 
 
+def get_import_body(ai_data):
+    """An uploaded export is sent as it is, without being decoded again"""
+    if hasattr(ai_data, 'read'):
+        return {'data': ai_data, 'headers': {'Content-type': 'application/json'}}
+    return {'json': ai_data}
+
+
 def post_import_ai(token, ai_data, aiid=''):
     """Creates a new AI instance based on provided JSON file"""
     return fetch_api(
         '/ai/import',
         token=token,
         method='post',
-        json=ai_data,
-        timeout=config.API_LONG_POLLING
+        timeout=config.API_LONG_POLLING,
+        **get_import_body(ai_data)
     )
 
 
 def post_re_import_ai(token, ai_data, aiid=''):
     """Updates an AI instance based on provided JSON file"""
-    return fetch_api(
-        '/ai/{aiid}/import',
-        token=token,
-        aiid=aiid,
-        method='post',
-        json=ai_data,
-        timeout=config.API_LONG_POLLING
-    )
+    try:
+        return fetch_api(
+            '/ai/{aiid}/import',
+            token=token,
+            aiid=aiid,
+            method='post',
+            timeout=config.API_LONG_POLLING,
+            **get_import_body(ai_data)
+        )
+    finally:
+        invalidate_ai(token, aiid)
 
 
 def post_ai_skill(token, aiid, skills_data):
     """Updates skills linked with an AI"""
-    return fetch_api(
-        '/ai/{aiid}/bots?bot_list={bot_list}',
-        token=token,
-        aiid=aiid,
-        bot_list=','.join(skills_data['skills']),
-        method='post',
-        headers={'Content-type': 'application/json'},
-    )
+    try:
+        return fetch_api(
+            '/ai/{aiid}/bots?bot_list={bot_list}',
+            token=token,
+            aiid=aiid,
+            bot_list=','.join(skills_data['skills']),
+            method='post',
+            headers={'Content-type': 'application/json'},
+        )
+    finally:
+        invalidate_ai(token, aiid)
 
 
 def post_training(token, aiid, training_file):
     """Updates bot Training file"""
-    return fetch_api(
-        '/ai/{aiid}/training?source_type=0',
-        token=token,
-        aiid=aiid,
-        files={'file': training_file},
-        method='post'
-    )
+    try:
+        return fetch_api(
+            '/ai/{aiid}/training?source_type=0',
+            token=token,
+            aiid=aiid,
+            files={'file': training_file},
+            method='post'
+        )
+    finally:
+        invalidate_ai(token, aiid)
 
 
 def post_regenerate_webhook_secret(token, aiid):
@@ -256,36 +317,45 @@ def post_regenerate_webhook_secret(token, aiid):
 
 def post_entity(payload, token, aiid, **kwargs):
     """Create an entity for an AI"""
-    return fetch_api(
-        '/entity/{aiid}?entity_name={entity_name}',
-        token=token,
-        aiid=aiid,
-        entity_name=payload.get('entity_name'),
-        json=payload,
-        method='post'
-    )
+    try:
+        return fetch_api(
+            '/entity/{aiid}?entity_name={entity_name}',
+            token=token,
+            aiid=aiid,
+            entity_name=payload.get('entity_name'),
+            json=payload,
+            method='post'
+        )
+    finally:
+        invalidate_ai(token, aiid)
 
 
 def post_intent(payload, token, aiid):
     """Create or update an Intent"""
-    return fetch_api(
-        '/intent/{aiid}',
-        token=token,
-        aiid=aiid,
-        json=payload,
-        method='post'
-    )
+    try:
+        return fetch_api(
+            '/intent/{aiid}',
+            token=token,
+            aiid=aiid,
+            json=payload,
+            method='post'
+        )
+    finally:
+        invalidate_ai(token, aiid)
 
 
 def post_intent_bulk(token, aiid, intents_file):
     """Save bulk intents in CSV format"""
-    return fetch_api(
-        '/intents/{aiid}/csv',
-        token=token,
-        aiid=aiid,
-        files={'file': intents_file},
-        method='post'
-    )
+    try:
+        return fetch_api(
+            '/intents/{aiid}/csv',
+            token=token,
+            aiid=aiid,
+            files={'file': intents_file},
+            method='post'
+        )
+    finally:
+        invalidate_ai(token, aiid)
 
 
 def post_chat(token, aiid, payload):
@@ -295,7 +365,8 @@ def post_chat(token, aiid, payload):
         token=token,
         aiid=aiid,
         params=payload,
-        timeout=config.API_CHAT_TIMEOUT
+        timeout=config.API_CHAT_TIMEOUT,
+        memoize=False
     )
 
 
@@ -351,44 +422,56 @@ def post_context_reset(token, aiid, chatId):
 
 def put_entity(payload, entity_name, token, aiid):
     """Updates an entity"""
-    return fetch_api(
-        '/entity/{aiid}?entity_name={entity_name}',
-        token=token,
-        aiid=aiid,
-        json=payload,
-        entity_name=entity_name,
-        method='put'
-    )
+    try:
+        return fetch_api(
+            '/entity/{aiid}?entity_name={entity_name}',
+            token=token,
+            aiid=aiid,
+            json=payload,
+            entity_name=entity_name,
+            method='put'
+        )
+    finally:
+        invalidate_ai(token, aiid)
 
 
 def put_intent(payload, intent_name, token, aiid):
     """Updates an Intent"""
-    return fetch_api(
-        '/intent/{aiid}/{intent_name}',
-        token=token,
-        aiid=aiid,
-        json=payload,
-        intent_name=intent_name,
-        method='put'
-    )
+    try:
+        return fetch_api(
+            '/intent/{aiid}/{intent_name}',
+            token=token,
+            aiid=aiid,
+            json=payload,
+            intent_name=intent_name,
+            method='put'
+        )
+    finally:
+        invalidate_ai(token, aiid)
 
 
 def put_training_update(token, aiid):
     """Update AI training"""
-    return fetch_api(
-        '/ai/{aiid}/training/update',
-        token=token,
-        aiid=aiid,
-        method='put',
-        timeout=config.API_LONG_POLLING
-    )
+    try:
+        return fetch_api(
+            '/ai/{aiid}/training/update',
+            token=token,
+            aiid=aiid,
+            method='put',
+            timeout=config.API_LONG_POLLING
+        )
+    finally:
+        invalidate_ai(token, aiid)
 
 
 def put_training_start(token, aiid):
     """Start an AI training"""
-    return fetch_api(
-        '/ai/{aiid}/training/start', token=token, aiid=aiid, method='put'
-    )
+    try:
+        return fetch_api(
+            '/ai/{aiid}/training/start', token=token, aiid=aiid, method='put'
+        )
+    finally:
+        invalidate_ai(token, aiid)
 
 
 def put_facebook_action(token, aiid, params):
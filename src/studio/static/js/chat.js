@@ -21,6 +21,9 @@ const URLS = {
   },
   'studio:chat': {
     path: (aiid) => `/proxy/ai/${ aiid }/chat`
+  },
+  'studio:chat.transcript': {
+    path: (aiid) => `/proxy/ai/${ aiid }/chat/transcript`
   }
 }
 
@@ -76,8 +79,12 @@ if ('speechSynthesis' in window) {
   }
 }
 
-// Read the chat history
-loadHistory();
+// Read the chat history, after a reload it's restored from the server
+if (HISTORY.length) {
+  loadHistory();
+} else {
+  restoreHistory();
+}
 
 /**
  * Preparers data for chat message from provided error response
@@ -173,6 +180,38 @@ function updateHistory(caller, data) {
   sessionStorage.setItem(HISTORY_KEY, JSON.stringify(HISTORY));
 }
 
+/**
+ * Restores chat history and chat id from the session transcript kept by the
+ * server, so the chat continues where it was
+ *
+ * @return {undefined}
+ */
+function restoreHistory() {
+  fetch(url('studio:chat.transcript', AI.id), {
+    credentials: 'same-origin'
+  })
+    .then(resolveStatus)
+    .then(response => response.json())
+    .then(({ transcript }) => {
+      transcript.forEach(exchange => {
+        var response = exchange.response;
+        HISTORY.push(['USER', [USER.name, exchange.q, exchange.timestamp, 'normal']]);
+        HISTORY.push(['BOT', [
+          AI.name,
+          response.result.answer || EMPTY_CHAT_MESSAGE,
+          exchange.timestamp,
+          setLevel(response),
+          response.result.score,
+          response
+        ]]);
+        sessionStorage.setItem(CHAT_ID_KEY, response.chatId);
+      });
+      sessionStorage.setItem(HISTORY_KEY, JSON.stringify(HISTORY));
+      loadHistory();
+    })
+    .catch(error => console.warn('Chat history couldn’t be restored', error));
+}
+
 /**
  * Clear chat history
  *
@@ -182,6 +221,13 @@ function clearHistory() {
   HISTORY.splice(0, HISTORY.length);
   sessionStorage.removeItem(HISTORY_KEY);
   sessionStorage.removeItem(CHAT_ID_KEY);
+  fetch(url('studio:chat.transcript', AI.id), {
+    credentials: 'same-origin',
+    method: 'delete',
+    headers: {
+      'X-CSRFToken': Cookies.get('csrftoken')
+    }
+  });
   document.getElementById('CHAT_MESSAGES').innerHTML = '';
   document.getElementById('CONTEXT_RESET_ACTION').click();
 }
@@ -290,28 +336,28 @@ function renderIntent(intent) {
   return `<a href="${ url('studio:intent', AI.id, intent.name) }" data-toggle="tooltip" title="Edit ${ intent.name }"><i class="fa fa-sitemap"></i></a>`;
 }
 
-function requestAnswerAI(message) {
+/**
+ * Displays messages levels, based on incomming response, if the message text
+ * is missing we use a custom level empty. By default returns level `normal`
+ *
+ * @param {object} response   Incomming response from the API
+ * @return {string}           Message level
+ */
+function setLevel(response) {
 
-  console.debug(message);
+  if (!response.result.answer) {
+    return 'empty';
+  } else if (response.result.chatTarget !== 'ai') {
+    return 'warning';
+  } else {
+    return 'normal';
+  }
 
-  /**
-   * Displays messages levels, based on incomming response, if the message text
-   * is missing we use a custom level empty. By default returns level `normal`
-   *
-   * @param {object} response   Incomming response from the API
-   * @return {string}           Message level
-   */
-  function setLevel(response) {
-
-    if (!response.result.answer) {
-      return 'empty';
-    } else if (response.result.chatTarget !== 'ai') {
-      return 'warning';
-    } else {
-      return 'normal';
-    }
+}
 
-  }
+function requestAnswerAI(message) {
+
+  console.debug(message);
 
   fetch(url('studio:chat', AI.id), {
     credentials: 'same-origin',
@@ -6,11 +6,44 @@ const ICONS = {
   'error': 'fa-exclamation-circle'
 };
 
-// Initial poll
-var timeoutID = setTimeout(pollStatus, INTERVAL);
+var timeoutID;
+var source;
 
 var was_training = false;
 
+// Status changes are pushed by the server while the AI is training, a stream
+// holds a server thread so it's only open then, status is polled otherwise
+watchStatus(AI.training);
+
+/**
+ * Streams status while the AI is training, polls it otherwise
+ *
+ * @param  {string} status AI training status
+ *
+ * @return {undefined}
+ */
+function watchStatus(status) {
+  if (window.EventSource && status === 'training') {
+    streamStatus();
+  } else {
+    timeoutID = setTimeout(pollStatus, INTERVAL);
+  }
+}
+
+/**
+ * Stops status updates
+ *
+ * @return {undefined}
+ */
+function stopUpdates() {
+  clearTimeout(timeoutID);
+
+  if (source) {
+    source.close();
+    source = undefined;
+  }
+}
+
 /**
  * Updates HTML
  *
@@ -25,9 +58,15 @@ function updateUI(ai) {
   AI_TRAINING.title = `Training status: ${ ai.training.status }`;
   $(AI_TRAINING).tooltip('update');
 
+  // Switch between the stream and polling when training starts or ends
+  if (window.EventSource && (ai.training.status === 'training') !== Boolean(source)) {
+    stopUpdates();
+    watchStatus(ai.training.status);
+  }
+
   if(ai.training.status === 'error') {
     MESSAGES.innerHTML = messageCreate('error', ai.training.message);
-    clearTimeout(timeoutID);
+    stopUpdates();
   }
 
   if (ai.training.status === 'training') {
@@ -78,3 +117,20 @@ function pollStatus() {
     .then(updateUI)
     .catch(error => console.error(error));
 }
+
+/**
+ * Subscribes to AI status changes, browser reconnects a closed stream until
+ * training ends
+ *
+ * @return {undefined}
+ */
+function streamStatus() {
+  source = new EventSource(`/proxy/ai/${ AI.id }/training/stream`);
+  source.onmessage = function (event) {
+    const ai = JSON.parse(event.data);
+
+    if (ai.training) {
+      updateUI(ai);
+    }
+  };
+}
@@ -0,0 +1,163 @@
+"""
+Server-Sent Events stream of AI training status.
+
+Every open studio tab used to poll the AI status on its own. Now a single
+poller thread per developer and AI fetches the status and fans every change
+out to all the tabs subscribed in a worker, pollers in different workers share
+upstream responses through the `get_ai` cache.
+"""
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.template import loader
+
+from studio.services import get_ai
+
+logger = logging.getLogger(__name__)
+
+
+def get_status(token, aiid):
+    """Returns AI data as served by the AI proxy"""
+
+    ai = get_ai(token, aiid)
+
+    if ai.get('training', {}).get('status') == 'error':
+        template = loader.get_template('messages/retrain_error.html')
+        ai['training']['message'] = template.render({'aiid': aiid})
+
+    return ai
+
+
+class StatusPoller(object):
+    """Polls status of an AI while anybody is subscribed to it"""
+
+    def __init__(self, token, aiid):
+        self.token = token
+        self.aiid = aiid
+        self.subscribers = 0
+        self.version = 0
+        self.payload = None
+        self.condition = threading.Condition()
+
+    def start(self):
+        thread = threading.Thread(
+            target=self.run,
+            name='training-poller-{aiid}'.format(aiid=self.aiid),
+            daemon=True
+        )
+        thread.start()
+
+    def poll(self):
+        """Fetch status, notify subscribers only if it has changed"""
+
+        try:
+            payload = json.dumps(get_status(self.token, self.aiid), sort_keys=True)
+        except Exception as error:
+            logger.warning('Failed to poll AI %s status: %s', self.aiid, error)
+            return
+
+        with self.condition:
+            if payload != self.payload:
+                self.payload = payload
+                self.version += 1
+                self.condition.notify_all()
+
+    def run(self):
+        while hub.is_subscribed(self):
+            self.poll()
+            time.sleep(settings.TRAINING_STREAM_INTERVAL)
+
+    def wait(self, version, timeout):
+        """
+        Returns payload and version newer than `version`, or `None` and the
+        same version if nothing has changed within `timeout` seconds
+        """
+
+        with self.condition:
+            self.condition.wait_for(lambda: self.version > version, timeout)
+
+            if self.version > version:
+                return self.payload, self.version
+
+        return None, version
+
+
+class PollerHub(object):
+    """Process-wide registry of pollers, one per developer and AI"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pollers = {}
+
+    def subscribe(self, token, aiid):
+        with self._lock:
+            poller = self._pollers.get((token, aiid))
+
+            if poller is None:
+                poller = self._pollers[(token, aiid)] = StatusPoller(token, aiid)
+                poller.start()
+
+            poller.subscribers += 1
+
+        return poller
+
+    def unsubscribe(self, poller):
+        with self._lock:
+            poller.subscribers -= 1
+
+            if poller.subscribers <= 0:
+                self._pollers.pop((poller.token, poller.aiid), None)
+
+    def is_subscribed(self, poller):
+        with self._lock:
+            return self._pollers.get((poller.token, poller.aiid)) is poller
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pollers)
+
+
+hub = PollerHub()
+
+
+def is_training(payload):
+    return json.loads(payload).get('training', {}).get('status') == 'training'
+
+
+def training_events(token, aiid):
+    """
+    Yields Server-Sent Events with AI status each time it changes. Studio
+    pages only subscribe while an AI is training, a stream ends once a status
+    other than training is sent. It's closed after `TRAINING_STREAM_DURATION`
+    seconds anyway, browsers reconnect on their own, so a worker thread is
+    never held for too long.
+    """
+
+    poller = hub.subscribe(token, aiid)
+    deadline = time.monotonic() + settings.TRAINING_STREAM_DURATION
+    version = 0
+
+    try:
+        yield 'retry: {retry:d}\n\n'.format(
+            retry=int(settings.TRAINING_STREAM_INTERVAL * 1000)
+        )
+
+        while time.monotonic() < deadline:
+            payload, version = poller.wait(
+                version,
+                timeout=min(settings.TRAINING_STREAM_HEARTBEAT, deadline - time.monotonic())
+            )
+
+            if payload is None:
+                # Comments keep proxies from closing an idle connection
+                yield ': heartbeat\n\n'
+            else:
+                yield 'data: {payload}\n\n'.format(payload=payload)
+
+                if not is_training(payload):
+                    return
+    finally:
+        hub.unsubscribe(poller)
@@ -3,6 +3,8 @@ import datetime
 from django import template
 from django.template.defaultfilters import stringfilter
 
+from users import groups
+
 register = template.Library()
 
 
@@ -19,4 +21,4 @@ def to_date(date_string, format):
 @register.filter(name='has_group')
 def has_group(user, group_name):
     """Check if user is member of a group"""
-    return user.groups.filter(name=group_name).exists()
+    return groups.has_group(user, group_name)
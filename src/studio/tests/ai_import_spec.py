@@ -0,0 +1,134 @@
+import json
+
+import factory
+
+from test_plus.test import TestCase
+
+from studio import ai_import
+from studio.tests.factories import AIImportJSON
+
+
+def split(content, size=3):
+    """Bytes in chunks small enough to cut tokens and characters"""
+
+    content = content.encode() if isinstance(content, str) else content
+    return [content[start:start + size] for start in range(0, len(content), size)]
+
+
+class TestReader(TestCase):
+
+    def test_decode(self):
+        """Values are decoded across chunks"""
+
+        reader = ai_import.Reader(split('[{"a": -1.5e2, "b": "Café \\u00e9\\ud83d\\ude00"}, 12]'))
+
+        reader.peek()
+        reader.advance()
+        self.assertEqual(reader.decode(), {'a': -150.0, 'b': 'Café é\U0001F600'})
+
+        reader.peek()
+        reader.advance()
+        reader.peek()
+        self.assertEqual(reader.decode(), 12)
+
+    def test_skip_string(self):
+        """Strings are read up to their end without being decoded"""
+
+        for content, empty in [('"",', True), ('"a\\"\\u00e9",', False), ('"\\n",', False)]:
+            with self.subTest(content=content):
+                reader = ai_import.Reader(split(content, size=1))
+
+                reader.peek()
+                reader.advance()
+
+                self.assertEqual(reader.skip_string(), empty)
+                self.assertEqual(reader.peek(), ',')
+
+    def test_long_string(self):
+        """Text of a long string isn't kept"""
+
+        reader = ai_import.Reader(split('"{}"'.format('a' * 10000), size=100))
+
+        reader.peek()
+        reader.advance()
+        reader.skip_string()
+
+        self.assertLess(len(reader.buffer), 200)
+
+
+class TestSyntax(TestCase):
+
+    def test_invalid(self):
+        """Errors name the path of the value at fault"""
+
+        for content, message in [
+            ('', "$: Expecting value"),
+            ('{"intents": [{"intent_name": "a"},]}', "$.intents[1]: Expecting value"),
+            ('{"intents": [{"a": 1 "b": 2}]}', "$.intents[0]: Expecting ',' delimiter"),
+            ('{"name": "a" "b"}', "$.name: Expecting ',' delimiter"),
+            ('{"name": "a",}', "$: Expecting property name enclosed in double quotes"),
+            ('{"name" "a"}', "$.name: Expecting ':' delimiter"),
+            ('{"name": "a\\x"}', "$.name: Invalid \\escape"),
+            ('{"name": "a', "$.name: Unterminated string"),
+            ('{"name": "a"} []', "$: Extra data"),
+            ('{"name": "a", "isPrivate": tru}', "$.isPrivate: Expecting value"),
+            ('{"name": "a", "my key": [nul]}', '$["my key"]: Expecting value'),
+        ]:
+            with self.subTest(content=content):
+                with self.assertRaises(ai_import.ExportError) as context:
+                    ai_import.validate(split(content))
+
+                self.assertEqual(str(context.exception), message)
+
+    def test_invalid_utf8(self):
+        """Text that isn't UTF-8 is refused where it's read"""
+
+        with self.assertRaises(ai_import.ExportError) as context:
+            ai_import.validate(split(b'{"name": "a", "description": "\xff"}'))
+
+        self.assertEqual(context.exception.message, 'Invalid UTF-8')
+
+
+class TestValidate(TestCase):
+
+    def validate(self, **kwargs):
+        data = factory.build(dict, FACTORY_CLASS=AIImportJSON, **kwargs)
+        ai_import.validate(split(json.dumps(data), size=16))
+
+    def test_valid(self):
+        """Exports matching the schema are valid, unknown properties are ignored"""
+
+        self.validate(
+            intents=[{'intent_name': 'hello', 'responses': ['Hi'], 'conditions_in': [{}]}],
+            entities=[{'entity_name': 'colours', 'entity_values': ['red']}],
+            description=None,
+            extra={'anything': [1]}
+        )
+
+    def test_invalid(self):
+        """Values not matching the schema are reported by path"""
+
+        for kwargs, message in [
+            ({'name': ''}, '$.name: Must not be empty'),
+            ({'name': None}, '$.name: Expected a string, found null'),
+            ({'intents': {}}, '$.intents: Expected an array, found an object'),
+            ({'intents': [{'intent_name': 'a'}, {}]}, "$.intents[1]: Missing 'intent_name'"),
+            ({'intents': [{'intent_name': 'a', 'user_says': ['a', 2]}]},
+             '$.intents[0].user_says[1]: Expected a string, found a number'),
+            ({'entities': [{'entity_name': 1}]},
+             '$.entities[0].entity_name: Expected a string, found a number'),
+            ({'trainingFile': ['a']}, '$.trainingFile: Expected a string, found an array'),
+        ]:
+            with self.subTest(kwargs=kwargs):
+                with self.assertRaises(ai_import.ExportError) as context:
+                    self.validate(**kwargs)
+
+                self.assertEqual(str(context.exception), message)
+
+    def test_missing_name(self):
+        """Exports have a name"""
+
+        with self.assertRaises(ai_import.ExportError) as context:
+            ai_import.validate([b'{"intents": []}'])
+
+        self.assertEqual(str(context.exception), "$: Missing 'name'")
@@ -45,6 +45,32 @@ class TestImportAIForm(TestCase):
             'All fields submitted, form is valid'
         )
 
+    def test_invalid_export(self):
+        """Errors in the export are reported with their path"""
+
+        self.form = ImportAIForm({}, {
+            'ai_data': SimpleUploadedFile('ai.json', b'{"name": "Bot", "intents": [{}]}')
+        })
+
+        self.assertFalse(self.form.is_valid())
+        self.assertEqual(
+            self.form.errors['ai_data'],
+            ["Invalid JSON file, $.intents[0]: Missing 'intent_name'"]
+        )
+
+    @patch('studio.forms.post_import_ai')
+    def test_upload_forwarded(self, mock_post_import_ai):
+        """The uploaded file is sent as it is, from its start"""
+
+        content = json.dumps(factory.build(dict, FACTORY_CLASS=AIImportJSON)).encode()
+        self.form = ImportAIForm({}, {'ai_data': SimpleUploadedFile('ai.json', content)})
+
+        self.assertTrue(self.form.is_valid())
+        self.form.save(token='token')
+
+        ai_data = mock_post_import_ai.call_args[1]['ai_data']
+        self.assertEqual(ai_data.read(), content)
+
     def test_missing_file(self):
         """
         A valid form should have a JSON file
@@ -0,0 +1,72 @@
+from test_plus.test import TestCase
+
+from studio import kb_index
+
+
+class TestPreprocessing(TestCase):
+
+    def test_decode(self):
+        """Text is decoded from the encoding it was written in"""
+
+        self.assertEqual(kb_index.decode('café'.encode('utf-8')), ('café', 'utf-8'))
+        self.assertEqual(kb_index.decode('﻿café'.encode('utf-8')), ('café', 'utf-8'))
+        self.assertEqual(kb_index.decode('café'.encode('utf-16')), ('café', 'utf-16'))
+        self.assertEqual(kb_index.decode('café €5'.encode('cp1252')), ('café €5', 'cp1252'))
+
+    def test_analyse(self):
+        """Text is normalised and split in passages on blank lines"""
+
+        analysis = kb_index.analyse(
+            'Opening hours\r\nMonday to Friday\r\n\r\n  \r\nCafé opens at 9'.encode()
+        )
+
+        self.assertEqual(analysis['passages'], [
+            'Opening hours\nMonday to Friday', 'Café opens at 9'
+        ])
+        self.assertEqual(analysis['terms'][1], ['9', 'at', 'café', 'opens'])
+        self.assertEqual(analysis['tokens'], 9)
+
+    def test_long_paragraph(self):
+        """Long paragraphs are split on line breaks"""
+
+        line = ' '.join(['word'] * 150)
+
+        self.assertEqual(kb_index.split_passages('\n'.join([line] * 3)), [line] * 3)
+
+
+class TestIndex(TestCase):
+
+    def setUp(self):
+        self.index = kb_index.Index.build(
+            [('faq.txt', 'a' * 64), ('about.txt', 'b' * 64)],
+            [
+                kb_index.analyse(b'Opening hours\n\nDelivery is free\n\nFree returns'),
+                kb_index.analyse(b'We deliver for free on Sundays'),
+            ]
+        )
+
+    def test_search(self):
+        """Passages with every keyword are found, in order of files"""
+
+        self.assertEqual(self.index.search('FREE'), [
+            ('faq.txt', 'a' * 64, 1), ('faq.txt', 'a' * 64, 2), ('about.txt', 'b' * 64, 0)
+        ])
+        self.assertEqual(self.index.search('free returns'), [('faq.txt', 'a' * 64, 2)])
+        self.assertEqual(self.index.search('free unknown'), [])
+        self.assertEqual(self.index.search('free', limit=1), [('faq.txt', 'a' * 64, 1)])
+        self.assertEqual(self.index.search('  '), [])
+
+    def test_serialization(self):
+        """Index reads back from its binary form"""
+
+        index = kb_index.Index.from_bytes(self.index.to_bytes())
+
+        self.assertEqual(index.files, self.index.files)
+        self.assertEqual(index.postings, self.index.postings)
+        self.assertEqual(index.search('free'), self.index.search('free'))
+
+    def test_invalid(self):
+        """Files that aren't indexes are refused"""
+
+        with self.assertRaises(ValueError):
+            kb_index.Index.from_bytes(b'question')
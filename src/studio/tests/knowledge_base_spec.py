@@ -0,0 +1,45 @@
+import os
+import shutil
+import tempfile
+
+from test_plus.test import TestCase
+
+from studio import knowledge_base
+
+
+class TestWriteAtomic(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'faq.txt')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self):
+        with open(self.path) as f:
+            return f.read()
+
+    def test_write(self):
+        """File is replaced with the new content"""
+
+        knowledge_base.write_atomic([b'first'], self.path)
+        knowledge_base.write_atomic([b'second ', b'version'], self.path)
+
+        self.assertEqual(self.read(), 'second version')
+        self.assertEqual(os.listdir(self.directory), ['faq.txt'])
+
+    def test_partial_write(self):
+        """Partially written content is never visible"""
+
+        def chunks():
+            yield b'partial'
+            raise OSError('Connection reset')
+
+        knowledge_base.write_atomic([b'first'], self.path)
+
+        with self.assertRaises(OSError):
+            knowledge_base.write_atomic(chunks(), self.path)
+
+        self.assertEqual(self.read(), 'first')
+        self.assertEqual(os.listdir(self.directory), ['faq.txt'])
@@ -0,0 +1,382 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from test_plus.test import TestCase
+
+from studio import kb_index, knowledge_base
+from studio.forms import CloneAIForm, KnowledgeBaseUploadFileForm
+from studio.models import KnowledgeBaseBlob, KnowledgeBaseFileBundle
+
+
+def inode(path):
+    return os.stat(path).st_ino
+
+
+class TestKnowledgeBaseFileBundle(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.settings = override_settings(KB_BASE_DIR=self.directory, KB_MAX_NUM_FILES=2)
+        self.settings.enable()
+
+        self.bundle = KnowledgeBaseFileBundle.create('devid', 'aiid')
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.directory)
+
+    def upload(self, *files):
+        return self.bundle.upload([
+            SimpleUploadedFile(name, content.encode(), content_type='text/plain')
+            for name, content in files
+        ])
+
+    def test_upload(self):
+        """Uploaded files are listed from the catalogue"""
+
+        self.upload(('faq.txt', 'question'), ('about.txt', 'answer'))
+
+        files = self.bundle.list_files()
+
+        self.assertEqual([file.name for file in files], ['about.txt', 'faq.txt'])
+        self.assertEqual(files[1].size, len('question'))
+        self.assertEqual(files[1].sha256, hashlib.sha256(b'question').hexdigest())
+        self.assertTrue(os.path.exists(files[1].path))
+
+    def test_same_content(self):
+        """Files with the same content as the stored copy aren't written again"""
+
+        self.upload(('faq.txt', 'question'), ('about.txt', 'answer'))
+        faq, about = [os.stat(os.path.join(self.bundle.basepath, name)).st_ino
+                      for name in ['faq.txt', 'about.txt']]
+
+        self.upload(('faq.txt', 'question'), ('about.txt', 'new answer'))
+
+        self.assertEqual(os.stat(os.path.join(self.bundle.basepath, 'faq.txt')).st_ino, faq)
+        self.assertNotEqual(os.stat(os.path.join(self.bundle.basepath, 'about.txt')).st_ino, about)
+        self.assertEqual(
+            self.bundle.files.get(name='about.txt').sha256,
+            hashlib.sha256(b'new answer').hexdigest()
+        )
+
+    def test_failed_write(self):
+        """Files written are kept when another file fails"""
+
+        broken = SimpleUploadedFile('broken.txt', b'content', content_type='text/plain')
+        broken.chunks = MagicMock(side_effect=OSError('No space left on device'))
+
+        with self.assertLogs('studio.models', 'ERROR'):
+            self.assertFalse(self.bundle.upload([
+                SimpleUploadedFile('faq.txt', b'question', content_type='text/plain'),
+                broken
+            ]))
+
+        self.assertEqual(self.bundle.file_names(), {'faq.txt'})
+
+    def test_shared_content(self):
+        """Content of files is stored once"""
+
+        self.upload(('faq.txt', 'question'))
+        other = KnowledgeBaseFileBundle.create('devid', 'other')
+        other.upload([SimpleUploadedFile('copy.txt', b'question', content_type='text/plain')])
+
+        blob = KnowledgeBaseBlob.objects.get()
+
+        self.assertEqual(blob.references, 2)
+        self.assertEqual(inode(blob.path), inode(self.bundle.files.get().path))
+        self.assertEqual(inode(blob.path), inode(other.files.get().path))
+
+    def test_references(self):
+        """Blobs are dropped with the last file using them"""
+
+        self.upload(('faq.txt', 'question'), ('copy.txt', 'question'), ('about.txt', 'answer'))
+        self.upload(('about.txt', 'new answer'))
+
+        self.assertEqual(
+            dict(KnowledgeBaseBlob.objects.filter(references__gt=0).values_list(
+                'sha256', 'references'
+            )),
+            {
+                hashlib.sha256(b'question').hexdigest(): 2,
+                hashlib.sha256(b'new answer').hexdigest(): 1,
+            }
+        )
+
+        self.bundle.delete_files('faq.txt')
+        self.assertEqual(KnowledgeBaseBlob.objects.get(
+            sha256=hashlib.sha256(b'question').hexdigest()
+        ).references, 1)
+
+        # Removed once committed
+        self.bundle.delete_files('copy.txt')
+        self.assertEqual(KnowledgeBaseBlob.objects.get(
+            sha256=hashlib.sha256(b'question').hexdigest()
+        ).references, 0)
+
+    @patch('studio.models.time.time')
+    def test_last_update(self, mock_time):
+        """Files are updated at upload time, whenever their content was first stored"""
+
+        mock_time.return_value = 1000
+        other = KnowledgeBaseFileBundle.create('devid', 'other')
+        other.upload([SimpleUploadedFile('faq.txt', b'question', content_type='text/plain')])
+
+        mock_time.return_value = 2000
+        self.upload(('faq.txt', 'question'))
+
+        self.assertEqual(self.bundle.files.get().last_update, 2000)
+        self.assertEqual(other.files.get().last_update, 1000)
+
+    def test_copy(self):
+        """Copies of a bundle share content"""
+
+        self.upload(('faq.txt', 'question'))
+
+        copy = self.bundle.copy_to('devid', 'clone')
+
+        self.assertEqual(copy.file_names(), {'faq.txt'})
+        self.assertEqual(KnowledgeBaseBlob.objects.get().references, 2)
+        self.assertEqual(inode(copy.files.get().path), inode(self.bundle.files.get().path))
+
+    @patch('studio.forms.post_clone_ai')
+    def test_clone(self, mock_post_clone_ai):
+        """Knowledge Base of a bot is copied to its clones"""
+
+        self.upload(('faq.txt', 'question'))
+        mock_post_clone_ai.return_value = {'status': {'code': 201}, 'aiid': 'clone'}
+
+        form = CloneAIForm()
+        form.cleaned_data = {}
+        form.save(token='token', aiid='aiid', devid='devid')
+
+        self.assertEqual(
+            KnowledgeBaseFileBundle.objects.get(aiid='clone').file_names(), {'faq.txt'}
+        )
+
+    def test_adopt(self):
+        """Files written outside of the blob store are moved into it"""
+
+        os.makedirs(self.bundle.basepath)
+        for name in ['faq.txt', 'copy.txt']:
+            with open(os.path.join(self.bundle.basepath, name), 'w') as f:
+                f.write('question')
+
+        self.bundle.reconcile()
+
+        blob = KnowledgeBaseBlob.objects.get()
+
+        self.assertEqual(blob.references, 2)
+        self.assertEqual(inode(os.path.join(self.bundle.basepath, 'faq.txt')), inode(blob.path))
+        self.assertEqual(inode(os.path.join(self.bundle.basepath, 'copy.txt')), inode(blob.path))
+
+    def test_quota(self):
+        """Files replaced don't count towards the maximum number of files"""
+
+        self.upload(('faq.txt', 'question'), ('about.txt', 'answer'))
+
+        for name, saved in [('faq.txt', True), ('new.txt', False)]:
+            uploaded = SimpleUploadedFile(name, b'new', content_type='text/plain')
+            form = KnowledgeBaseUploadFileForm({}, {'kbfiles': uploaded})
+
+            self.assertTrue(form.is_valid())
+            self.assertEqual(
+                form.save(devid='devid', aiid='aiid', uploaded_files=[uploaded]), saved
+            )
+
+    def test_delete(self):
+        """Files are removed from disk and the catalogue"""
+
+        self.upload(('faq.txt', 'question'), ('about.txt', 'answer'))
+        path = os.path.join(self.bundle.basepath, 'faq.txt')
+
+        self.assertTrue(self.bundle.delete_files('faq.txt'))
+
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(self.bundle.file_names(), {'about.txt'})
+
+    def test_search(self):
+        """Passages of files are searched by keyword, and stats kept by content"""
+
+        self.upload(('faq.txt', 'Opening hours\n\nDelivery is free'), ('about.txt', 'Free'))
+
+        self.assertEqual(self.bundle.search('free'), [
+            ('about.txt', 'Free'), ('faq.txt', 'Delivery is free')
+        ])
+
+        blob = KnowledgeBaseBlob.objects.get(
+            sha256=hashlib.sha256(b'Opening hours\n\nDelivery is free').hexdigest()
+        )
+        self.assertEqual((blob.encoding, blob.passages, blob.tokens), ('utf-8', 2, 5))
+
+        self.bundle.delete_files('about.txt')
+
+        self.assertEqual(self.bundle.search('free'), [('faq.txt', 'Delivery is free')])
+
+    def test_search_reads_once(self):
+        """Analysis of a file is read once per search, however many passages match"""
+
+        self.upload(('faq.txt', 'Free delivery\n\nFree returns\n\nFree gifts'))
+
+        with patch('studio.kb_index.get_analysis', wraps=kb_index.get_analysis) as mock:
+            self.assertEqual(len(self.bundle.search('free')), 3)
+
+        self.assertEqual(mock.call_count, 1)
+
+    @patch('studio.kb_index.analyse', wraps=kb_index.analyse)
+    def test_incremental(self, mock_analyse):
+        """Only content not analysed before is read again"""
+
+        self.upload(('faq.txt', 'question'), ('about.txt', 'answer'))
+        self.upload(('faq.txt', 'question'), ('about.txt', 'new answer'))
+
+        self.assertEqual(mock_analyse.call_count, 3)
+        self.assertEqual(self.bundle.search('answer'), [('about.txt', 'new answer')])
+
+    def test_reconcile(self):
+        """Catalogue is repaired against files on disk"""
+
+        self.upload(('faq.txt', 'question'), ('about.txt', 'answer'))
+
+        os.remove(os.path.join(self.bundle.basepath, 'about.txt'))
+        with open(os.path.join(self.bundle.basepath, 'faq.txt'), 'w') as f:
+            f.write('a longer question')
+        with open(os.path.join(self.bundle.basepath, 'new.txt'), 'w') as f:
+            f.write('new')
+
+        self.assertEqual(
+            self.bundle.reconcile(dry_run=True), (['new.txt'], ['faq.txt'], ['about.txt'])
+        )
+        self.assertEqual(self.bundle.file_names(), {'about.txt', 'faq.txt'})
+
+        self.bundle.reconcile()
+
+        self.assertEqual(self.bundle.file_names(), {'faq.txt', 'new.txt'})
+        self.assertEqual(
+            self.bundle.files.get(name='faq.txt').sha256,
+            hashlib.sha256(b'a longer question').hexdigest()
+        )
+        self.assertEqual(self.bundle.reconcile(), ([], [], []))
+
+    def test_first_use(self):
+        """Files on disk before a bundle is catalogued are picked up"""
+
+        os.makedirs(os.path.join(self.directory, 'devid', 'legacy'))
+        with open(os.path.join(self.directory, 'devid', 'legacy', 'faq.txt'), 'w') as f:
+            f.write('question')
+
+        bundle = KnowledgeBaseFileBundle.create('devid', 'legacy')
+
+        self.assertEqual(bundle.file_names(), {'faq.txt'})
+        self.assertEqual(bundle.search('question'), [('faq.txt', 'question')])
+
+    def test_command(self):
+        """Directories missing from the catalogue are added"""
+
+        os.makedirs(os.path.join(self.directory, 'other', 'bot'))
+        with open(os.path.join(self.directory, 'other', 'bot', 'faq.txt'), 'w') as f:
+            f.write('question')
+
+        output = StringIO()
+        call_command('reconcilekb', stdout=output)
+
+        self.assertIn('other/bot/faq.txt added', output.getvalue())
+        self.assertEqual(
+            KnowledgeBaseFileBundle.objects.get(devid='other', aiid='bot').file_names(),
+            {'faq.txt'}
+        )
+
+    def test_command_failure(self):
+        """A bundle failing to reconcile doesn't stop the others"""
+
+        for devid in ['broken', 'other']:
+            os.makedirs(os.path.join(self.directory, devid, 'bot'))
+            with open(os.path.join(self.directory, devid, 'bot', 'faq.txt'), 'w') as f:
+                f.write('question')
+
+        reconcile = KnowledgeBaseFileBundle.reconcile
+
+        def fail_broken(bundle, dry_run=False):
+            if bundle.devid == 'broken':
+                raise OSError('Input/output error')
+            return reconcile(bundle, dry_run=dry_run)
+
+        output, errors = StringIO(), StringIO()
+
+        with patch.object(KnowledgeBaseFileBundle, 'reconcile', fail_broken), \
+                self.assertRaises(CommandError):
+            call_command('reconcilekb', stdout=output, stderr=errors)
+
+        self.assertIn('broken/bot failed: Input/output error', errors.getvalue())
+        self.assertIn('other/bot/faq.txt added', output.getvalue())
+
+
+class TestKnowledgeBaseBlob(TransactionTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.settings = override_settings(KB_BASE_DIR=self.directory)
+        self.settings.enable()
+
+        self.bundle = KnowledgeBaseFileBundle.create('devid', 'aiid')
+        self.bundle.upload([SimpleUploadedFile('faq.txt', b'question')])
+        self.path = knowledge_base.get_blob_path(hashlib.sha256(b'question').hexdigest())
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.directory)
+
+    def test_removed(self):
+        """Unreferenced blobs are removed from disk once committed"""
+
+        self.assertTrue(os.path.exists(self.path))
+
+        self.bundle.delete_files('faq.txt')
+
+        self.assertFalse(os.path.exists(self.path))
+        self.assertFalse(KnowledgeBaseBlob.objects.exists())
+
+    def test_acquired(self):
+        """Blobs acquired again before they are removed are kept"""
+
+        sha256 = hashlib.sha256(b'question').hexdigest()
+        KnowledgeBaseBlob.objects.update(references=0)
+
+        with transaction.atomic():
+            KnowledgeBaseBlob.acquire(sha256, len('question'))
+
+        KnowledgeBaseBlob.remove([sha256])
+
+        self.assertEqual(KnowledgeBaseBlob.objects.get().references, 1)
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_restored(self):
+        """Blobs removed while content is uploaded again are restored"""
+
+        os.remove(self.path)
+        other = KnowledgeBaseFileBundle.create('devid', 'other')
+        other.upload([SimpleUploadedFile('faq.txt', b'question')])
+
+        self.assertTrue(os.path.exists(self.path))
+        self.assertEqual(inode(other.files.get().path), inode(self.path))
+
+    def test_command(self):
+        """References are recounted and orphans are collected"""
+
+        KnowledgeBaseBlob.objects.update(references=5)
+        call_command('reconcilekb', stdout=StringIO())
+        self.assertEqual(KnowledgeBaseBlob.objects.get().references, 1)
+
+        os.remove(os.path.join(self.bundle.basepath, 'faq.txt'))
+        self.bundle.files.all().delete()
+        call_command('reconcilekb', stdout=StringIO())
+        self.assertFalse(KnowledgeBaseBlob.objects.exists())
+        self.assertFalse(os.path.exists(self.path))
@@ -1,9 +1,17 @@
 import factory
 
 from unittest.mock import patch
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
 from test_plus.test import TestCase
 
-from studio.services import get_ai_list, post_import_ai
+from studio.services import (
+    get_ai,
+    get_ai_details,
+    get_ai_list,
+    post_import_ai,
+    put_training_start
+)
 from studio.tests.factories import (
     AiFactory,
     AIImportJSON,
@@ -135,3 +143,60 @@ class TestImportAI(TestCase):
             response['status']['info'],
             'A bot with that name already exists'
         )
+
+    @patch('studio.services.fetch_api')
+    @patch('studio.services.config')
+    def test_import_upload(self, mock_config, mock_get):
+        """An uploaded export is sent as the body, without being decoded"""
+
+        mock_get.return_value = self.created
+        ai_data = SimpleUploadedFile('ai.json', b'{"name": "Bot"}')
+
+        post_import_ai(self.token, ai_data)
+
+        self.assertEqual(mock_get.call_args[1]['data'], ai_data)
+        self.assertEqual(
+            mock_get.call_args[1]['headers'], {'Content-type': 'application/json'}
+        )
+        self.assertNotIn('json', mock_get.call_args[1])
+
+
+@patch('studio.services.config')
+@patch('studio.services.fetch_api')
+class TestAICache(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.token = 'token'
+        self.ai = {
+            **factory.build(dict, FACTORY_CLASS=AiFactory),
+            'status': {'code': 200, 'info': 'OK'}
+        }
+
+    def configure(self, mock_fetch_api, mock_config):
+        mock_config.AI_CACHE_TTL = 60
+        mock_config.AI_CACHE_STALE_TTL = 0
+        mock_fetch_api.return_value = self.ai
+
+    def test_cached(self, mock_fetch_api, mock_config):
+        """Bot data is fetched once per developer and bot"""
+
+        self.configure(mock_fetch_api, mock_config)
+
+        get_ai(self.token, 'aiid')
+        get_ai(self.token, 'aiid')
+        get_ai_details(self.token, 'aiid')
+        get_ai('another token', 'aiid')
+
+        self.assertEqual(mock_fetch_api.call_count, 3)
+
+    def test_invalidated(self, mock_fetch_api, mock_config):
+        """Writes drop cached bot data"""
+
+        self.configure(mock_fetch_api, mock_config)
+
+        get_ai(self.token, 'aiid')
+        put_training_start(self.token, 'aiid')
+        get_ai(self.token, 'aiid')
+
+        self.assertEqual(mock_fetch_api.call_count, 3)
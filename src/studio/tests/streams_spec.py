@@ -0,0 +1,93 @@
+import itertools
+import json
+
+from unittest.mock import patch
+
+from django.test import override_settings
+from test_plus.test import TestCase
+
+from studio.streams import hub, training_events
+
+
+@override_settings(
+    TRAINING_STREAM_INTERVAL=0.01,
+    TRAINING_STREAM_HEARTBEAT=0.05,
+    TRAINING_STREAM_DURATION=1
+)
+@patch('studio.streams.get_ai')
+class TestTrainingEvents(TestCase):
+
+    def ai(self, status):
+        return {'status': {'code': 200}, 'training': {'status': status}}
+
+    def test_changes(self, mock_get_ai):
+        """Only status changes are sent"""
+
+        mock_get_ai.side_effect = itertools.chain(
+            [self.ai('training')] * 5, itertools.repeat(self.ai('completed'))
+        )
+        events = training_events('token', 'aiid')
+
+        self.assertEqual(next(events), 'retry: 10\n\n')
+
+        changes = (
+            json.loads(event[len('data: '):])['training']['status']
+            for event in events if event.startswith('data: ')
+        )
+
+        self.assertEqual(next(changes), 'training')
+        self.assertEqual(next(changes), 'completed')
+        events.close()
+
+    def test_end(self, mock_get_ai):
+        """Stream ends once the AI isn't training"""
+
+        mock_get_ai.return_value = self.ai('completed')
+        events = list(training_events('token', 'aiid'))
+
+        self.assertEqual(len(events), 2)
+        self.assertTrue(events[-1].startswith('data: '))
+        self.assertEqual(len(hub), 0)
+
+    def test_shared_poller(self, mock_get_ai):
+        """Streams of the same AI share a single poller"""
+
+        mock_get_ai.return_value = self.ai('training')
+
+        first = training_events('token', 'aiid')
+        second = training_events('token', 'aiid')
+        next(first)
+        next(second)
+
+        self.assertEqual(len(hub), 1)
+
+        first.close()
+        second.close()
+
+        self.assertEqual(len(hub), 0)
+
+    def test_heartbeat(self, mock_get_ai):
+        """Idle stream sends heartbeats"""
+
+        mock_get_ai.return_value = self.ai('training')
+        events = training_events('token', 'aiid')
+
+        next(events)
+        next(events)
+
+        self.assertEqual(next(events), ': heartbeat\n\n')
+        events.close()
+
+    @patch('studio.streams.loader')
+    def test_error_message(self, mock_loader, mock_get_ai):
+        """Training errors come with a message, as in the AI proxy"""
+
+        mock_get_ai.return_value = self.ai('error')
+        mock_loader.get_template.return_value.render.return_value = 'Retrain'
+        events = training_events('token', 'aiid')
+
+        next(events)
+        event = next(events)
+        events.close()
+
+        self.assertEqual(json.loads(event[len('data: '):])['training']['message'], 'Retrain')
@@ -0,0 +1,113 @@
+import json
+
+import factory
+
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth.signals import user_logged_in
+from django.core.cache import caches
+from django.test import override_settings
+from django.urls import reverse
+from test_plus.test import TestCase
+
+from studio import transcripts
+from users.models import Profile
+from users.tests.factories import UserFactory
+
+AIID = '0b2f2d3a-8c2e-4e5b-9a4e-2a8d3e3b1c11'
+
+
+def chat_response(token, aiid, payload):
+    return {
+        'status': {'code': 200, 'info': 'OK'},
+        'chatId': 'chat',
+        'result': {'answer': payload['q'].upper()}
+    }
+
+
+@patch('studio.views.post_chat', side_effect=chat_response)
+class TestChatTranscript(TestCase):
+
+    @factory.django.mute_signals(user_logged_in)
+    def setUp(self):
+        self.user = UserFactory()
+        Profile.objects.create(user=self.user)
+
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['token'] = 'token'
+        session.save()
+
+    def tearDown(self):
+        caches['sessions'].clear()
+
+    def chat(self, question):
+        return self.client.post(
+            reverse('studio:proxy.ai.chat', kwargs={'aiid': AIID}),
+            json.dumps({'q': question}),
+            content_type='application/json'
+        )
+
+    def transcript(self):
+        response = self.client.get(
+            reverse('studio:proxy.ai.chat.transcript', kwargs={'aiid': AIID})
+        )
+        return [(exchange['q'], exchange['response']['result']['answer'])
+                for exchange in response.json()['transcript']]
+
+    @override_settings(CHAT_TRANSCRIPT_LENGTH=2)
+    def test_capped(self, mock_post_chat):
+        """Only the last exchanges are kept"""
+
+        for question in ['hi', 'how are you', 'bye']:
+            self.chat(question)
+
+        self.assertEqual(self.transcript(), [('how are you', 'HOW ARE YOU'), ('bye', 'BYE')])
+
+    def test_clear(self, mock_post_chat):
+        """Clearing history removes the transcript"""
+
+        self.chat('hi')
+        self.client.delete(reverse('studio:proxy.ai.chat.transcript', kwargs={'aiid': AIID}))
+
+        self.assertEqual(self.transcript(), [])
+
+    def test_anonymous(self, mock_post_chat):
+        """Anonymous users have no transcript"""
+
+        self.client.logout()
+        response = self.client.get(
+            reverse('studio:proxy.ai.chat.transcript', kwargs={'aiid': AIID})
+        )
+
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(CHAT_TRANSCRIPT_LENGTH=2)
+@patch('studio.transcripts.get_connection')
+class TestRedisTranscript(TestCase):
+
+    def setUp(self):
+        self.session = MagicMock(session_key='session')
+        self.session.get_expiry_age.return_value = 60
+
+    def test_append(self, mock_connection):
+        """Exchanges are appended without reading the transcript"""
+
+        transcripts.append(self.session, AIID, 'hi', {'chatId': 'chat'})
+
+        pipeline = mock_connection.return_value.pipeline.return_value
+        key = caches['sessions'].make_key('chat.transcript:session:' + AIID)
+
+        self.assertEqual(pipeline.rpush.call_args[0][0], key)
+        pipeline.ltrim.assert_called_once_with(key, -2, -1)
+        pipeline.expire.assert_called_once_with(key, 60)
+        pipeline.execute.assert_called_once_with()
+        self.assertFalse(mock_connection.return_value.lrange.called)
+
+    def test_read(self, mock_connection):
+        mock_connection.return_value.lrange.return_value = [
+            json.dumps({'q': 'hi'}).encode('utf-8')
+        ]
+
+        self.assertEqual(transcripts.read(self.session, AIID), [{'q': 'hi'}])
@@ -753,3 +753,31 @@ class TestIntentsView(TestCase):
         self.assertContains(response, 'intent_4')
         self.assertContains(response, 'intent_5')
         self.assertContains(response, 'intent_6')
+
+
+class TestProxyViews(TestCase):
+
+    def setUp(self):
+        self.aiid = '00000000-0000-0000-0000-000000000000'
+
+    @patch('studio.views.get_ai_export')
+    def test_export_anonymous(self, mock_get_ai_export):
+        """Anonymous users are redirected to login instead of exporting"""
+
+        response = self.client.get(reverse('studio:proxy.ai.export', args=[self.aiid]))
+
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.url.startswith(reverse('account_login')))
+        mock_get_ai_export.assert_not_called()
+
+    @patch('studio.views.training_events')
+    def test_training_stream_anonymous(self, mock_training_events):
+        """Anonymous users get a JSON 401, not a redirect an EventSource can't follow"""
+
+        response = self.client.get(
+            reverse('studio:proxy.ai.training.stream', args=[self.aiid])
+        )
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {'message': 'Requires authentication'})
+        mock_training_events.assert_not_called()
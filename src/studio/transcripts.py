@@ -0,0 +1,99 @@
+"""
+Chat transcripts kept in the `sessions` cache.
+
+Every chat exchange is appended to a per session and AI transcript, so a
+reloaded studio page rehydrates the chat, and its context, with a single read
+instead of the user replaying messages. Redis keeps a transcript as a list
+capped to `CHAT_TRANSCRIPT_LENGTH` exchanges, appended without reading it, and
+it expires together with the session.
+"""
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_KEY = 'chat.transcript:{session}:{aiid}'
+
+
+def get_cache():
+    return caches[settings.SESSION_CACHE_ALIAS]
+
+
+def get_connection():
+    """Returns Redis connection of the sessions cache, `None` for other backends"""
+
+    try:
+        return get_redis_connection(settings.SESSION_CACHE_ALIAS)
+    except NotImplementedError:
+        return None
+
+
+def make_key(session, aiid):
+    return TRANSCRIPT_KEY.format(session=session.session_key, aiid=aiid)
+
+
+def append(session, aiid, question, response):
+    """Appends an exchange to the transcript, oldest exchanges are dropped"""
+
+    if session.session_key is None:
+        return
+
+    exchange = {
+        'q': question,
+        'timestamp': int(time.time() * 1000),
+        'response': response,
+    }
+    key = make_key(session, aiid)
+    length = settings.CHAT_TRANSCRIPT_LENGTH
+    timeout = session.get_expiry_age()
+    connection = get_connection()
+
+    if connection is None:
+        cache = get_cache()
+        transcript = cache.get(key) or []
+        cache.set(key, (transcript + [exchange])[-length:], timeout)
+        return
+
+    # Raw commands skip the cache, keys still get its prefix and version
+    key = get_cache().make_key(key)
+    pipeline = connection.pipeline()
+    pipeline.rpush(key, json.dumps(exchange))
+    pipeline.ltrim(key, -length, -1)
+    pipeline.expire(key, timeout)
+    pipeline.execute()
+
+
+def read(session, aiid):
+    """Returns exchanges of the transcript, oldest first"""
+
+    if session.session_key is None:
+        return []
+
+    key = make_key(session, aiid)
+    connection = get_connection()
+
+    if connection is None:
+        return get_cache().get(key) or []
+
+    key = get_cache().make_key(key)
+    return [json.loads(exchange.decode('utf-8')) for exchange in connection.lrange(key, 0, -1)]
+
+
+def clear(session, aiid):
+    """Removes the transcript, e.g. when the user clears chat history"""
+
+    if session.session_key is None:
+        return
+
+    key = make_key(session, aiid)
+    connection = get_connection()
+
+    if connection is None:
+        get_cache().delete(key)
+    else:
+        connection.delete(get_cache().make_key(key))
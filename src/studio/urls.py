@@ -48,8 +48,10 @@ from studio.views import (
     KnowledgeBaseFileUploadView,
     OAuthView,
     ProxyAiExportView,
+    ProxyAiTrainingStreamView,
     ProxyAiView,
     ProxyChatView,
+    ProxyChatTranscriptView,
     ProxyContextResetView,
     ProxyHandoverResetView,
     ProxyInsightsChartView,
@@ -256,6 +258,12 @@ urlpatterns = [
         name='proxy.ai'
     ),
 
+    path(
+        'proxy/ai/<uuid:aiid>/training/stream',
+        ProxyAiTrainingStreamView.as_view(),
+        name='proxy.ai.training.stream'
+    ),
+
     path(
         'proxy/ai/<uuid:aiid>/export',
         ProxyAiExportView.as_view(),
@@ -286,6 +294,12 @@ urlpatterns = [
         name='proxy.ai.chat'
     ),
 
+    path(
+        'proxy/ai/<uuid:aiid>/chat/transcript',
+        ProxyChatTranscriptView.as_view(),
+        name='proxy.ai.chat.transcript'
+    ),
+
     # Remove an intent
     path(
         'intent/delete/<uuid:aiid>/<slug:intent_name>',
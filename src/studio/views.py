@@ -8,7 +8,12 @@ from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.forms import formset_factory
-from django.http import HttpResponseRedirect, JsonResponse, HttpResponse
+from django.http import (
+    HttpResponse,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse
+)
 from django.shortcuts import redirect
 from django.template import loader
 from django.urls import reverse_lazy
@@ -19,7 +24,10 @@ from django.views.generic import ListView
 from django.views.generic.base import ContextMixin, TemplateView, RedirectView
 from django.views.generic.edit import FormView
 
-from .models import KnowledgeBaseFileBundle
+from app.concurrency import fetch_all
+from app.services import iter_stream
+
+from .models import KnowledgeBaseBlob, KnowledgeBaseFileBundle
 
 
 from studio.forms import (
@@ -72,9 +80,13 @@ from studio.services import (
     post_handover_reset,
 )
 from studio.decorators import json_login_required
+from studio.streams import training_events
+from studio import transcripts
 
 from botstore.services import get_purchased
 
+from users.groups import has_group
+
 logger = logging.getLogger(__name__)
 
 
@@ -82,24 +94,36 @@ class StudioViewMixin(ContextMixin):
 
     chatable = True
 
+    # AI, its details, KB experiment, Bot Store categories of navigation and a
+    # write, see `app.budget`
+    api_budget = 5
+
+    def get_api_resources(self):
+        """
+        API resources needed to render a view as `name: (function, *args)`,
+        views can extend it with their own resources. All of them are fetched
+        concurrently and are available in `self.resources`.
+        """
+
+        token = self.request.session.get('token', False)
+        aiid = self.kwargs['aiid']
+
+        return {
+            'ai': (get_ai, token, aiid),
+            'ai_details': (get_ai_details, token, aiid),
+            'show_kb': (get_experiments_list, token, aiid, 'show_knowledge_base'),
+        }
+
     def get_context_data(self, **kwargs):
         """Get AI information for studio navigation and training progress"""
 
+        self.resources = fetch_all(self.get_api_resources())
+
         context = super(StudioViewMixin, self).get_context_data(**kwargs)
-        context['ai'] = get_ai(
-            self.request.session.get('token', False),
-            self.kwargs['aiid']
-        )
-        context['ai_details'] = get_ai_details(
-            self.request.session.get('token', False),
-            self.kwargs['aiid']
-        )
+        context['ai'] = self.resources['ai']
+        context['ai_details'] = self.resources['ai_details']
         context['chatable'] = context['ai']['can_chat']
-        context['show_kb'] = get_experiments_list(
-            self.request.session.get('token', False),
-            self.kwargs.get('aiid', False),
-            'show_knowledge_base'
-        ).get('state')
+        context['show_kb'] = self.resources['show_kb'].get('state')
 
         if not context['chatable']:
             messages.info(self.request, _('To start chatting with your bot '
@@ -112,6 +136,16 @@ class StudioViewMixin(ContextMixin):
 @method_decorator(login_required, name='dispatch')
 class IntegrationView(StudioViewMixin, TemplateView):
     template_name = 'integration.html'
+    api_budget = 6
+
+    def get_api_resources(self):
+        resources = super(IntegrationView, self).get_api_resources()
+        resources['integration'] = (
+            get_facebook_connect_state,
+            self.request.session.get('token', False),
+            self.kwargs['aiid']
+        )
+        return resources
 
     def get_context_data(self, **kwargs):
         context = super(IntegrationView, self).get_context_data(**kwargs)
@@ -121,8 +155,9 @@ class IntegrationView(StudioViewMixin, TemplateView):
         token = self.request.session.get('token', False)
         aiid = self.kwargs['aiid']
 
-        context['integration'] = get_facebook_connect_state(token, aiid)
+        context['integration'] = self.resources['integration']
 
+        # Customisations exist only for an integrated page
         if context['integration'].get('page_integrated_id'):
             context['customisations'] = get_facebook_customisations(token, aiid)
 
@@ -153,6 +188,8 @@ class ProxyRegenerateWebhookSecretView(View):
 class ProxyAiView(View):
     """Temporary proxy until we open the full API to the world"""
 
+    api_budget = 1
+
     @method_decorator(json_login_required)
     def get(self, request, aiid, *args, **kwargs):
         ai = get_ai(self.request.session.get('token', False), aiid)
@@ -187,6 +224,22 @@ class ProxyAiView(View):
         return redirect('studio:summary')
 
 
+class ProxyAiTrainingStreamView(View):
+    """Streams AI training status changes as Server-Sent Events"""
+
+    @method_decorator(json_login_required)
+    def get(self, request, aiid, *args, **kwargs):
+        response = StreamingHttpResponse(
+            training_events(self.request.session.get('token', False), aiid),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Disable proxy buffering, events have to reach a browser immediately
+        response['X-Accel-Buffering'] = 'no'
+
+        return response
+
+
 @method_decorator(login_required, name='dispatch')
 class ProxyAiExportView(View):
     """Temporary proxy until we open the full API to the world"""
@@ -263,6 +316,7 @@ class AIListView(ListView):
     """List of AIs, current homepage"""
     context_object_name = 'ais'
     template_name = 'ai_list.html'
+    api_budget = 2
 
     def get_queryset(self, **kwargs):
         return get_ai_list(
@@ -291,6 +345,12 @@ class AICreateView(FormView):
     success_url = 'studio:ai.dashboard'
     action = 'add'
 
+    def get_save_kwargs(self):
+        return {
+            'token': self.request.session.get('token', False),
+            'aiid': self.kwargs.get('aiid', ''),
+        }
+
     def form_valid(self, form):
         """
         Send new AI to API, if successful redirects to second step using AIID
@@ -298,10 +358,7 @@ class AICreateView(FormView):
         form.
         """
 
-        ai = form.save(
-            token=self.request.session.get('token', False),
-            aiid=self.kwargs.get('aiid', '')
-        )
+        ai = form.save(**self.get_save_kwargs())
 
         # Check if save was successful
         if ai['status']['code'] in [200, 201]:
@@ -327,6 +384,13 @@ class AICreateView(FormView):
 class AICloneView(AICreateView):
     form_class = CloneAIForm
 
+    def get_save_kwargs(self):
+        """Knowledge Base of the developer's own bot is copied to the clone"""
+        return {
+            **super(AICloneView, self).get_save_kwargs(),
+            'devid': self.request.session.get('dev_id'),
+        }
+
     def get_initial(self, **kwargs):
         # Get AI data
         ai = get_ai(
@@ -351,7 +415,7 @@ class TemplateCloneView(AICreateView):
 
 @method_decorator(login_required, name='dispatch')
 @method_decorator(user_passes_test(
-    lambda user: user.groups.filter(name='feature.templates').exists(),
+    lambda user: has_group(user, 'feature.templates'),
     login_url='/'
 ), name='dispatch')
 class TemplateGetView(RedirectView):
@@ -437,23 +501,25 @@ class EntitiesView(StudioViewMixin, FormView):
     form_class = EntityForm
     template_name = 'entity_form.html'
     success_url = 'studio:entities.edit'
+    api_budget = 7
+
+    def get_api_resources(self):
+        """Entities list and regex experiment are fetched with studio data"""
+
+        token = self.request.session.get('token', False)
+        aiid = self.kwargs['aiid']
+
+        resources = super(EntitiesView, self).get_api_resources()
+        resources['entities'] = (get_entities_list, token, aiid)
+        resources['allow_regex'] = (get_experiments_list, token, aiid, 'regex-entity')
+        return resources
 
     def get_context_data(self, **kwargs):
         """Update context with Entities list"""
 
         context = super(EntitiesView, self).get_context_data(**kwargs)
-
-        # Get entities
-        context['entities'] = get_entities_list(
-            self.request.session.get('token', False),
-            self.kwargs.get('aiid')
-        ).get('entities')
-
-        context['allow_regex'] = get_experiments_list(
-            self.request.session.get('token', False),
-            self.kwargs.get('aiid', False),
-            'regex-entity'
-        ).get('state')
+        context['entities'] = self.resources['entities'].get('entities')
+        context['allow_regex'] = self.resources['allow_regex'].get('state')
 
         return context
 
@@ -495,6 +561,7 @@ class EntitiesUpdateView(EntitiesView):
     """Single Entity view"""
 
     form_class = EntityUpdateForm
+    api_budget = 8
 
     def get_initial(self, **kwargs):
         """Get and prepare Entity data"""
@@ -530,6 +597,7 @@ class IntentsView(StudioViewMixin, ListView):
     """List of AIs, current homepage"""
     context_object_name = 'intents'
     template_name = 'intents_list.html'
+    api_budget = 5
 
     def get_context_data(self, **kwargs):
         context = super(IntentsView, self).get_context_data(**kwargs)
@@ -556,6 +624,7 @@ class IntentsEditView(StudioViewMixin, FormView):
 
     form_class = IntentForm
     template_name = 'intent_form.html'
+    api_budget = {'get': 6, 'post': 7}
     formsets = {
         'CONDITIONS_IN': formset_factory(ConditionsFormset, extra=0, can_delete=True),
         'ENTITIES': formset_factory(EntityFormset, extra=0, can_delete=True),
@@ -564,16 +633,23 @@ class IntentsEditView(StudioViewMixin, FormView):
         'CONDITIONS_OUT': formset_factory(FollowUpFormset, extra=0, can_delete=True),
     }
 
+    def get_api_resources(self):
+        """Entities and Intents lists are fetched with studio data"""
+
+        token = self.request.session.get('token', False)
+        aiid = self.kwargs['aiid']
+
+        resources = super(IntentsEditView, self).get_api_resources()
+        resources['entities'] = (get_entities_list, token, aiid)
+        resources['intents'] = (get_intent_list, token, aiid)
+        return resources
+
     def get_context_data(self, **kwargs):
         """Update context with Intents list and Entities formsets"""
 
         context = super(IntentsEditView, self).get_context_data(**kwargs)
 
-        # Get entities
-        entities = get_entities_list(
-            self.request.session.get('token', False),
-            self.kwargs['aiid']
-        ).get('entities')
+        entities = self.resources['entities'].get('entities')
 
         # Custom entities goes first, sort alphabetically
         entities.sort(key=lambda entity: (
@@ -581,10 +657,9 @@ class IntentsEditView(StudioViewMixin, FormView):
             entity['entity_name']
         ))
 
-        intents = [intent['intent_name'] for intent in get_intent_list(
-            self.request.session.get('token', False),
-            self.kwargs['aiid']
-        ).get('intents', [])]
+        intents = [
+            intent['intent_name'] for intent in self.resources['intents'].get('intents', [])
+        ]
 
         # And pass it to formsets initial choice
         context['formsets'] = {
@@ -687,16 +762,17 @@ class IntentsEditView(StudioViewMixin, FormView):
     def post(self, request, *args, **kwargs):
         """Custom post for handling both Intent form and Entities entities_formset"""
 
-        # Get entities
-        entities = get_entities_list(
-            self.request.session.get('token', False),
-            self.kwargs.get('aiid')
-        ).get('entities')
+        token = self.request.session.get('token', False)
+        aiid = self.kwargs.get('aiid')
 
-        intents = [intent['intent_name'] for intent in get_intent_list(
-            self.request.session.get('token', False),
-            self.kwargs.get('aiid')
-        ).get('intents')]
+        # Get entities and intents
+        resources = fetch_all({
+            'entities': (get_entities_list, token, aiid),
+            'intents': (get_intent_list, token, aiid),
+        })
+
+        entities = resources['entities'].get('entities')
+        intents = [intent['intent_name'] for intent in resources['intents'].get('intents')]
 
         form = self.get_form()
 
@@ -726,6 +802,7 @@ class IntentsUpdateView(IntentsEditView):
 
     form_class = IntentUpdateForm
     success_url = 'studio:intents.edit'
+    api_budget = {'get': 7, 'post': 8}
 
     def get_initial(self, **kwargs):
         """Get and prepare Intent data"""
@@ -1051,7 +1128,16 @@ class ProxyInsightsLogsView(View):
             to_date
         )
 
-        response = HttpResponse(logs, content_type='application/csv', status=logs.status_code)
+        response = StreamingHttpResponse(
+            iter_stream(logs),
+            content_type='application/csv',
+            status=logs.status_code
+        )
+
+        for header in ('Content-Length', 'Content-Encoding'):
+            if header in logs.headers:
+                response[header] = logs.headers[header]
+
         response['Content-Disposition'] = 'attachment; filename="chatlogs.csv"'
         response.set_cookie('logs_download_token', token)
         return response
@@ -1109,15 +1195,34 @@ class ProxyContextResetView(View):
 class ProxyChatView(View):
     """Send chat message"""
 
+    api_budget = 1
+
     def post(self, request, aiid, *args, **kwargs):
+        payload = json.loads(request.body)
         response = post_chat(
             self.request.session.get('token', False),
             aiid,
-            payload=json.loads(request.body)
+            payload=payload
         )
+
+        if response['status']['code'] == 200:
+            transcripts.append(request.session, aiid, payload.get('q'), response)
+
         return JsonResponse(response, status=response['status']['code'])
 
 
+@method_decorator(json_login_required, name='dispatch')
+class ProxyChatTranscriptView(View):
+    """Chat exchanges of the session, used to restore the chat after a reload"""
+
+    def get(self, request, aiid, *args, **kwargs):
+        return JsonResponse({'transcript': transcripts.read(request.session, aiid)})
+
+    def delete(self, request, aiid, *args, **kwargs):
+        transcripts.clear(request.session, aiid)
+        return JsonResponse({'transcript': []})
+
+
 @method_decorator(login_required, name='dispatch')
 class KnowledgeBaseView(StudioViewMixin, FormView):
     """
@@ -1132,16 +1237,28 @@ class KnowledgeBaseView(StudioViewMixin, FormView):
         bundle = KnowledgeBaseFileBundle.create(self.request.session.get('dev_id'), self.kwargs['aiid'])
         context['basepath'] = bundle.basepath
         context['aiid'] = self.kwargs['aiid']
-        files = bundle.scan_folder()
+        files = bundle.list_files()
+        blobs = KnowledgeBaseBlob.objects.in_bulk([f.sha256 for f in files])
         # Transform the file data for rendering
         files_for_rendering = []
         for f in files:
+            blob = blobs.get(f.sha256)
             files_for_rendering.append({
                 'name':f.name, 
                 'size':f.size if f.size<1024 else '{:.2f} Kb'.format(f.size / 1024), 
-                'last_update':datetime.datetime.fromtimestamp(f.last_update)
+                'last_update':datetime.datetime.fromtimestamp(f.last_update),
+                'encoding': blob.encoding if blob else '',
+                'passages': blob.passages if blob else None,
+                'tokens': blob.tokens if blob else None,
             })
         context['files'] = files_for_rendering
+        # Keyword search across files of the bot
+        context['query'] = self.request.GET.get('q', '').strip()
+        if context['query']:
+            context['results'] = [
+                {'name': name, 'passage': passage}
+                for name, passage in bundle.search(context['query'])
+            ]
         return context
 
     def get_initial(self, **kwargs):    
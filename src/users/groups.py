@@ -0,0 +1,44 @@
+"""
+Group membership of users, groups switch features on, e.g. `feature.templates`.
+
+Names of groups of a user are read once per request and memoized on the user,
+they are shared by all workers in the `default` cache until groups of the
+user change, see `users.signals`.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+
+def get_cache_key(user_id):
+    return settings.USER_GROUPS_KEY.format(user_id=user_id)
+
+
+def get_group_names(user):
+    """Returns names of groups of a user"""
+
+    if not user.is_authenticated:
+        return frozenset()
+
+    names = getattr(user, '_group_names', None)
+
+    if names is None:
+        key = get_cache_key(user.pk)
+        names = cache.get(key)
+
+        if names is None:
+            names = frozenset(user.groups.values_list('name', flat=True))
+            cache.set(key, names)
+
+        user._group_names = names
+
+    return names
+
+
+def has_group(user, group_name):
+    """Check if user is member of a group"""
+    return group_name in get_group_names(user)
+
+
+def invalidate(user_ids):
+    """Drop cached groups of users after their groups changed"""
+    cache.delete_many([get_cache_key(user_id) for user_id in user_ids])
@@ -5,17 +5,18 @@ from allauth.account.signals import password_changed, password_reset
 
 from django.conf import settings
 from django.contrib import messages
-from django.contrib.auth.models import User
+from django.contrib.auth.models import Group, User
 from django.contrib.auth.signals import (
     user_logged_in,
     user_logged_out,
     user_login_failed
 )
 from django.core.cache import cache
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import m2m_changed, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from django.template import loader
 
+from users import groups
 from users.models import Profile
 from users.services import get_user_token, post_user
 
@@ -58,7 +59,8 @@ def user_logged_in(sender, user, request, **kwargs):
     request.session['token'] = api_user['dev_token']
     request.session['dev_id'] = profile.dev_id
 
-    # Store token for API logging, set TTL to session length, cleared at logout
+    # Store token for API logging outside of requests, set TTL to session length,
+    # cleared at logout
     cache.set(request.session['token'], profile.dev_id, timeout=request.session.get_expiry_age())
 
     logger.info('User {dev_id} has logged in'.format(
@@ -138,3 +140,26 @@ def create_profile(sender, instance, created, **kwargs):
         logger.info('Create profile for {dev_id}'.format(
             dev_id=instance.api_user['devid']
         ))
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Drop cached groups of users added to or removed from a group"""
+
+    if isinstance(instance, User):
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            instance.__dict__.pop('_group_names', None)
+            groups.invalidate([instance.pk])
+
+    elif action in ('post_add', 'post_remove'):
+        groups.invalidate(pk_set)
+
+    elif action == 'pre_clear':
+        groups.invalidate(instance.user_set.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    """Drop cached groups of members of a renamed or deleted group"""
+    groups.invalidate(instance.user_set.values_list('pk', flat=True))
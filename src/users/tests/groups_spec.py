@@ -0,0 +1,70 @@
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from test_plus.test import TestCase
+
+from users import groups
+from users.tests.factories import AnonymousUserFactory, UserFactory
+
+
+class TestGroups(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+        self.user = UserFactory()
+        self.group, created = Group.objects.get_or_create(name='feature.templates')
+
+    def reload(self):
+        return User.objects.get(pk=self.user.pk)
+
+    def test_memoized(self):
+        """Groups are queried once and shared through cache"""
+
+        self.user.groups.add(self.group)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(groups.has_group(self.user, 'feature.templates'))
+            self.assertFalse(groups.has_group(self.user, 'feature.other'))
+
+        user = self.reload()
+
+        with self.assertNumQueries(0):
+            self.assertTrue(groups.has_group(user, 'feature.templates'))
+
+    def test_anonymous(self):
+        """Anonymous users aren't members of any group"""
+
+        with self.assertNumQueries(0):
+            self.assertFalse(groups.has_group(AnonymousUserFactory(), 'feature.templates'))
+
+    def test_user_groups_changed(self):
+        """Groups are read again after they change"""
+
+        self.assertFalse(groups.has_group(self.user, 'feature.templates'))
+
+        self.user.groups.add(self.group)
+        self.assertTrue(groups.has_group(self.user, 'feature.templates'))
+        self.assertTrue(groups.has_group(self.reload(), 'feature.templates'))
+
+        self.user.groups.clear()
+        self.assertFalse(groups.has_group(self.reload(), 'feature.templates'))
+
+    def test_group_members_changed(self):
+        """Groups of members are read again after members change"""
+
+        self.assertFalse(groups.has_group(self.user, 'feature.templates'))
+
+        self.group.user_set.add(self.user)
+        self.assertTrue(groups.has_group(self.reload(), 'feature.templates'))
+
+        self.group.user_set.clear()
+        self.assertFalse(groups.has_group(self.reload(), 'feature.templates'))
+
+    def test_group_deleted(self):
+        """Groups of members are read again after a group is deleted"""
+
+        self.user.groups.add(self.group)
+        self.assertTrue(groups.has_group(self.reload(), 'feature.templates'))
+
+        self.group.delete()
+        self.assertFalse(groups.has_group(self.reload(), 'feature.templates'))